@@ -0,0 +1,70 @@
+"""lawyer full text search
+
+Revision ID: a1f3c5e7b9d2
+Revises: b1c2d3e4f5g6
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c5e7b9d2'
+down_revision = 'b1c2d3e4f5g6'
+branch_labels = None
+depends_on = None
+
+
+# Weighted document: name (A) > title (B) > bio (C)
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('lexic_spanish', coalesce({prefix}name, '')), 'A') ||
+    setweight(to_tsvector('lexic_spanish', coalesce({prefix}title, '')), 'B') ||
+    setweight(to_tsvector('lexic_spanish', coalesce({prefix}bio, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    # Spanish stemming on top of unaccent so "familia" matches "Família" and "divorcios" matches "divorcio"
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION lexic_spanish (COPY = pg_catalog.spanish)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION lexic_spanish "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem"
+    )
+
+    op.add_column('lawyers', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # Keep the vector in sync on every write that touches the indexed columns
+    op.execute(f"""
+        CREATE FUNCTION lawyers_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_EXPRESSION.format(prefix='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER lawyers_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, title, bio ON lawyers
+        FOR EACH ROW EXECUTE FUNCTION lawyers_search_vector_update()
+    """)
+
+    # Backfill existing rows
+    op.execute(f"UPDATE lawyers SET search_vector = {SEARCH_VECTOR_EXPRESSION.format(prefix='')}")
+
+    op.create_index(
+        'ix_lawyers_search_vector',
+        'lawyers',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lawyers_search_vector', table_name='lawyers')
+    op.execute("DROP TRIGGER IF EXISTS lawyers_search_vector_trigger ON lawyers")
+    op.execute("DROP FUNCTION IF EXISTS lawyers_search_vector_update()")
+    op.drop_column('lawyers', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS lexic_spanish")
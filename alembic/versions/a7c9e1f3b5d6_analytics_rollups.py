@@ -0,0 +1,60 @@
+"""analytics rollups
+
+Revision ID: a7c9e1f3b5d6
+Revises: f6b8d0e2a4c5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b5d6'
+down_revision = 'f6b8d0e2a4c5'
+branch_labels = None
+depends_on = None
+
+# Raw event tables and the column of the entity they track
+EVENT_TABLES = {
+    'profile_views': 'lawyer_id',
+    'message_events': 'lawyer_id',
+    'call_events': 'lawyer_id',
+    'profile_impressions': 'lawyer_id',
+    'listing_clicks': 'lawyer_id',
+    'guide_views': 'guide_id',
+    'question_views': 'question_id',
+}
+
+
+def upgrade() -> None:
+    "adds hourly and daily analytics rollups and the raw event indexes the rollup job reads"
+    for granularity in ('hourly', 'daily'):
+        op.create_table(
+            f'analytics_rollups_{granularity}',
+            sa.Column('metric', sa.String(), nullable=False),
+            sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('metric', 'entity_id', 'bucket_start')
+        )
+    # Finds the hours a rollup run touched, to refresh their days
+    op.create_index('ix_analytics_rollups_hourly_updated_at', 'analytics_rollups_hourly', ['updated_at'])
+
+    for table, entity_column in EVENT_TABLES.items():
+        # Recounting a bucket reads one entity's events in a time range
+        op.create_index(f'ix_{table}_{entity_column}_timestamp', table, [entity_column, 'timestamp'])
+        # New events since the watermark; BRIN stays tiny on these append-only tables
+        op.create_index(f'ix_{table}_created_at', table, ['created_at'], postgresql_using='brin')
+
+
+def downgrade() -> None:
+    "removes the analytics rollups and the raw event indexes"
+    for table, entity_column in EVENT_TABLES.items():
+        op.drop_index(f'ix_{table}_created_at', table_name=table)
+        op.drop_index(f'ix_{table}_{entity_column}_timestamp', table_name=table)
+    op.drop_index('ix_analytics_rollups_hourly_updated_at', table_name='analytics_rollups_hourly')
+    op.drop_table('analytics_rollups_daily')
+    op.drop_table('analytics_rollups_hourly')
@@ -0,0 +1,88 @@
+"""partition analytics events
+
+Revision ID: b8d0f2a4c6e8
+Revises: a7c9e1f3b5d6
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d0f2a4c6e8'
+down_revision = 'a7c9e1f3b5d6'
+branch_labels = None
+depends_on = None
+
+# Raw event tables and their foreign keys (column, referenced table, ON DELETE)
+EVENT_TABLES = {
+    'profile_views': [('lawyer_id', 'lawyers', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'message_events': [('lawyer_id', 'lawyers', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'call_events': [('lawyer_id', 'lawyers', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'profile_impressions': [('lawyer_id', 'lawyers', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'listing_clicks': [('lawyer_id', 'lawyers', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'guide_views': [('guide_id', 'guides', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+    'question_views': [('question_id', 'questions', 'CASCADE'), ('user_id', 'users', 'SET NULL')],
+}
+# Month partitions created past the current month, later ones come from the maintenance job
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_keys_and_indexes(table, foreign_keys, primary_key):
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({primary_key})")
+    for column, referenced, on_delete in foreign_keys:
+        op.execute(
+            f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) "
+            f"REFERENCES {referenced} (id) ON DELETE {on_delete}"
+        )
+    entity_column = foreign_keys[0][0]
+    op.create_index(f'ix_{table}_{entity_column}_timestamp', table, [entity_column, 'timestamp'])
+    op.create_index(f'ix_{table}_created_at', table, ['created_at'], postgresql_using='brin')
+
+
+def upgrade() -> None:
+    "converts the raw analytics event tables to tables partitioned by month of timestamp"
+    bind = op.get_bind()
+    this_month = date.today().replace(day=1)
+
+    for table, foreign_keys in EVENT_TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (timestamp)"
+        )
+        # Catches timestamps outside every month partition (e.g. a client with a wrong clock)
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        oldest = bind.execute(sa.text(f"SELECT min(timestamp) FROM {table}_unpartitioned")).scalar()
+        month = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+        while month <= _add_months(this_month, MONTHS_AHEAD):
+            next_month = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+            )
+            month = next_month
+
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned")
+        op.execute(f"DROP TABLE {table}_unpartitioned")
+        # Unique constraints on a partitioned table must include the partition key
+        _create_keys_and_indexes(table, foreign_keys, 'id, timestamp')
+
+
+def downgrade() -> None:
+    "converts the raw analytics event tables back to plain tables"
+    for table, foreign_keys in EVENT_TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"DROP TABLE {table}_partitioned")
+        _create_keys_and_indexes(table, foreign_keys, 'id')
@@ -0,0 +1,57 @@
+"""lawyer ranking score
+
+Revision ID: c3e5a7b9d1f2
+Revises: a1f3c5e7b9d2
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5a7b9d1f2'
+down_revision = 'a1f3c5e7b9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    "adds persisted ranking scores, their sort indexes and the job watermark table"
+    op.add_column('lawyers', sa.Column('rating_score', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('lawyers', sa.Column('ranking_score', sa.Float(), nullable=False, server_default='0'))
+    # Every existing lawyer starts stale so the first job run scores them
+    op.add_column('lawyers', sa.Column('ranking_stale', sa.Boolean(), nullable=False, server_default='true'))
+    op.add_column('lawyers', sa.Column('ranking_updated_at', sa.DateTime(), nullable=True))
+    op.add_column('lawyer_areas', sa.Column('ranking_score', sa.Float(), nullable=False, server_default='0'))
+
+    # Ranked pages walk these indexes in order, the id breaks ties for keyset cursors
+    op.execute("CREATE INDEX ix_lawyers_ranking_score ON lawyers (ranking_score DESC, id DESC)")
+    op.execute("CREATE INDEX ix_lawyers_rating_score ON lawyers (rating_score DESC, id DESC)")
+    op.execute(
+        "CREATE INDEX ix_lawyer_areas_area_ranking_score "
+        "ON lawyer_areas (area_id, ranking_score DESC, lawyer_id DESC)"
+    )
+    op.execute("CREATE INDEX ix_lawyers_ranking_stale ON lawyers (id) WHERE ranking_stale")
+
+    op.create_table(
+        'job_watermarks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    "removes ranking scores, their indexes and the job watermark table"
+    op.drop_table('job_watermarks')
+    op.drop_index('ix_lawyers_ranking_stale', table_name='lawyers')
+    op.drop_index('ix_lawyer_areas_area_ranking_score', table_name='lawyer_areas')
+    op.drop_index('ix_lawyers_rating_score', table_name='lawyers')
+    op.drop_index('ix_lawyers_ranking_score', table_name='lawyers')
+    op.drop_column('lawyer_areas', 'ranking_score')
+    op.drop_column('lawyers', 'ranking_updated_at')
+    op.drop_column('lawyers', 'ranking_stale')
+    op.drop_column('lawyers', 'ranking_score')
+    op.drop_column('lawyers', 'rating_score')
@@ -0,0 +1,29 @@
+"""position stats indexes
+
+Revision ID: c9e1a3b5d7f0
+Revises: b8d0f2a4c6e8
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1a3b5d7f0'
+down_revision = 'b8d0f2a4c6e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    "adds (lawyer_id, position) indexes for the per-lawyer position statistics"
+    # Counting one lawyer's impressions and clicks by position reads only these indexes
+    op.create_index('ix_profile_impressions_lawyer_id_position', 'profile_impressions', ['lawyer_id', 'position'])
+    op.create_index('ix_listing_clicks_lawyer_id_position', 'listing_clicks', ['lawyer_id', 'position'])
+
+
+def downgrade() -> None:
+    "removes the position statistics indexes"
+    op.drop_index('ix_listing_clicks_lawyer_id_position', table_name='listing_clicks')
+    op.drop_index('ix_profile_impressions_lawyer_id_position', table_name='profile_impressions')
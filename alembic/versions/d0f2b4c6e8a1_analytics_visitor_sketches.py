@@ -0,0 +1,43 @@
+"""analytics visitor sketches
+
+Revision ID: d0f2b4c6e8a1
+Revises: c9e1a3b5d7f0
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0f2b4c6e8a1'
+down_revision = 'c9e1a3b5d7f0'
+branch_labels = None
+depends_on = None
+
+VIEW_TABLES = ('profile_views', 'guide_views', 'question_views')
+
+
+def upgrade() -> None:
+    "adds visitor ids to the view events and the daily unique visitor sketches"
+    # Identifies anonymous visitors (e.g. a first-party cookie), signed-in ones use user_id
+    for table in VIEW_TABLES:
+        op.add_column(table, sa.Column('visitor_id', sa.String(), nullable=True))
+
+    op.create_table(
+        'analytics_visitor_sketches',
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.DateTime(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('metric', 'entity_id', 'day'),
+    )
+
+
+def downgrade() -> None:
+    "removes the unique visitor sketches and the visitor ids"
+    op.drop_table('analytics_visitor_sketches')
+    for table in VIEW_TABLES:
+        op.drop_column(table, 'visitor_id')
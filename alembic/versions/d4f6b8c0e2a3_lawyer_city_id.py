@@ -0,0 +1,66 @@
+"""lawyer city id
+
+Revision ID: d4f6b8c0e2a3
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b8c0e2a3'
+down_revision = 'c3e5a7b9d1f2'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Match the free-text city by slug (same shape as app.utils.slug.slugify) or by name,
+# ignoring case and accents
+BACKFILL_BATCH = sa.text("""
+    UPDATE lawyers AS l
+    SET city_id = c.id
+    FROM cities AS c
+    WHERE l.id = ANY(CAST(:ids AS uuid[]))
+      AND (
+        c.slug = trim(both '-' from lower(regexp_replace(unaccent(trim(l.city)), '[^a-zA-Z0-9]+', '-', 'g')))
+        OR lower(unaccent(c.name)) = lower(unaccent(trim(l.city)))
+      )
+""")
+
+
+def upgrade() -> None:
+    "adds an indexed city_id foreign key to lawyers and backfills it from the city string"
+    op.add_column('lawyers', sa.Column('city_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_lawyers_city_id_cities', 'lawyers', 'cities', ['city_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_lawyers_city_id', 'lawyers', ['city_id'])
+
+    # Backfill in id-ordered batches, each committed on its own to keep row locks short
+    connection = op.get_bind()
+    last_id = None
+    with op.get_context().autocommit_block():
+        while True:
+            ids = connection.execute(
+                sa.text(
+                    "SELECT id FROM lawyers WHERE city IS NOT NULL AND city_id IS NULL "
+                    + ("AND id > :last_id " if last_id else "")
+                    + "ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE},
+            ).scalars().all()
+            if not ids:
+                break
+            connection.execute(BACKFILL_BATCH, {"ids": ids})
+            last_id = ids[-1]
+
+
+def downgrade() -> None:
+    "removes the city_id foreign key from lawyers"
+    op.drop_index('ix_lawyers_city_id', table_name='lawyers')
+    op.drop_constraint('fk_lawyers_city_id_cities', 'lawyers', type_='foreignkey')
+    op.drop_column('lawyers', 'city_id')
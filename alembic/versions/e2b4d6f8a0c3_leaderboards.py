@@ -0,0 +1,38 @@
+"""leaderboards
+
+Revision ID: e2b4d6f8a0c3
+Revises: d0f2b4c6e8a1
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b4d6f8a0c3'
+down_revision = 'd0f2b4c6e8a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    "adds the precomputed leaderboard entries"
+    op.create_table(
+        'leaderboard_entries',
+        sa.Column('board', sa.String(), nullable=False),
+        sa.Column('period', sa.String(), nullable=False),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('board', 'period', 'scope', 'rank'),
+    )
+
+
+def downgrade() -> None:
+    "removes the leaderboard entries"
+    op.drop_table('leaderboard_entries')
@@ -0,0 +1,46 @@
+"""search trigram indexes
+
+Revision ID: e5a7c9d1f3b4
+Revises: d4f6b8c0e2a3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9d1f3b4'
+down_revision = 'd4f6b8c0e2a3'
+branch_labels = None
+depends_on = None
+
+# (index, table, column) searched by GET /search/suggest
+TRIGRAM_INDEXES = [
+    ('ix_lawyers_name_trgm', 'lawyers', 'name'),
+    ('ix_practice_areas_name_trgm', 'practice_areas', 'name'),
+    ('ix_topics_name_trgm', 'topics', 'name'),
+    ('ix_guides_title_trgm', 'guides', 'title'),
+    ('ix_cities_name_trgm', 'cities', 'name'),
+]
+
+
+def upgrade() -> None:
+    "adds trigram indexes on the lowercased, unaccented names used by search suggestions"
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is only STABLE (it reads its dictionary), index expressions need an IMMUTABLE
+    # function; pinning the dictionary makes this wrapper safe to declare so
+    op.execute("""
+        CREATE OR REPLACE FUNCTION lexic_normalize(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, value)) $$
+    """)
+    for index, table, column in TRIGRAM_INDEXES:
+        op.execute(f"CREATE INDEX {index} ON {table} USING gin (lexic_normalize({column}) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    "removes the search suggestion trigram indexes"
+    for index, _, _ in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.execute("DROP FUNCTION IF EXISTS lexic_normalize(text)")
@@ -0,0 +1,27 @@
+"""questions title trigram index
+
+Revision ID: f6b8d0e2a4c5
+Revises: e5a7c9d1f3b4
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b8d0e2a4c5'
+down_revision = 'e5a7c9d1f3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    "adds a trigram index for the questions section of GET /search"
+    op.execute(
+        "CREATE INDEX ix_questions_title_trgm ON questions USING gin (lexic_normalize(title) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    "removes the questions title trigram index"
+    op.execute("DROP INDEX IF EXISTS ix_questions_title_trgm")
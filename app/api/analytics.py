@@ -1,5 +1,10 @@
+import json
+from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Body
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from uuid import UUID
 
@@ -15,20 +20,28 @@ from app.schemas.analytics import (
     ProfileImpressionCreate, ProfileImpressionResponse,
     ListingClickCreate, ListingClickResponse,
     GuideViewCreate, GuideViewResponse,
-    QuestionViewCreate, QuestionViewResponse
+    QuestionViewCreate, QuestionViewResponse,
+    AnalyticsEvent, AnalyticsEventBatchResponse, RejectedEvent,
 )
 from app.schemas.message import CallCreate, CallCreateResponse
 from app.api.dependencies import get_current_user, get_optional_current_user
 from app.models.user import User
 from app.models.lawyer import Lawyer as LawyerModel
+from app.core.config import settings
+from app.services import analytics_dedup, analytics_export, analytics_rollups, analytics_summary
+from app.services.analytics_ingestion import analytics_buffer, event_row, existing_targets
+from app.services.tasks import task_executor
 
 router = APIRouter()
 
+_event_adapter = TypeAdapter(AnalyticsEvent)
+
 @router.post("/profile-view", response_model=ProfileViewResponse, status_code=status.HTTP_201_CREATED)
 async def track_profile_view(
     view: ProfileViewCreate,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a profile view
@@ -42,8 +55,14 @@ async def track_profile_view(
     if current_user and not view.user_id:
         view.user_id = current_user.id
     
-    # Create profile view record
-    analytics_repository.create_profile_view(db, view)
+    # Queue the record, written with the next batch unless it repeats a recent view
+    task_executor.submit(
+        "profile_view",
+        analytics_dedup.enqueue_view,
+        "profile_view",
+        view,
+        analytics_dedup.client_fingerprint(request),
+    )
     
     return ProfileViewResponse(success=True)
 
@@ -51,7 +70,7 @@ async def track_profile_view(
 async def track_message_event(
     event: MessageEventCreate,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a message event (opened, sent, etc.)
@@ -65,8 +84,8 @@ async def track_message_event(
     if current_user and not event.user_id:
         event.user_id = current_user.id
     
-    # Create message event record
-    analytics_repository.create_message_event(db, event)
+    # Queue the record, written with the next batch
+    task_executor.submit("message_event", analytics_buffer.enqueue, "message_event", event)
     
     return MessageEventResponse(success=True)
 
@@ -74,7 +93,7 @@ async def track_message_event(
 async def track_call_event(
     event: CallEventCreate,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a call event
@@ -88,8 +107,8 @@ async def track_call_event(
     if current_user and not event.user_id:
         event.user_id = current_user.id
     
-    # Create call event record
-    analytics_repository.create_call_event(db, event)
+    # Queue the record, written with the next batch
+    task_executor.submit("call_event", analytics_buffer.enqueue, "call_event", event)
     
     return CallEventResponse(success=True)
 
@@ -98,7 +117,7 @@ async def track_call_event(
 async def track_profile_impression(
     impression: ProfileImpressionCreate,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a profile impression in search results
@@ -112,8 +131,8 @@ async def track_profile_impression(
     if current_user and not impression.user_id:
         impression.user_id = current_user.id
     
-    # Create profile impression record
-    analytics_repository.create_profile_impression(db, impression)
+    # Queue the record, written with the next batch
+    task_executor.submit("profile_impression", analytics_buffer.enqueue, "profile_impression", impression)
     
     return ProfileImpressionResponse(success=True)
 
@@ -121,7 +140,7 @@ async def track_profile_impression(
 async def track_listing_click(
     click: ListingClickCreate,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a click on a lawyer listing
@@ -135,16 +154,17 @@ async def track_listing_click(
     if current_user and not click.user_id:
         click.user_id = current_user.id
     
-    # Create listing click record
-    analytics_repository.create_listing_click(db, click)
+    # Queue the record, written with the next batch
+    task_executor.submit("listing_click", analytics_buffer.enqueue, "listing_click", click)
     
     return ListingClickResponse(success=True)
 
 @router.post("/guide-view", response_model=GuideViewResponse, status_code=status.HTTP_201_CREATED)
 async def track_guide_view(
     view: GuideViewCreate,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a guide view
@@ -158,16 +178,23 @@ async def track_guide_view(
     if current_user and not view.user_id:
         view.user_id = current_user.id
     
-    # Create guide view record
-    analytics_repository.create_guide_view(db, view)
+    # Queue the record, written with the next batch unless it repeats a recent view
+    task_executor.submit(
+        "guide_view",
+        analytics_dedup.enqueue_view,
+        "guide_view",
+        view,
+        analytics_dedup.client_fingerprint(request),
+    )
     
     return GuideViewResponse(success=True)
 
 @router.post("/question-view", response_model=QuestionViewResponse, status_code=status.HTTP_201_CREATED)
 async def track_question_view(
     view: QuestionViewCreate,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: Optional[User] = Depends(get_optional_current_user),
 ):
     """
     Track a question view
@@ -181,36 +208,144 @@ async def track_question_view(
     if current_user and not view.user_id:
         view.user_id = current_user.id
     
-    # Create question view record
-    analytics_repository.create_question_view(db, view)
+    # Queue the record, written with the next batch unless it repeats a recent view
+    task_executor.submit(
+        "question_view",
+        analytics_dedup.enqueue_view,
+        "question_view",
+        view,
+        analytics_dedup.client_fingerprint(request),
+    )
     
     return QuestionViewResponse(success=True)
 
 
-@router.get("/lawyers/{lawyer_id}/position-stats", status_code=status.HTTP_200_OK)
-async def get_lawyer_position_stats(
+@router.post("/events", response_model=AnalyticsEventBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def track_events(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_current_user),
+):
+    """
+    Track a batch of mixed events in one request
+    The body is a JSON array of events (or {"events": [...]}), each with a `type`
+    (profile_view, message_event, call_event, profile_impression, listing_click,
+    guide_view, question_view) and the fields of that event. It is parsed whatever
+    its content type, so navigator.sendBeacon can post it as text/plain.
+    Invalid events and events for unknown lawyers, guides or questions are rejected
+    one by one; views repeating a recent view of the same visitor are suppressed (see
+    app/services/analytics_dedup.py); the rest are queued and written together
+    """
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    if isinstance(payload, dict):
+        payload = payload.get("events")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a list of events")
+    if len(payload) > settings.ANALYTICS_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ANALYTICS_BATCH_MAX_EVENTS} events per batch",
+        )
+
+    rejected = []
+    indexes, events = [], []
+    for index, item in enumerate(payload):
+        try:
+            event = _event_adapter.validate_python(item)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            rejected.append(RejectedEvent(index=index, error=f"{location}: {error['msg']}"))
+            continue
+        # Set user_id from current_user if authenticated and not provided
+        if current_user and not event.user_id:
+            event.user_id = current_user.id
+        indexes.append(index)
+        events.append((event.type, event_row(event.type, event)))
+
+    # One IN query per entity type for the whole batch
+    found = []
+    for index, event, exists in zip(indexes, events, existing_targets(db, events)):
+        if exists:
+            found.append(event)
+        else:
+            rejected.append(RejectedEvent(index=index, error="Target not found"))
+
+    # A shared dedup backend is a network round trip per view, keep it off the event
+    # loop; if the check is shed every view is kept
+    repeats = await task_executor.run(
+        "dedup_check",
+        analytics_dedup.repeat_flags,
+        found,
+        analytics_dedup.client_fingerprint(request),
+        shed_result=[False] * len(found),
+    )
+    accepted = [event for event, repeat in zip(found, repeats) if not repeat]
+
+    # Queue the accepted records, written with the next batch
+    if accepted:
+        task_executor.submit("events_batch", analytics_buffer.enqueue_many, accepted)
+
+    return AnalyticsEventBatchResponse(
+        success=True,
+        accepted=len(accepted),
+        suppressed=len(found) - len(accepted),
+        rejected=sorted(rejected, key=lambda event: event.index),
+    )
+
+
+@router.get("/lawyers/{lawyer_id}/timeseries", status_code=status.HTTP_200_OK)
+async def get_lawyer_timeseries(
     lawyer_id: UUID,
-    db: Session = Depends(get_db)
+    metric: str = "profile_views",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    db: Session = Depends(get_db),
 ):
     """
-    Get statistics about how a lawyer's position in search results affects impressions and clicks
+    Counts of one metric for a lawyer per hour or day, read from the analytics rollups
+    Metrics: profile_views, impressions, clicks, calls, calls_completed and
+    messages_<status> (e.g. messages_sent). `to` defaults to now and `from` to the last
+    7 days (day) or 48 hours (hour); buckets with no events are returned as 0.
+    Daily profile_views also carry estimated unique visitors, per day and over the
+    range, with their relative standard error (HyperLogLog, about 1.6%)
     """
+    if not analytics_rollups.is_lawyer_metric(metric):
+        raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+
     # Verify lawyer exists
-    lawyer = lawyers_repository.get_lawyer_by_id(db, lawyer_id)
-    if not lawyer:
+    if not db.query(LawyerModel.id).filter(LawyerModel.id == lawyer_id).first():
         raise HTTPException(status_code=404, detail="Lawyer not found")
-    
-    # Get position stats
-    position_stats = analytics_repository.get_profile_impression_position_stats(db, lawyer_id)
-    
-    # Optional: Calculate additional metrics like click-through rates by position
-    # This would require joining impression and click data
-    
+
+    end = end or datetime.now()
+    start = start or end - (timedelta(days=7) if granularity == "day" else timedelta(hours=48))
+    try:
+        points = analytics_rollups.timeseries(db, metric, lawyer_id, start, end, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    data = {
+        "metric": metric,
+        "granularity": granularity,
+        "from": start,
+        "to": end,
+        "total": sum(point["count"] for point in points),
+        "points": points,
+    }
+    if granularity == "day" and metric in analytics_rollups.VISITOR_METRICS:
+        visitors = analytics_rollups.unique_visitors(db, metric, lawyer_id, start, end)
+        for point in points:
+            point["unique_visitors"] = visitors["by_day"].get(point["bucket"], 0)
+        data["unique_visitors"] = visitors["total"]
+        data["unique_visitors_relative_error"] = visitors["relative_error"]
+
     return {
         "success": True,
-        "data": {
-            "position_stats": position_stats
-        }
+        "data": data,
     }
 
 @router.get("/lawyers/{lawyer_id}/position-stats", status_code=status.HTTP_200_OK)
@@ -222,11 +357,10 @@ async def get_lawyer_position_stats(
     Get statistics about how a lawyer's position in search results affects impressions and clicks
     """
     # Verify lawyer exists
-    lawyer = lawyers_repository.get_lawyer_by_id(db, lawyer_id)
-    if not lawyer:
+    if not db.query(LawyerModel.id).filter(LawyerModel.id == lawyer_id).first():
         raise HTTPException(status_code=404, detail="Lawyer not found")
     
-    # Get position stats
+    # Get position stats, all three from the same cached statement
     impression_stats = analytics_repository.get_profile_impression_position_stats(db, lawyer_id)
     click_stats = analytics_repository.get_listing_click_position_stats(db, lawyer_id)
     ctr_stats = analytics_repository.get_click_through_rate_by_position(db, lawyer_id)
@@ -251,6 +385,59 @@ async def get_lawyer_position_stats(
     }
 
 
+@router.get("/lawyers/{lawyer_id}/export", status_code=status.HTTP_200_OK)
+async def export_lawyer_events(
+    lawyer_id: UUID,
+    type: str = Query(..., description="profile_views, impressions, clicks, messages or calls"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download a lawyer's raw events of one type as CSV or NDJSON, gzipped if asked
+    Available to the lawyer and to admins; only admins get the user and visitor ids.
+    `to` defaults to now and `from` to ANALYTICS_EXPORT_DEFAULT_DAYS before it. Rows
+    are streamed from a server-side cursor, so any range can be exported
+    """
+    lawyer = db.query(LawyerModel.id, LawyerModel.user_id).filter(LawyerModel.id == lawyer_id).first()
+    if not lawyer:
+        raise HTTPException(status_code=404, detail="Lawyer not found")
+    if not current_user.is_admin and lawyer.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    end = end or datetime.now()
+    start = start or end - timedelta(days=settings.ANALYTICS_EXPORT_DEFAULT_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="`from` must be before `to`")
+    try:
+        # The request's session is closed before the body is sent, the export
+        # streams from a connection of its own
+        chunks = analytics_export.export_events(
+            db.get_bind(),
+            type,
+            lawyer_id,
+            start,
+            end,
+            format=format,
+            gzip=gzip,
+            include_identity=current_user.is_admin,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type, extension = analytics_export.FORMATS[format]
+    filename = f"{type}-{lawyer_id}-{start:%Y%m%d}-{end:%Y%m%d}.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.get("/summary", status_code=status.HTTP_200_OK)
 async def get_analytics_summary(
     db: Session = Depends(get_db),
@@ -260,30 +447,15 @@ async def get_analytics_summary(
     Get a summary of all analytics data for the current user's lawyer profile
     """
     # Find the lawyer profile associated with this user
-    lawyer = db.query(LawyerModel).filter(LawyerModel.user_id == current_user.id).first()
+    lawyer = db.query(LawyerModel.id, LawyerModel.name, LawyerModel.title).filter(
+        LawyerModel.user_id == current_user.id
+    ).first()
     if not lawyer:
         raise HTTPException(status_code=404, detail="No lawyer profile found for current user")
     
-    lawyer_id = lawyer.id
-    
-    # Get all analytics data
-    profile_view_count = analytics_repository.get_profile_view_count(db, lawyer_id)
-    message_sent_count = analytics_repository.get_message_event_count(db, lawyer_id, "sent")
-    message_read_count = analytics_repository.get_message_event_count(db, lawyer_id, "read")
-    call_count = analytics_repository.get_call_event_count(db, lawyer_id)
-    call_completed_count = analytics_repository.get_call_event_count(db, lawyer_id, completed_only=True)
-    impression_count = analytics_repository.get_profile_impression_count(db, lawyer_id)
-    
-    # Get position-based statistics
-    impression_stats = analytics_repository.get_profile_impression_position_stats(db, lawyer_id)
-    click_stats = analytics_repository.get_listing_click_position_stats(db, lawyer_id)
-    ctr_stats = analytics_repository.get_click_through_rate_by_position(db, lawyer_id)
-    
-    # Calculate engagement metrics
-    total_clicks = sum(click_stats.values())
-    message_rate = (message_sent_count / profile_view_count * 100) if profile_view_count > 0 else 0
-    call_rate = (call_count / profile_view_count * 100) if profile_view_count > 0 else 0
-    overall_ctr = (total_clicks / impression_count * 100) if impression_count > 0 else 0
+    # Counters and position data in two statements, cached per lawyer until new events
+    # are flushed; run off the event loop on a miss
+    summary = await run_in_threadpool(analytics_summary.get_summary, db, lawyer.id)
     
     return {
         "success": True,
@@ -293,24 +465,6 @@ async def get_analytics_summary(
                 "title": lawyer.title,
                 "id": str(lawyer.id)
             },
-            "counts": {
-                "profile_views": profile_view_count,
-                "messages_sent": message_sent_count,
-                "messages_read": message_read_count,
-                "calls": call_count,
-                "calls_completed": call_completed_count,
-                "impressions": impression_count,
-                "clicks": total_clicks
-            },
-            "rates": {
-                "message_rate": round(message_rate, 2),
-                "call_rate": round(call_rate, 2),
-                "overall_ctr": round(overall_ctr, 2)
-            },
-            "position_data": {
-                "impression_stats": impression_stats,
-                "click_stats": click_stats,
-                "ctr_by_position": ctr_stats
-            }
+            **summary,
         }
-    }
\ No newline at end of file
+    }
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, File, UploadFile
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from uuid import UUID
@@ -16,6 +16,7 @@ from app.schemas.guide import (
 )
 from app.api.dependencies import get_current_active_verified_user, get_optional_current_user
 from app.models.user import User
+from app.services.analytics_dedup import client_fingerprint
 from app.utils.analytics import track_guide_view_async
 
 router = APIRouter()
@@ -34,7 +35,7 @@ async def get_guides(
     skip = (page - 1) * limit
     
     # Get guides with optional category filter
-    guides, total = guides_repository.get_guides(
+    guides, total, total_is_estimate = guides_repository.get_guides(
         db, 
         skip=skip, 
         limit=limit, 
@@ -48,6 +49,7 @@ async def get_guides(
     return {
         "guides": guides,
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "page": page,
         "pages": pages
     }
@@ -55,9 +57,9 @@ async def get_guides(
 @router.get("/slug/{slug}", response_model=GuideDetail)
 async def get_guide_by_slug(
     slug: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """
     Get a guide by slug with complete information including all sections
@@ -72,10 +74,9 @@ async def get_guide_by_slug(
     
     # Track guide view asynchronously
     track_guide_view_async(
-        background_tasks=background_tasks,
         guide_id=guide.id,
         user_id=current_user.id if current_user else None,
-        db=db
+        fingerprint=client_fingerprint(request),
     )
     
     return guide
@@ -3,6 +3,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.db.database import get_db
+from app.services import analytics_dedup, search_cache
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.jobs import job_runner
+from app.services.tasks import task_executor
 
 router = APIRouter()
 
@@ -28,4 +32,19 @@ async def database_health_check(db: Session = Depends(get_db)):
         return {
             "status": "error",
             "message": f"Database connection error: {str(e)}"
-        }, status.HTTP_500_INTERNAL_SERVER_ERROR
\ No newline at end of file
+        }, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@router.get("/health/metrics", status_code=status.HTTP_200_OK)
+async def metrics():
+    """
+    In-process counters of this worker: analytics ingestion, background jobs, deferred
+    tasks and caches
+    """
+    return {
+        "analytics_ingestion": analytics_buffer.stats(),
+        "analytics_dedup": analytics_dedup.stats(),
+        "background_jobs": job_runner.stats(),
+        "background_tasks": task_executor.stats(),
+        "lawyer_search_cache": search_cache.stats(),
+    }
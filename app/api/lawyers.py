@@ -2,27 +2,26 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 
 from app.db.database import get_db
 from app.db.repositories import lawyers as lawyers_repository
 from app.db.repositories import areas as areas_repository
-from app.db.repositories import analytics as analytics_repository
-from app.schemas.analytics import (
-    ProfileViewCreate,
-    ProfileImpressionCreate,
-)
+from app.services import analytics_dedup, search_cache
+from app.services.tasks import task_executor
+from app.schemas.analytics import ProfileViewCreate
+from app.utils.analytics import track_search_impressions_async
 from app.schemas.lawyer import (
     Lawyer,
     LawyerDetail,
     LawyerCreate,
     LawyerUpdate,
     LawyerList,
+    LawyerFacets,
 )
 from app.api.dependencies import get_optional_current_user
 from app.models.user import User
-from app.models.area import lawyer_area_association
 from app.db.repositories.users import get_user_by_id
 
 # Import routers for lawyer-related endpoints
@@ -42,44 +41,45 @@ async def search_lawyers(
     sort: str = "best_match",
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     user_id: Optional[UUID] = None,
     current_user: Optional[User] = Depends(get_optional_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     Search lawyers with various filters
+    Pages by `page`/`size`, or by keyset when `cursor` (a next_cursor/prev_cursor
+    from a previous response) is given, in which case `page` is ignored
     """
     skip = (page - 1) * size
     
-    lawyers, total = lawyers_repository.search_lawyers(
-        db, 
-        area_slug=area, 
-        city=city, 
-        query=q, 
-        sort=sort, 
-        skip=skip, 
-        limit=size,
-        user_id=user_id,
-    )
-    
-    # Track profile impressions asynchronously for each lawyer in the search results
-    for position, lawyer in enumerate(lawyers):
-        impression_data = {
-            "lawyer_id": lawyer['id'],
-            "user_id": current_user.id if current_user else None,
-            "search_query": q,
-            "area_slug": area,
-            "city_slug": city,
-            "position": position + skip + 1,
-            "timestamp": datetime.now()
-        }
-        
-        # Track impression via background task
-        background_tasks.add_task(
-            analytics_repository.create_profile_impression,
-            db=db,
-            impression=ProfileImpressionCreate(**impression_data)
+    try:
+        # Cached pages still get their impressions tracked below
+        lawyers, total, page_info = search_cache.search_lawyers(
+            db, 
+            area_slug=area, 
+            city=city, 
+            query=q, 
+            sort=sort, 
+            skip=skip, 
+            limit=size,
+            user_id=user_id,
+            cursor=cursor,
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Position of the first result, also known in cursor mode
+    offset = page_info["offset"]
+    
+    # Track the page's profile impressions in one batch after the response
+    track_search_impressions_async(
+        [lawyer['id'] for lawyer in lawyers],
+        first_position=offset + 1,
+        search_query=q,
+        area_slug=area,
+        city_slug=city,
+        user_id=current_user.id if current_user else None,
+    )
     
     # Calculate total pages
     pages = (total + size - 1) // size
@@ -87,18 +87,41 @@ async def search_lawyers(
     return LawyerList(
         lawyers=lawyers,
         total=total, 
-        page=page, 
+        total_is_estimate=page_info["total_is_estimate"],
+        page=offset // size + 1, 
         size=size, 
-        pages=pages
+        pages=pages,
+        next_cursor=page_info["next_cursor"],
+        prev_cursor=page_info["prev_cursor"],
+    )
+
+@router.get("/facets", response_model=LawyerFacets)
+async def get_lawyer_facets(
+    db: Session = Depends(get_db),
+    area: Optional[str] = None,
+    city: Optional[str] = None,
+    q: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+):
+    """
+    Lawyer counts per area, city, language and verification status for the
+    same filters as the search endpoint
+    """
+    return lawyers_repository.get_lawyer_facets(
+        db,
+        area_slug=area,
+        city=city,
+        query=q,
+        user_id=user_id,
     )
 
 @router.get("/{lawyer_id}", response_model=LawyerDetail)
 async def get_lawyer(
     lawyer_id: UUID,
+    request: Request,
     source: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     Get a specific lawyer by ID
@@ -118,45 +141,17 @@ async def get_lawyer(
             "timestamp": datetime.now(),
         }
 
-        # Perform tracking asynchronously via background task
-        background_tasks.add_task(
-            analytics_repository.create_profile_view,
-            db=db,
-            view=ProfileViewCreate(**view_data),
+        # Perform tracking asynchronously on the task executor, repeats inside the
+        # dedup window are dropped there
+        task_executor.submit(
+            "profile_view",
+            analytics_dedup.enqueue_view,
+            "profile_view",
+            ProfileViewCreate(**view_data),
+            analytics_dedup.client_fingerprint(request),
         )
 
-    # Process the lawyer's areas to match LawyerPracticeArea format
-    area_scores = (
-        db.query(
-            lawyer_area_association.c.area_id,
-            lawyer_area_association.c.experience_score,
-        )
-        .filter(lawyer_area_association.c.lawyer_id == db_lawyer.id)
-        .all()
-    )
-
-    score_map = {str(area_id): score for area_id, score in area_scores}
-
-    # Create a dictionary for the lawyer
-    lawyer_dict = db_lawyer.__dict__.copy()
-    if "_sa_instance_state" in lawyer_dict:
-        del lawyer_dict["_sa_instance_state"]
-
-    # Process areas
-    processed_areas = []
-    for area in db_lawyer.areas:
-        processed_areas.append(
-            {
-                "id": str(area.id),
-                "name": area.name,
-                "slug": area.slug,
-                "experience_score": score_map.get(str(area.id), 0),
-            }
-        )
-
-    lawyer_dict["areas"] = processed_areas
-
-    return lawyer_dict
+    return lawyers_repository.serialize_lawyer(db_lawyer)
 
 
 @router.post("", response_model=Lawyer, status_code=status.HTTP_201_CREATED)
@@ -176,9 +171,11 @@ async def create_lawyer(
 
     # Check if areas exist if provided
     if lawyer.areas:
+        existing_ids = areas_repository.get_existing_area_ids(
+            db, [area_assoc.area_id for area_assoc in lawyer.areas]
+        )
         for area_assoc in lawyer.areas:
-            db_area = areas_repository.get_area_by_id(db, area_assoc.area_id)
-            if not db_area:
+            if area_assoc.area_id not in existing_ids:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Practice area with ID {area_assoc.area_id} not found",
@@ -196,40 +193,7 @@ async def create_lawyer(
 
     db_lawyer = lawyers_repository.create_lawyer(db, lawyer)
 
-    # Process the lawyer's areas to match LawyerPracticeArea format
-    area_scores = (
-        db.query(
-            lawyer_area_association.c.area_id,
-            lawyer_area_association.c.experience_score,
-        )
-        .filter(lawyer_area_association.c.lawyer_id == db_lawyer.id)
-        .all()
-    )
-
-    score_map = {str(area_id): score for area_id, score in area_scores}
-
-    # Create a dictionary for the lawyer
-    lawyer_dict = db_lawyer.__dict__.copy()
-    if "_sa_instance_state" in lawyer_dict:
-        del lawyer_dict["_sa_instance_state"]
-
-    # Process areas
-    processed_areas = []
-    for area in db_lawyer.areas:
-        processed_areas.append(
-            {
-                "id": str(area.id),
-                "name": area.name,
-                "slug": area.slug,
-                "experience_score": score_map.get(str(area.id), 0),
-            }
-        )
-
-    lawyer_dict["areas"] = processed_areas
-    lawyer_dict["review_score"] = 0.0  # Default value
-    lawyer_dict["review_count"] = 0  # Default value
-
-    return lawyer_dict
+    return lawyers_repository.serialize_lawyer(db_lawyer)
 
 
 @router.patch("/{lawyer_id}", response_model=Lawyer)
@@ -247,9 +211,11 @@ async def update_lawyer(
 
     # Check if areas exist if provided
     if lawyer.areas:
+        existing_ids = areas_repository.get_existing_area_ids(
+            db, [area_assoc.area_id for area_assoc in lawyer.areas]
+        )
         for area_assoc in lawyer.areas:
-            db_area = areas_repository.get_area_by_id(db, area_assoc.area_id)
-            if not db_area:
+            if area_assoc.area_id not in existing_ids:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Practice area with ID {area_assoc.area_id} not found",
@@ -265,40 +231,7 @@ async def update_lawyer(
 
     updated_lawyer = lawyers_repository.update_lawyer(db, db_lawyer, lawyer)
 
-    # Process the lawyer's areas to match LawyerPracticeArea format
-    area_scores = (
-        db.query(
-            lawyer_area_association.c.area_id,
-            lawyer_area_association.c.experience_score,
-        )
-        .filter(lawyer_area_association.c.lawyer_id == updated_lawyer.id)
-        .all()
-    )
-
-    score_map = {str(area_id): score for area_id, score in area_scores}
-
-    # Create a dictionary for the lawyer
-    lawyer_dict = updated_lawyer.__dict__.copy()
-    if "_sa_instance_state" in lawyer_dict:
-        del lawyer_dict["_sa_instance_state"]
-
-    # Process areas
-    processed_areas = []
-    for area in updated_lawyer.areas:
-        processed_areas.append(
-            {
-                "id": str(area.id),
-                "name": area.name,
-                "slug": area.slug,
-                "experience_score": score_map.get(str(area.id), 0),
-            }
-        )
-
-    lawyer_dict["areas"] = processed_areas
-    lawyer_dict["review_score"] = 0.0  # Default value
-    lawyer_dict["review_count"] = 0  # Default value
-
-    return lawyer_dict
+    return lawyers_repository.serialize_lawyer(updated_lawyer)
 
 
 @router.delete("/{lawyer_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,44 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import get_db
+from app.services import leaderboards
+
+router = APIRouter()
+
+@router.get("/{board}")
+async def get_leaderboard(
+    board: str,
+    period: str = Query("7d", pattern="^(24h|7d|30d)$"),
+    scope: Optional[str] = Query(
+        None, description="Practice area (lawyers), guide category (guides) or topic (questions), by slug or id"
+    ),
+    limit: int = Query(10, ge=1, le=settings.LEADERBOARD_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Most viewed lawyers, guides or questions of the last 24 hours, 7 days or 30 days,
+    site-wide or within a scope. Recent views weigh more (time-decayed score); `count`
+    is the plain number of views in the period. Served from the snapshot built by
+    the leaderboard job, refreshed every few minutes
+    """
+    if board not in leaderboards.BOARDS:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+
+    scope_id = None
+    if scope:
+        scope_id = leaderboards.resolve_scope(db, board, scope)
+        if scope_id is None:
+            raise HTTPException(status_code=404, detail="Scope not found")
+
+    try:
+        data = leaderboards.get_leaderboard(db, board, period, scope_id, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "success": True,
+        "data": data,
+    }
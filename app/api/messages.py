@@ -1,13 +1,14 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.db.database import get_db
 from app.db.repositories import lawyers as lawyers_repository
 from app.db.repositories import conversations as conversations_repository
-from app.db.repositories import analytics as analytics_repository
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.tasks import task_executor
 from app.schemas.analytics import MessageEventCreate
 from app.schemas.message import MessageCreate, MessageCreateResponse
 from app.api.dependencies import get_current_user
@@ -22,7 +23,6 @@ async def send_message_to_lawyer(
     message: MessageCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     Send a message to a lawyer
@@ -74,12 +74,8 @@ async def send_message_to_lawyer(
         timestamp=datetime.now(),
     )
 
-    # Use background task to track event
-    background_tasks.add_task(
-        analytics_repository.create_message_event,
-        db=db,
-        event=event_data,
-    )
+    # Track the event on the task executor, after the response
+    task_executor.submit("message_event", analytics_buffer.enqueue, "message_event", event_data)
 
     return MessageCreateResponse(
         success=True, 
@@ -1,13 +1,15 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.db.database import get_db
 from app.db.repositories import questions as questions_repository
 from app.db.repositories import topics as topics_repository
-from app.db.repositories import analytics as analytics_repository
+from app.services import analytics_dedup
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.tasks import task_executor
 from app.schemas.analytics import QuestionViewCreate
 from app.schemas.question import (
     QuestionResponse,
@@ -29,7 +31,6 @@ async def get_questions(
     sort: str = "latest",
     answered: Optional[bool] = None,
     current_user: Optional[User] = Depends(get_optional_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     List all legal questions with optional filtering
@@ -49,7 +50,7 @@ async def get_questions(
             topic_slug = topic
 
     # Get questions and total count
-    questions, total = questions_repository.get_questions(
+    questions, total, total_is_estimate = questions_repository.get_questions(
         db=db,
         skip=skip,
         limit=size,
@@ -62,6 +63,9 @@ async def get_questions(
     # Calculate total pages
     pages = (total + size - 1) // size  # Ceiling division
 
+    # Views still queued for writing are added to the stored view counts
+    pending_views = analytics_buffer.pending_counts("question_view", [question.id for question in questions])
+
     # Convert to response format
     response_questions = []
     for question in questions:
@@ -90,7 +94,7 @@ async def get_questions(
                     "date": question.created_at,
                     "topic_ids": topic_ids,
                     "answer_count": answer_count,
-                    "view_count": question.view_count,
+                    "view_count": (question.view_count or 0) + pending_views.get(question.id, 0),
                     "user_id": question.user_id,
                     "created_at": question.created_at,
                     "updated_at": question.updated_at,
@@ -100,16 +104,21 @@ async def get_questions(
         )
 
     return QuestionsList(
-        questions=response_questions, total=total, page=page, size=size, pages=pages
+        questions=response_questions,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        page=page,
+        size=size,
+        pages=pages,
     )
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
 async def get_question(
     question_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_optional_current_user),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     """
     Retrieve a specific question by ID
@@ -118,21 +127,24 @@ async def get_question(
     if question is None:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    # Increment view count
-    question = questions_repository.increment_view_count(db, question)
-
     # Track question view via analytics
     view_data = {
         "question_id": question_id,
         "user_id": current_user.id if current_user else None,
         "timestamp": datetime.now(),
     }
-
-    # Use background task to track view
-    background_tasks.add_task(
-        analytics_repository.create_question_view,
-        db=db,
-        view=QuestionViewCreate(**view_data),
+    view = QuestionViewCreate(**view_data)
+
+    # Views not written yet, read before this one can join them
+    pending_views = analytics_buffer.pending_count("question_view", question.id)
+    # Queue the view off the request path, which also adds to view_count when written
+    # with the next batch; repeat views inside the dedup window neither count nor get recorded
+    task_executor.submit(
+        "question_view",
+        analytics_dedup.enqueue_view,
+        "question_view",
+        view,
+        analytics_dedup.client_fingerprint(request),
     )
 
     # Format author info
@@ -157,7 +169,8 @@ async def get_question(
             "user_id": question.user_id,
             "location": question.location,
             "plan_to_hire": question.plan_to_hire,
-            "view_count": question.view_count,
+            # The reader's own view counts in what they see, even if it is deduplicated
+            "view_count": (question.view_count or 0) + pending_views + 1,
             "created_at": question.created_at,
             "updated_at": question.updated_at,
             "author": author,
@@ -131,6 +131,9 @@ async def update_lawyer_review(
     # Update review
     updated_review = reviews_repository.update_review(db, db_review, review)
 
+    # Rating changes are picked up by the next ranking refresh
+    lawyers_repository.mark_ranking_stale(db, lawyer_id)
+
     # Format response
     author_name = "Anonymous" if updated_review.is_anonymous else updated_review.author
 
@@ -187,4 +190,5 @@ async def delete_lawyer_review(
 
     # Delete review
     reviews_repository.delete_review(db, review_id)
+    lawyers_repository.mark_ranking_stale(db, lawyer_id)
     return None
@@ -0,0 +1,44 @@
+from typing import Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.core.config import settings
+from app.db.database import get_db, get_engine
+from app.db.repositories import search as search_repository
+from app.schemas.search import SearchResults, SearchSuggestions
+from app.services import search as search_service
+
+router = APIRouter()
+
+@router.get("", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(settings.SEARCH_SECTION_LIMIT, ge=1, le=20),
+    sections: Optional[str] = Query(None, description="Comma-separated: lawyers, guides, questions, topics"),
+    engine: Engine = Depends(get_engine),
+):
+    """
+    Search lawyers, guides, questions and topics at once, at most `limit` results per
+    section. Sections that do not answer within the time budget come back empty with
+    status "timeout" and `partial` set.
+    """
+    requested = [section.strip() for section in sections.split(",") if section.strip()] if sections else None
+    try:
+        # Sections run on sessions of their own, the request does not hold one
+        return await search_service.federated_search(engine, q, limit, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/suggest", response_model=SearchSuggestions)
+async def suggest(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(settings.SEARCH_SUGGEST_LIMIT_PER_TYPE, ge=1, le=10),
+    db: Session = Depends(get_db),
+):
+    """
+    Typeahead suggestions (lawyers, practice areas, topics, guides and cities) for a
+    partial query, at most `limit` per type. Tolerates typos and missing accents.
+    """
+    suggestions = search_repository.get_suggestions(db, q, limit)
+    return {"query": q, "suggestions": suggestions}
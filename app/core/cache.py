@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from urllib.parse import urlparse
+
+try:
+    import redis
+except ImportError:  # Optional, only needed for redis:// backends
+    redis = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with per-entry expiry and LRU eviction
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value, or `default` if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries when full
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every entry whose key matches the predicate, returns how many were dropped
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class CacheError(Exception):
+    """A cache backend could not be reached or answered with an error"""
+
+
+class CacheBackend:
+    """
+    Byte-string key/value store shared by response caches
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        """
+        Atomically store a value only if the key is absent, returns whether it was stored
+        """
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """
+        Atomically increment a counter (starting at 0) that never expires, returns the new value
+        """
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process backend: a TTLCache plus a dict of counters
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._entries = TTLCache(ttl_seconds=0, max_entries=max_entries)
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            # Counters read back as their decimal string, like Redis
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+        return self._entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._entries.set(key, value, ttl_seconds=ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self._entries.delete(key)
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        with self._lock:
+            if self._entries.get(key) is not None:
+                return False
+            self._entries.set(key, value, ttl_seconds=ttl_seconds)
+            return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend shared by every process through a Redis-compatible server (Redis, Valkey,
+    KeyDB), using the optional redis package. Only GET, SET PX [NX], DEL and INCR are
+    used. Failed commands raise CacheError; the client's connection pool reconnects on
+    the next one.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout_seconds: float = 0.5):
+        if redis is None:
+            raise RuntimeError("redis:// cache backends need the redis package (pip install redis)")
+        self.client = redis.Redis(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            socket_timeout=timeout_seconds,
+            socket_connect_timeout=timeout_seconds,
+        )
+
+    @classmethod
+    def from_url(cls, url: str, timeout_seconds: float = 0.5) -> "RedisCacheBackend":
+        """
+        Build from a redis://[:password@]host[:port][/db] URL
+        """
+        parsed = urlparse(url)
+        db = parsed.path.lstrip("/")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=parsed.password,
+            timeout_seconds=timeout_seconds,
+        )
+
+    def command(self, *args) -> Any:
+        """
+        Send one command and return its reply, raising CacheError on failure
+        """
+        try:
+            return self.client.execute_command(*args)
+        except redis.RedisError as e:
+            raise CacheError(str(e)) from e
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        milliseconds = int(ttl_seconds * 1000)
+        if milliseconds > 0:
+            self.command("SET", key, value, "PX", milliseconds)
+
+    def delete(self, key: str) -> None:
+        self.command("DEL", key)
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        milliseconds = max(int(ttl_seconds * 1000), 1)
+        return bool(self.command("SET", key, value, "PX", milliseconds, "NX"))
+
+    def incr(self, key: str) -> int:
+        return self.command("INCR", key)
+
+
+def create_cache_backend(url: str, max_entries: int = 1024) -> Optional[CacheBackend]:
+    """
+    Backend for a cache URL: "memory://", "redis://host:port/db", or "" / "none" to disable
+    """
+    if not url or url == "none":
+        return None
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryCacheBackend(max_entries=max_entries)
+    if scheme == "redis":
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported cache backend: {url}")
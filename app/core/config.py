@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -37,6 +37,135 @@ class Settings(BaseSettings):
 
     LOCAL_STORAGE_PATH: str = os.getenv("LOCAL_STORAGE_PATH", "storage")
 
+    # Lawyer search
+    # "fts" uses the weighted tsvector index, "ilike" forces the legacy substring scan
+    LAWYER_SEARCH_MODE: Literal["fts", "ilike"] = os.getenv("LAWYER_SEARCH_MODE", "fts")
+    # Opt-in: scan with ILIKE when neither full-text nor prefix search finds anything
+    LAWYER_SEARCH_ILIKE_FALLBACK: bool = os.getenv("LAWYER_SEARCH_ILIKE_FALLBACK", "false").lower() == "true"
+
+    # GET /lawyers/facets cache lifetime
+    LAWYER_FACETS_CACHE_TTL_SECONDS: int = int(os.getenv("LAWYER_FACETS_CACHE_TTL_SECONDS", "30"))
+
+    # GET /lawyers result cache: "memory://" (per process), "redis://host:port/db" (shared,
+    # needs the redis package), or "none" to disable
+    LAWYER_SEARCH_CACHE_URL: str = os.getenv("LAWYER_SEARCH_CACHE_URL", "memory://")
+    # Text searches change with every keystroke, area/city browse pages are hit far more often
+    LAWYER_SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("LAWYER_SEARCH_CACHE_TTL_SECONDS", "60"))
+    LAWYER_SEARCH_CACHE_BROWSE_TTL_SECONDS: int = int(os.getenv("LAWYER_SEARCH_CACHE_BROWSE_TTL_SECONDS", "300"))
+    LAWYER_SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("LAWYER_SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+    # List totals
+    # Cached totals expire after this many seconds (committed writes also invalidate them)
+    COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("COUNT_CACHE_TTL_SECONDS", "60"))
+    COUNT_CACHE_MAX_ENTRIES: int = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "2048"))
+    # Results the planner estimates above this many rows report an estimated total
+    COUNT_ESTIMATE_THRESHOLD: int = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "10000"))
+
+    # Background jobs (ranking refresh, ...) run inside the API process
+    BACKGROUND_JOBS_ENABLED: bool = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() == "true"
+
+    # Executor for work deferred past the response (see app/services/tasks.py)
+    # When disabled tasks run in the request that submits them
+    TASK_EXECUTOR_ENABLED: bool = os.getenv("TASK_EXECUTOR_ENABLED", "true").lower() == "true"
+    TASK_MAX_WORKERS: int = int(os.getenv("TASK_MAX_WORKERS", "4"))
+    # Tasks submitted while this many are queued are shed
+    TASK_QUEUE_MAX_TASKS: int = int(os.getenv("TASK_QUEUE_MAX_TASKS", "1000"))
+    # Attempts of a task failing with a transient database error, and the first backoff
+    TASK_MAX_ATTEMPTS: int = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+    TASK_RETRY_BACKOFF_MS: int = int(os.getenv("TASK_RETRY_BACKOFF_MS", "200"))
+
+    # Lawyer ranking (see app/services/rankings.py)
+    RANKING_REFRESH_INTERVAL_SECONDS: int = int(os.getenv("RANKING_REFRESH_INTERVAL_SECONDS", "300"))
+    RANKING_BATCH_SIZE: int = int(os.getenv("RANKING_BATCH_SIZE", "500"))
+    RANKING_WATERMARK_OVERLAP_SECONDS: int = int(os.getenv("RANKING_WATERMARK_OVERLAP_SECONDS", "300"))
+    # Virtual reviews at the site-wide mean added to every lawyer's rating
+    RANKING_PRIOR_REVIEWS: float = float(os.getenv("RANKING_PRIOR_REVIEWS", "5"))
+    # Prior mean rating while the site has no reviews at all
+    RANKING_DEFAULT_RATING: float = float(os.getenv("RANKING_DEFAULT_RATING", "3.0"))
+    # Virtual impressions at the site-wide CTR added to every lawyer's CTR
+    RANKING_PRIOR_IMPRESSIONS: float = float(os.getenv("RANKING_PRIOR_IMPRESSIONS", "100"))
+    RANKING_WEIGHT_RATING: float = float(os.getenv("RANKING_WEIGHT_RATING", "0.5"))
+    RANKING_WEIGHT_EXPERIENCE: float = float(os.getenv("RANKING_WEIGHT_EXPERIENCE", "0.2"))
+    RANKING_WEIGHT_VERIFIED: float = float(os.getenv("RANKING_WEIGHT_VERIFIED", "0.1"))
+    RANKING_WEIGHT_CTR: float = float(os.getenv("RANKING_WEIGHT_CTR", "0.2"))
+
+    # GET /search/suggest
+    SEARCH_SUGGEST_LIMIT_PER_TYPE: int = int(os.getenv("SEARCH_SUGGEST_LIMIT_PER_TYPE", "5"))
+    # pg_trgm word similarity needed for a non-prefix (typo) match, 0..1
+    SEARCH_SUGGEST_MIN_SIMILARITY: float = float(os.getenv("SEARCH_SUGGEST_MIN_SIMILARITY", "0.45"))
+    # Suggestions from areas, topics and cities are cached per typed prefix
+    SEARCH_SUGGEST_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_SUGGEST_CACHE_TTL_SECONDS", "300"))
+    SEARCH_SUGGEST_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_SUGGEST_CACHE_MAX_ENTRIES", "4096"))
+
+    # GET /search runs one query per section concurrently in this many threads (process-wide)
+    SEARCH_MAX_WORKERS: int = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+    # Sections not finished within the budget are returned as timed out
+    SEARCH_TIME_BUDGET_MS: int = int(os.getenv("SEARCH_TIME_BUDGET_MS", "800"))
+    SEARCH_SECTION_LIMIT: int = int(os.getenv("SEARCH_SECTION_LIMIT", "5"))
+
+    # Analytics ingestion (see app/services/analytics_ingestion.py)
+    # When disabled every tracked event is written as soon as it is enqueued
+    ANALYTICS_BUFFER_ENABLED: bool = os.getenv("ANALYTICS_BUFFER_ENABLED", "true").lower() == "true"
+    # Flush when this many events are queued, or after the interval, whichever comes first
+    ANALYTICS_FLUSH_MAX_EVENTS: int = int(os.getenv("ANALYTICS_FLUSH_MAX_EVENTS", "500"))
+    ANALYTICS_FLUSH_INTERVAL_MS: int = int(os.getenv("ANALYTICS_FLUSH_INTERVAL_MS", "1000"))
+    # Producers wait up to ANALYTICS_ENQUEUE_TIMEOUT_MS for room in a full queue, then drop
+    ANALYTICS_QUEUE_MAX_EVENTS: int = int(os.getenv("ANALYTICS_QUEUE_MAX_EVENTS", "20000"))
+    ANALYTICS_ENQUEUE_TIMEOUT_MS: int = int(os.getenv("ANALYTICS_ENQUEUE_TIMEOUT_MS", "100"))
+    ANALYTICS_FLUSH_MAX_ATTEMPTS: int = int(os.getenv("ANALYTICS_FLUSH_MAX_ATTEMPTS", "3"))
+    # Largest batch accepted by POST /analytics/events
+    ANALYTICS_BATCH_MAX_EVENTS: int = int(os.getenv("ANALYTICS_BATCH_MAX_EVENTS", "200"))
+    # Local write-ahead spool (see app/utils/spool.py): when set, queued events are
+    # appended to segment files under this directory and loaded from there, so they
+    # survive restarts and database outages. Empty keeps them in memory only
+    ANALYTICS_SPOOL_DIR: str = os.getenv("ANALYTICS_SPOOL_DIR", "")
+    ANALYTICS_SPOOL_SEGMENT_BYTES: int = int(os.getenv("ANALYTICS_SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+    ANALYTICS_SPOOL_FSYNC: Literal["always", "interval", "never"] = os.getenv("ANALYTICS_SPOOL_FSYNC", "interval")
+    ANALYTICS_SPOOL_FSYNC_INTERVAL_MS: int = int(os.getenv("ANALYTICS_SPOOL_FSYNC_INTERVAL_MS", "1000"))
+    # Events loaded from the spool per transaction
+    ANALYTICS_SPOOL_LOAD_BATCH_EVENTS: int = int(os.getenv("ANALYTICS_SPOOL_LOAD_BATCH_EVENTS", "5000"))
+
+    # Analytics rollups (see app/services/analytics_rollups.py)
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "60"))
+    ANALYTICS_ROLLUP_OVERLAP_SECONDS: int = int(os.getenv("ANALYTICS_ROLLUP_OVERLAP_SECONDS", "300"))
+    # Largest number of buckets returned by a time series query
+    ANALYTICS_TIMESERIES_MAX_POINTS: int = int(os.getenv("ANALYTICS_TIMESERIES_MAX_POINTS", "1000"))
+    # Per-lawyer impressions/clicks/CTR by search position
+    ANALYTICS_POSITION_STATS_CACHE_TTL_SECONDS: int = int(os.getenv("ANALYTICS_POSITION_STATS_CACHE_TTL_SECONDS", "60"))
+    ANALYTICS_POSITION_STATS_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYTICS_POSITION_STATS_CACHE_MAX_ENTRIES", "4096"))
+    # GET /analytics/summary, also dropped when new events of the lawyer are flushed
+    ANALYTICS_SUMMARY_CACHE_TTL_SECONDS: int = int(os.getenv("ANALYTICS_SUMMARY_CACHE_TTL_SECONDS", "300"))
+    ANALYTICS_SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYTICS_SUMMARY_CACHE_MAX_ENTRIES", "4096"))
+    # Raw event export (see app/services/analytics_export.py): rows fetched from the
+    # server-side cursor at a time, and the range exported when `from` is not given
+    ANALYTICS_EXPORT_BATCH_ROWS: int = int(os.getenv("ANALYTICS_EXPORT_BATCH_ROWS", "5000"))
+    ANALYTICS_EXPORT_DEFAULT_DAYS: int = int(os.getenv("ANALYTICS_EXPORT_DEFAULT_DAYS", "30"))
+
+    # Leaderboards of the most viewed lawyers, guides and questions (see app/services/leaderboards.py)
+    LEADERBOARD_SIZE: int = int(os.getenv("LEADERBOARD_SIZE", "20"))
+    LEADERBOARD_REFRESH_INTERVAL_SECONDS: int = int(os.getenv("LEADERBOARD_REFRESH_INTERVAL_SECONDS", "300"))
+    # Boards are rebuilt when their rollups change, and at least this often as views age
+    LEADERBOARD_MAX_AGE_SECONDS: int = int(os.getenv("LEADERBOARD_MAX_AGE_SECONDS", "3600"))
+    # Half-life of a view's weight as a fraction of the period (6h for 24h), 0 ranks by plain counts
+    LEADERBOARD_HALF_LIFE_FRACTION: float = float(os.getenv("LEADERBOARD_HALF_LIFE_FRACTION", "0.25"))
+    LEADERBOARD_CACHE_TTL_SECONDS: int = int(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "300"))
+    LEADERBOARD_CACHE_MAX_ENTRIES: int = int(os.getenv("LEADERBOARD_CACHE_MAX_ENTRIES", "1024"))
+
+    # Monthly partitions of the raw event tables (see app/services/analytics_partitions.py)
+    ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS: int = int(os.getenv("ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS", "86400"))
+    ANALYTICS_PARTITION_MONTHS_AHEAD: int = int(os.getenv("ANALYTICS_PARTITION_MONTHS_AHEAD", "3"))
+    # Raw events older than this many months are removed, 0 keeps them forever
+    ANALYTICS_RETENTION_MONTHS: int = int(os.getenv("ANALYTICS_RETENTION_MONTHS", "0"))
+    # Detach expired months into the analytics_archive schema instead of dropping them
+    ANALYTICS_RETENTION_ARCHIVE: bool = os.getenv("ANALYTICS_RETENTION_ARCHIVE", "false").lower() == "true"
+
+    # Repeat views of the same lawyer, guide or question by the same visitor within the
+    # window are dropped before reaching the database (see app/services/analytics_dedup.py)
+    ANALYTICS_DEDUP_WINDOW_SECONDS: int = int(os.getenv("ANALYTICS_DEDUP_WINDOW_SECONDS", "1800"))
+    # "memory://" (per worker), "redis://host:port/db" (shared by all workers) or "none"
+    ANALYTICS_DEDUP_URL: str = os.getenv("ANALYTICS_DEDUP_URL", "memory://")
+    ANALYTICS_DEDUP_MAX_ENTRIES: int = int(os.getenv("ANALYTICS_DEDUP_MAX_ENTRIES", "100000"))
+
     class Config:
         env_file = ".env"
         case_sensitive = True
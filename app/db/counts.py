@@ -0,0 +1,135 @@
+"""
+Cached and estimated row counts for paginated list endpoints
+
+Exact COUNT(*) over a filtered join often costs more than fetching the page itself.
+count_query() answers from a TTL cache keyed by the normalized filters, and for large
+results returns the planner's estimate instead of counting:
+
+- unfiltered lists use pg_class.reltuples of the base table
+- filtered lists use the row estimate of EXPLAIN for the list query
+
+Only results estimated above COUNT_ESTIMATE_THRESHOLD rows are reported as estimates,
+smaller ones are counted exactly. Committed ORM writes to a table drop the cached counts
+that depend on it; other processes and raw SQL writes rely on the TTL.
+"""
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.events import on_tables_committed
+
+_count_cache = TTLCache(
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS,
+    max_entries=settings.COUNT_CACHE_MAX_ENTRIES,
+)
+
+
+class _Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) for a select statement, keeping its bound parameters
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def normalize_filters(filters: Dict[str, Any]) -> Tuple:
+    """
+    Turn filter keyword arguments into a stable cache key: unset filters are dropped,
+    strings are trimmed and lowercased
+    """
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = value.strip().lower()
+        normalized.append((name, str(value)))
+    return tuple(normalized)
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def estimate_table_rows(db: Session, table: str) -> Optional[int]:
+    """
+    Planner statistics row count for a table, None if it was never analyzed
+    """
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    ).scalar()
+    # -1 means the table has not been vacuumed or analyzed yet
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
+
+
+def estimate_query_rows(db: Session, query: Query) -> int:
+    """
+    Row estimate of the planner for a query, without running it
+    """
+    statement = query.enable_eagerloads(False).order_by(None).statement
+    plan = db.execute(_Explain(statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_query(
+    db: Session,
+    query: Query,
+    table: str,
+    filters: Dict[str, Any],
+    depends_on: Iterable[str] = (),
+) -> Tuple[int, bool]:
+    """
+    Total rows for a list query, returns (total, total_is_estimate)
+    `table` is the base table of the query and `depends_on` any other tables the filters
+    read, writes to either invalidate the cached count
+    """
+    key: Hashable = (table, normalize_filters(filters), frozenset(depends_on))
+    cached = _count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = None
+    if _is_postgres(db):
+        unfiltered = not normalize_filters(filters)
+        if unfiltered:
+            estimate = estimate_table_rows(db, table)
+        else:
+            estimate = estimate_query_rows(db, query)
+        if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+            result = (estimate, True)
+
+    if result is None:
+        result = (query.order_by(None).count(), False)
+
+    _count_cache.set(key, result)
+    return result
+
+
+@on_tables_committed
+def invalidate_counts(tables: Iterable[str]) -> int:
+    """
+    Drop cached counts that read any of the given tables
+    """
+    tables = set(tables)
+    if not tables:
+        return 0
+    return _count_cache.invalidate(lambda key: key[0] in tables or not tables.isdisjoint(key[2]))
+
+
+def clear_counts() -> None:
+    _count_cache.clear()
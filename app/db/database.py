@@ -2,6 +2,7 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -26,6 +27,13 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def get_engine() -> Engine:
+    """
+    Dependency function to get the engine, for handlers that open their own
+    connections and would leave a request session unused
+    """
+    return engine
+
 @contextmanager
 def get_db_context() -> Generator[Session, None, None]:
     """
@@ -0,0 +1,59 @@
+"""
+Table-level write notifications for in-process caches
+
+ORM flushes record which tables a session wrote to. Once the transaction commits,
+every callback registered with on_tables_committed() is called with those table
+names, so caches can drop entries derived from them. Writes by other processes or
+raw SQL are not seen here, caches relying on this still need a TTL.
+"""
+import logging
+from typing import Callable, Iterable, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_subscribers: List[Callable[[Set[str]], None]] = []
+
+
+def on_tables_committed(callback: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """
+    Register a callback receiving the set of tables written by each committed transaction
+    """
+    _subscribers.append(callback)
+    return callback
+
+
+def notify_tables_committed(tables: Iterable[str]) -> None:
+    """
+    Run the callbacks for writes made outside the ORM unit of work (Core statements, other sessions)
+    """
+    tables = set(tables)
+    if not tables:
+        return
+    for callback in _subscribers:
+        try:
+            callback(tables)
+        except Exception:
+            logger.exception("Commit callback %r failed", callback)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    written = session.info.setdefault("tables_written", set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        mapper = getattr(instance, "__mapper__", None)
+        if mapper is not None:
+            written.update(table.name for table in mapper.tables)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_written_tables(session):
+    # Notify after commit so a concurrent request cannot re-cache the old data
+    notify_tables_committed(session.info.pop("tables_written", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    session.info.pop("tables_written", None)
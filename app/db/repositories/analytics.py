@@ -1,8 +1,12 @@
-from typing import Optional
+from typing import Dict, List, Optional, Sequence
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import between, case, func, insert, literal, select, tuple_, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.cache import TTLCache
+from app.core.config import settings
 
 from app.models.analytics import (
     ProfileView, ProfileViewCount, 
@@ -11,7 +15,8 @@ from app.models.analytics import (
     ProfileImpression, ProfileImpressionCount,
     ListingClick, ListingClickCount,
     GuideView, GuideViewCount,
-    QuestionView, QuestionViewCount
+    QuestionView, QuestionViewCount,
+    AnalyticsVisitorSketch,
 )
 from app.schemas.analytics import (
     ProfileViewCreate, MessageEventCreate, CallEventCreate,
@@ -19,6 +24,45 @@ from app.schemas.analytics import (
     GuideViewCreate, QuestionViewCreate
 )
 
+# Batched writes, used by the ingestion pipeline (app/services/analytics_ingestion.py)
+def insert_events(db: Session, model, rows: List[Dict]) -> None:
+    """
+    Insert many event rows at once (sent as multi-row INSERTs), committed by the caller
+    Columns missing from some rows are inserted as NULL in those
+    """
+    if rows:
+        columns = {column for row in rows for column in row}
+        if any(len(row) != len(columns) for row in rows):
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        db.execute(insert(model.__table__), rows)
+
+def upsert_counts(db: Session, count_model, key_columns: Sequence[str], rows: List[Dict]) -> None:
+    """
+    Add the counts in `rows` (one row per key, with "count" and any other counter
+    columns) to a *_counts table in a single INSERT ... ON CONFLICT DO UPDATE,
+    committed by the caller
+    """
+    if not rows:
+        return
+    table = count_model.__table__
+    dialect_insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    statement = dialect_insert(table).values(rows)
+    counters = [column for column in rows[0] if column not in key_columns and column != "updated_at"]
+    updates = {
+        column: func.coalesce(table.c[column], 0) + statement.excluded[column]
+        for column in counters
+    }
+    if "updated_at" in table.c:
+        updates["updated_at"] = statement.excluded.updated_at
+    db.execute(statement.on_conflict_do_update(index_elements=list(key_columns), set_=updates))
+
+def _increment_count(db: Session, count_model, key: Dict, **increments: int) -> None:
+    """
+    Atomically add to one counter row, creating it if needed (committed by the caller)
+    """
+    increments = increments or {"count": 1}
+    upsert_counts(db, count_model, list(key), [{**key, **increments, "updated_at": datetime.now()}])
+
 # Profile View repository functions
 def create_profile_view(db: Session, view: ProfileViewCreate) -> ProfileView:
     """
@@ -29,24 +73,13 @@ def create_profile_view(db: Session, view: ProfileViewCreate) -> ProfileView:
         lawyer_id=view.lawyer_id,
         user_id=view.user_id,
         source=view.source,
+        visitor_id=view.visitor_id,
         timestamp=view.timestamp
     )
     db.add(db_view)
     
-    # Update profile view count
-    db_count = db.query(ProfileViewCount).filter(
-        ProfileViewCount.lawyer_id == view.lawyer_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = ProfileViewCount(
-            lawyer_id=view.lawyer_id,
-            count=1
-        )
-        db.add(db_count)
+    # Update profile view count in one atomic upsert
+    _increment_count(db, ProfileViewCount, {"lawyer_id": view.lawyer_id})
     
     db.commit()
     db.refresh(db_view)
@@ -76,22 +109,8 @@ def create_message_event(db: Session, event: MessageEventCreate) -> MessageEvent
     )
     db.add(db_event)
     
-    # Update message event count
-    db_count = db.query(MessageEventCount).filter(
-        MessageEventCount.lawyer_id == event.lawyer_id,
-        MessageEventCount.status == event.status
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = MessageEventCount(
-            lawyer_id=event.lawyer_id,
-            status=event.status,
-            count=1
-        )
-        db.add(db_count)
+    # Update message event count in one atomic upsert
+    _increment_count(db, MessageEventCount, {"lawyer_id": event.lawyer_id, "status": event.status})
     
     db.commit()
     db.refresh(db_event)
@@ -125,23 +144,11 @@ def create_call_event(db: Session, event: CallEventCreate) -> CallEvent:
     )
     db.add(db_event)
     
-    # Update call event count
-    db_count = db.query(CallEventCount).filter(
-        CallEventCount.lawyer_id == event.lawyer_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        if event.completed:
-            db_count.completed_count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = CallEventCount(
-            lawyer_id=event.lawyer_id,
-            count=1,
-            completed_count=1 if event.completed else 0
-        )
-        db.add(db_count)
+    # Update call event counts in one atomic upsert
+    _increment_count(
+        db, CallEventCount, {"lawyer_id": event.lawyer_id},
+        count=1, completed_count=1 if event.completed else 0,
+    )
     
     db.commit()
     db.refresh(db_event)
@@ -177,20 +184,8 @@ def create_profile_impression(db: Session, impression: ProfileImpressionCreate)
     )
     db.add(db_impression)
     
-    # Update profile impression count
-    db_count = db.query(ProfileImpressionCount).filter(
-        ProfileImpressionCount.lawyer_id == impression.lawyer_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = ProfileImpressionCount(
-            lawyer_id=impression.lawyer_id,
-            count=1
-        )
-        db.add(db_count)
+    # Update profile impression count in one atomic upsert
+    _increment_count(db, ProfileImpressionCount, {"lawyer_id": impression.lawyer_id})
     
     db.commit()
     db.refresh(db_impression)
@@ -218,24 +213,13 @@ def create_listing_click(db: Session, click: ListingClickCreate) -> ListingClick
         search_query=click.search_query,
         area_slug=click.area_slug,
         city_slug=click.city_slug,
+        position=click.position,
         timestamp=click.timestamp
     )
     db.add(db_click)
     
-    # Update listing click count
-    db_count = db.query(ListingClickCount).filter(
-        ListingClickCount.lawyer_id == click.lawyer_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = ListingClickCount(
-            lawyer_id=click.lawyer_id,
-            count=1
-        )
-        db.add(db_count)
+    # Update listing click count in one atomic upsert
+    _increment_count(db, ListingClickCount, {"lawyer_id": click.lawyer_id})
     
     db.commit()
     db.refresh(db_click)
@@ -260,24 +244,13 @@ def create_guide_view(db: Session, view: GuideViewCreate) -> GuideView:
     db_view = GuideView(
         guide_id=view.guide_id,
         user_id=view.user_id,
+        visitor_id=view.visitor_id,
         timestamp=view.timestamp
     )
     db.add(db_view)
     
-    # Update guide view count
-    db_count = db.query(GuideViewCount).filter(
-        GuideViewCount.guide_id == view.guide_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = GuideViewCount(
-            guide_id=view.guide_id,
-            count=1
-        )
-        db.add(db_count)
+    # Update guide view count in one atomic upsert
+    _increment_count(db, GuideViewCount, {"guide_id": view.guide_id})
     
     db.commit()
     db.refresh(db_view)
@@ -302,24 +275,13 @@ def create_question_view(db: Session, view: QuestionViewCreate) -> QuestionView:
     db_view = QuestionView(
         question_id=view.question_id,
         user_id=view.user_id,
+        visitor_id=view.visitor_id,
         timestamp=view.timestamp
     )
     db.add(db_view)
     
-    # Update question view count
-    db_count = db.query(QuestionViewCount).filter(
-        QuestionViewCount.question_id == view.question_id
-    ).first()
-    
-    if db_count:
-        db_count.count += 1
-        db_count.updated_at = datetime.now()
-    else:
-        db_count = QuestionViewCount(
-            question_id=view.question_id,
-            count=1
-        )
-        db.add(db_count)
+    # Update question view count in one atomic upsert
+    _increment_count(db, QuestionViewCount, {"question_id": view.question_id})
     
     db.commit()
     db.refresh(db_view)
@@ -336,116 +298,159 @@ def get_question_view_count(db: Session, question_id: UUID) -> int:
     return db_count.count if db_count else 0
 
 
-def get_profile_impression_position_stats(db: Session, lawyer_id: UUID) -> dict:
+def get_lawyer_counters(db: Session, lawyer_id: UUID) -> Dict[str, int]:
+    """
+    Every lifetime counter of a lawyer in one UNION ALL statement over the *_counts tables:
+    profile_views, messages_<status>, calls, calls_completed, impressions, clicks.
+    Counters with no row yet are left out
+    """
+    counters = union_all(
+        select(literal("profile_views"), ProfileViewCount.count).where(ProfileViewCount.lawyer_id == lawyer_id),
+        select(func.concat("messages_", MessageEventCount.status), MessageEventCount.count).where(
+            MessageEventCount.lawyer_id == lawyer_id
+        ),
+        select(literal("calls"), CallEventCount.count).where(CallEventCount.lawyer_id == lawyer_id),
+        select(literal("calls_completed"), CallEventCount.completed_count).where(CallEventCount.lawyer_id == lawyer_id),
+        select(literal("impressions"), ProfileImpressionCount.count).where(
+            ProfileImpressionCount.lawyer_id == lawyer_id
+        ),
+        select(literal("clicks"), ListingClickCount.count).where(ListingClickCount.lawyer_id == lawyer_id),
+    )
+    return {name: count or 0 for name, count in db.execute(counters)}
+
+
+# Position ranges of the position statistics, (first, last, label); None is open-ended
+POSITION_RANGES = [
+    (1, 3, "top_3"),
+    (4, 10, "top_4_10"),
+    (11, 20, "top_11_20"),
+    (21, 50, "top_21_50"),
+    (51, 100, "top_51_100"),
+    (101, None, "below_100"),
+]
+
+_position_stats_cache = TTLCache(
+    ttl_seconds=settings.ANALYTICS_POSITION_STATS_CACHE_TTL_SECONDS,
+    max_entries=settings.ANALYTICS_POSITION_STATS_CACHE_MAX_ENTRIES,
+)
+
+
+def get_position_stats(db: Session, lawyer_id: UUID) -> Dict[str, Dict]:
     """
-    Get statistics about the positions of a lawyer in search results
-    Returns a dictionary with position ranges as keys and counts as values
+    Impressions, clicks and CTR (%) of a lawyer per position range, from one statement
+    that counts both tables by position (ix_*_lawyer_id_position) before bucketing.
+    Cached per lawyer for ANALYTICS_POSITION_STATS_CACHE_TTL_SECONDS
     """
-    from sqlalchemy import func, case, between
-    
-    # Define position ranges
-    position_ranges = [
-        (1, 3, "top_3"),
-        (4, 10, "top_4_10"),
-        (11, 20, "top_11_20"),
-        (21, 50, "top_21_50"),
-        (51, 100, "top_51_100"),
-        (101, None, "below_100")
-    ]
-    
-    # Create case statements for each range
+    cached = _position_stats_cache.get(lawyer_id)
+    if cached is not None:
+        return cached
+
+    impressions = select(
+        ProfileImpression.position.label("position"),
+        func.count().label("impressions"),
+        literal(0).label("clicks"),
+    ).where(ProfileImpression.lawyer_id == lawyer_id).group_by(ProfileImpression.position)
+    clicks = select(
+        ListingClick.position,
+        literal(0),
+        func.count(),
+    ).where(ListingClick.lawyer_id == lawyer_id).group_by(ListingClick.position)
+    positions = union_all(impressions, clicks).subquery("positions")
+
     cases = []
-    for start, end, label in position_ranges:
+    for start, end, label in POSITION_RANGES:
         if end:
-            cases.append(
-                (between(ProfileImpression.position, start, end), label)
-            )
+            cases.append((between(positions.c.position, start, end), label))
         else:
-            cases.append(
-                (ProfileImpression.position >= start, label)
-            )
-    
-    # Create the query
-    query = db.query(
+            cases.append((positions.c.position >= start, label))
+    total_impressions = func.sum(positions.c.impressions)
+    total_clicks = func.sum(positions.c.clicks)
+    query = select(
         case(*cases, else_="unknown").label("position_range"),
-        func.count().label("count")
-    ).filter(
-        ProfileImpression.lawyer_id == lawyer_id
-    ).group_by(
-        "position_range"
-    ).order_by(
-        "position_range"
-    )
-    
-    # Execute and format results
-    results = {}
-    for row in query.all():
-        results[row.position_range] = row.count
-    
-    return results
+        total_impressions.label("impressions"),
+        total_clicks.label("clicks"),
+        func.coalesce(func.round(100.0 * total_clicks / func.nullif(total_impressions, 0), 2), 0).label("ctr"),
+    ).group_by("position_range").order_by("position_range")
+
+    stats = {
+        row.position_range: {"impressions": int(row.impressions), "clicks": int(row.clicks), "ctr": float(row.ctr)}
+        for row in db.execute(query)
+    }
+    _position_stats_cache.set(lawyer_id, stats)
+    return stats
+
+
+def invalidate_position_stats(lawyer_ids) -> None:
+    for lawyer_id in lawyer_ids:
+        _position_stats_cache.delete(lawyer_id)
+
+
+def clear_position_stats_cache() -> None:
+    _position_stats_cache.clear()
+
+
+def get_profile_impression_position_stats(db: Session, lawyer_id: UUID) -> dict:
+    """
+    Get statistics about the positions of a lawyer in search results
+    Returns a dictionary with position ranges as keys and counts as values
+    """
+    stats = get_position_stats(db, lawyer_id)
+    return {position_range: row["impressions"] for position_range, row in stats.items() if row["impressions"]}
 
 def get_listing_click_position_stats(db: Session, lawyer_id: UUID) -> dict:
     """
     Get statistics about the positions of clicks on lawyer listings in search results
     Returns a dictionary with position ranges as keys and counts as values
     """
-    from sqlalchemy import func, case, between
-    
-    # Define position ranges
-    position_ranges = [
-        (1, 3, "top_3"),
-        (4, 10, "top_4_10"),
-        (11, 20, "top_11_20"),
-        (21, 50, "top_21_50"),
-        (51, 100, "top_51_100"),
-        (101, None, "below_100")
-    ]
-    
-    # Create case statements for each range
-    cases = []
-    for start, end, label in position_ranges:
-        if end:
-            cases.append(
-                (between(ListingClick.position, start, end), label)
-            )
-        else:
-            cases.append(
-                (ListingClick.position >= start, label)
-            )
-    
-    # Create the query
-    query = db.query(
-        case(*cases, else_="unknown").label("position_range"),
-        func.count().label("count")
-    ).filter(
-        ListingClick.lawyer_id == lawyer_id
-    ).group_by(
-        "position_range"
-    ).order_by(
-        "position_range"
-    )
-    
-    # Execute and format results
-    results = {}
-    for row in query.all():
-        results[row.position_range] = row.count
-    
-    return results
+    stats = get_position_stats(db, lawyer_id)
+    return {position_range: row["clicks"] for position_range, row in stats.items() if row["clicks"]}
 
 def get_click_through_rate_by_position(db: Session, lawyer_id: UUID) -> dict:
     """
     Calculate click-through rate (CTR) by position range
     Returns a dictionary with position ranges as keys and CTR values as values
     """
-    # Get impression and click stats
-    impression_stats = get_profile_impression_position_stats(db, lawyer_id)
-    click_stats = get_listing_click_position_stats(db, lawyer_id)
-    
-    # Calculate CTR for each position range
-    ctr_stats = {}
-    for position_range, impressions in impression_stats.items():
-        clicks = click_stats.get(position_range, 0)
-        ctr = (clicks / impressions * 100) if impressions > 0 else 0
-        ctr_stats[position_range] = round(ctr, 2)  # Round to 2 decimal places
-    
-    return ctr_stats
\ No newline at end of file
+    stats = get_position_stats(db, lawyer_id)
+    return {position_range: row["ctr"] for position_range, row in stats.items() if row["impressions"]}
+
+def get_rollup_counts(
+    db: Session, rollup_model, metric: str, entity_id: UUID, start: datetime, end: datetime
+) -> Dict[datetime, int]:
+    """
+    Rollup counts of one metric and entity by bucket start, for buckets in [start, end)
+    """
+    rows = db.query(rollup_model.bucket_start, rollup_model.count).filter(
+        rollup_model.metric == metric,
+        rollup_model.entity_id == entity_id,
+        rollup_model.bucket_start >= start,
+        rollup_model.bucket_start < end,
+    )
+    return {bucket_start: count for bucket_start, count in rows}
+
+def get_visitor_sketches(
+    db: Session, metric: str, entity_id: UUID, start: datetime, end: datetime
+) -> Dict[datetime, bytes]:
+    """
+    Serialized visitor sketches of one metric and entity by day, for days in [start, end)
+    """
+    rows = db.query(AnalyticsVisitorSketch.day, AnalyticsVisitorSketch.sketch).filter(
+        AnalyticsVisitorSketch.metric == metric,
+        AnalyticsVisitorSketch.entity_id == entity_id,
+        AnalyticsVisitorSketch.day >= start,
+        AnalyticsVisitorSketch.day < end,
+    )
+    return {day: bytes(sketch) for day, sketch in rows}
+
+def get_visitor_sketches_for_update(
+    db: Session, metric: str, keys: Sequence[tuple]
+) -> Dict[tuple, bytes]:
+    """
+    Stored visitor sketches of these (entity_id, day) keys, locked until the caller commits
+    """
+    rows = db.query(
+        AnalyticsVisitorSketch.entity_id, AnalyticsVisitorSketch.day, AnalyticsVisitorSketch.sketch
+    ).filter(
+        AnalyticsVisitorSketch.metric == metric,
+        tuple_(AnalyticsVisitorSketch.entity_id, AnalyticsVisitorSketch.day).in_(keys),
+    ).with_for_update()
+    return {(entity_id, day): bytes(sketch) for entity_id, day, sketch in rows}
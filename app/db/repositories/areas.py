@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable, Set
 from uuid import UUID
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
@@ -25,6 +25,22 @@ def get_area_by_id(db: Session, area_id: UUID) -> Optional[PracticeAreaModel]:
     )
 
 
+def get_existing_area_ids(db: Session, area_ids: Iterable[UUID]) -> Set[UUID]:
+    """
+    Return which of the given practice area IDs exist, in a single query
+    """
+    area_ids = set(area_ids)
+    if not area_ids:
+        return set()
+
+    return {
+        area_id
+        for (area_id,) in db.query(PracticeAreaModel.id).filter(
+            PracticeAreaModel.id.in_(area_ids)
+        )
+    }
+
+
 def get_area_by_slug(db: Session, slug: str) -> Optional[PracticeAreaModel]:
     """
     Get a practice area by slug
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.models.city import City
+from app.utils.slug import slugify
 from app.schemas.city import CityCreate, CityUpdate
 
 def get_city_by_id(db: Session, city_id: UUID) -> Optional[City]:
@@ -17,6 +18,14 @@ def get_city_by_slug(db: Session, slug: str) -> Optional[City]:
     """
     return db.query(City).filter(City.slug == slug).first()
 
+def resolve_city_id(db: Session, city: Optional[str]) -> Optional[UUID]:
+    """
+    Match a free-text city name (or slug) to a city ID, None if no city matches
+    """
+    if not city or not city.strip():
+        return None
+    return db.query(City.id).filter(City.slug == slugify(city)).scalar()
+
 def get_cities(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[City]:
     """
     Get a list of cities with optional active filtering
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc, func
 
+from app.db.counts import count_query
 from app.models.analytics import GuideView, GuideViewCount
 from app.models.guide import Guide, GuideCategory, GuideSection, guide_related_guides
 from app.schemas.guide import (
@@ -54,10 +55,10 @@ def get_guides(
     published_only: bool = False,
     category_slug: Optional[str] = None,
     category_id: Optional[UUID] = None,
-) -> Tuple[List[Guide], int]:
+) -> Tuple[List[Guide], int, bool]:
     """
     Get a list of guides with pagination and optional filtering
-    Returns guides and total count
+    Returns guides, total count and whether the total is an estimate
     """
     query = db.query(Guide).options(joinedload(Guide.category))
 
@@ -74,13 +75,23 @@ def get_guides(
             GuideCategory.slug == category_slug
         )
 
-    # Get total count before pagination
-    total = query.count()
+    # Get total count before pagination (cached, estimated for large results)
+    total, total_is_estimate = count_query(
+        db,
+        query,
+        "guides",
+        {
+            "published_only": published_only or None,
+            "category_id": category_id,
+            "category_slug": category_slug,
+        },
+        depends_on=["guide_categories"] if category_slug and not category_id else [],
+    )
 
     # Apply pagination and return results
     guides = query.order_by(desc(Guide.created_at)).offset(skip).limit(limit).all()
 
-    return guides, total
+    return guides, total, total_is_estimate
 
 
 def create_guide(db: Session, guide_in: GuideCreate) -> Guide:
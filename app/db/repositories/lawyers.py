@@ -1,18 +1,63 @@
+import re
 from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_, desc, asc
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, or_, and_, cast, Float, select, true, tuple_
 
+from app.core.config import settings
+from app.core.cache import TTLCache
+from app.db.counts import count_query, normalize_filters
 from app.models.lawyer import Lawyer as LawyerModel
-from app.models.area import PracticeArea, lawyer_area_association
+from app.models.area import PracticeArea, LawyerArea, lawyer_area_association
+from app.db.repositories.areas import get_existing_area_ids
+from app.db.repositories.cities import resolve_city_id
+from app.models.city import City
+from app.utils.slug import slugify
 from app.schemas.lawyer import LawyerCreate, LawyerUpdate, LawyerAreaAssociation
+from app.utils.pagination import SortKey, decode_cursor, encode_cursor, keyset_filter, keyset_order
+
+def serialize_lawyer(lawyer: LawyerModel) -> Dict:
+    """
+    Convert a lawyer with loaded area links to the Lawyer response format
+    """
+    processed_areas = [
+        {
+            "id": str(link.area.id),
+            "name": link.area.name,
+            "slug": link.area.slug,
+            "experience_score": link.experience_score or 0
+        }
+        for link in lawyer.area_links
+    ]
+
+    return {
+        "id": lawyer.id,
+        "user_id": lawyer.user_id,
+        "name": lawyer.name,
+        "title": lawyer.title,
+        "bio": lawyer.bio,
+        "phone": lawyer.phone,
+        "email": lawyer.email,
+        "city": lawyer.city,
+        "city_id": lawyer.city_id,
+        "image_url": lawyer.image_url,
+        "languages": lawyer.languages,
+        "is_verified": lawyer.is_verified,
+        "professional_start_date": lawyer.professional_start_date,
+        "catchphrase": lawyer.catchphrase,
+        "created_at": lawyer.created_at,
+        "updated_at": lawyer.updated_at,
+        "areas": processed_areas,
+        "review_score": lawyer.review_score or 0.0,
+        "review_count": lawyer.review_count or 0
+    }
 
 def get_lawyer_by_id(db: Session, lawyer_id: UUID) -> Optional[LawyerModel]:
     """
     Get a lawyer by ID with eager-loaded relationships
     """
     return db.query(LawyerModel).options(
-        joinedload(LawyerModel.areas)
+        joinedload(LawyerModel.area_links).joinedload(LawyerArea.area)
     ).filter(LawyerModel.id == lawyer_id).first()
 
 def get_lawyer_by_email(db: Session, email: str) -> Optional[LawyerModel]:
@@ -27,31 +72,70 @@ def get_lawyer_by_user_id(db: Session, user_id: UUID) -> Optional[LawyerModel]:
     """
     return db.query(LawyerModel).filter(LawyerModel.user_id == user_id).first()
 
-def search_lawyers(
+# Text search configuration created by the full text search migration (Spanish stemming + unaccent)
+SEARCH_CONFIG = "lexic_spanish"
+
+def _prefix_ts_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a to_tsquery prefix expression ("divor" -> "divor:*").
+    Only word characters are kept so user input cannot inject tsquery operators.
+    """
+    tokens = re.findall(r"\w+", query)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+def _text_search_filter(query: str, mode: str):
+    """
+    Build the text filter for a search query.
+    "fts" matches against the weighted tsvector, "prefix" matches word prefixes through
+    the same index and "ilike" scans name, bio and title.
+    """
+    if mode == "fts":
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        return LawyerModel.search_vector.op("@@")(ts_query), ts_query
+
+    if mode == "prefix":
+        prefix_query = _prefix_ts_query(query)
+        if prefix_query is None:
+            return None, None
+        ts_query = func.to_tsquery(SEARCH_CONFIG, prefix_query)
+        return LawyerModel.search_vector.op("@@")(ts_query), ts_query
+
+    if mode != "ilike":
+        raise ValueError(f"Unknown lawyer search mode: {mode!r}")
+
+    text_filters = [
+        LawyerModel.name.ilike(f"%{query}%"),
+        LawyerModel.bio.ilike(f"%{query}%"),
+        LawyerModel.title.ilike(f"%{query}%")
+    ]
+    return or_(*text_filters), None
+
+def _filter_lawyers(
     db: Session,
-    area_slug: Optional[str] = None,
-    city: Optional[str] = None,
-    query: Optional[str] = None,
-    sort: str = "best_match",
-    skip: int = 0,
-    limit: int = 100,
-    user_id: Optional[UUID] = None
-) -> Tuple[List[Dict], int]:
+    base_query,
+    area_slug: Optional[str],
+    city: Optional[str],
+    query: Optional[str],
+    user_id: Optional[UUID],
+    search_mode: str,
+):
     """
-    Search lawyers with various filters
-    Returns lawyers and total count
+    Apply the search filters to a lawyers query and count the matches (cached)
+    Returns the filtered query, the tsquery used for ranking (None unless matched by
+    full-text search), whether lawyer_areas was joined, the total and whether the
+    total is an estimate
     """
-    base_query = db.query(LawyerModel).options(
-        joinedload(LawyerModel.areas)
-    )
-    
     # Base filters
     filters = []
     
     # Filter by area
+    area_joined = False
     if area_slug:
         area = db.query(PracticeArea).filter(PracticeArea.slug == area_slug).first()
         if area:
+            area_joined = True
             base_query = base_query.join(
                 lawyer_area_association,
                 LawyerModel.id == lawyer_area_association.c.lawyer_id
@@ -59,125 +143,273 @@ def search_lawyers(
                 lawyer_area_association.c.area_id == area.id
             )
     
-    # Filter by city
+    # Filter by city slug, an equality on the indexed city_id
     if city:
-        filters.append(LawyerModel.city.ilike(f"%{city}%"))
+        city_id = select(City.id).where(City.slug == slugify(city)).scalar_subquery()
+        filters.append(LawyerModel.city_id == city_id)
     
     # Filter by user_id
     if user_id:
         filters.append(LawyerModel.user_id == user_id)
-        
-    # Text search
-    if query:
-        text_filters = [
-            LawyerModel.name.ilike(f"%{query}%"),
-            LawyerModel.bio.ilike(f"%{query}%"),
-            LawyerModel.title.ilike(f"%{query}%")
-        ]
-        filters.append(or_(*text_filters))
     
     # Apply all filters
     if filters:
         base_query = base_query.filter(and_(*filters))
+
+    # Count depends on the filters only, cached per filter combination
+    count_filters = {"area": area_slug, "city": city, "user_id": user_id}
+    count_depends_on = ("lawyer_areas",) if area_slug else ()
+
+    def count_lawyers(filtered_query, mode):
+        return count_query(
+            db, filtered_query, "lawyers",
+            {**count_filters, "q": query, "mode": mode if query else None},
+            depends_on=count_depends_on,
+        )
+
+    # Text search
+    ts_query = None
+    if query:
+        text_filter, ts_query = _text_search_filter(query, search_mode)
+        filtered_query = base_query.filter(text_filter)
+        total, total_is_estimate = count_lawyers(filtered_query, search_mode)
+
+        # Full text search drops partial words (e.g. while typing), retry them as
+        # prefixes, which still goes through the GIN index
+        if total == 0 and search_mode == "fts":
+            prefix_filter, prefix_ts_query = _text_search_filter(query, "prefix")
+            if prefix_filter is not None:
+                text_filter, ts_query = prefix_filter, prefix_ts_query
+                filtered_query = base_query.filter(text_filter)
+                total, total_is_estimate = count_lawyers(filtered_query, "prefix")
+
+        # Substring scan as a last resort, only when explicitly enabled
+        if total == 0 and search_mode == "fts" and settings.LAWYER_SEARCH_ILIKE_FALLBACK:
+            text_filter, ts_query = _text_search_filter(query, "ilike")
+            filtered_query = base_query.filter(text_filter)
+            total, total_is_estimate = count_lawyers(filtered_query, "ilike")
+
+        base_query = filtered_query
+    else:
+        # Get total count
+        total, total_is_estimate = count_lawyers(base_query, None)
+
+    return base_query, ts_query, area_joined, total, total_is_estimate
+
+def search_lawyers(
+    db: Session,
+    area_slug: Optional[str] = None,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    sort: str = "best_match",
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[UUID] = None,
+    search_mode: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], int, Dict[str, Any]]:
+    """
+    Search lawyers with various filters
+    Paginates by offset (skip) or, when a cursor from a previous page is given, by keyset
+    Returns lawyers, total count and page info (next_cursor, prev_cursor, the offset
+    of the first returned lawyer and whether the total is an estimate)
+    Raises ValueError for a malformed cursor or one issued for another sort
+    """
+    search_mode = search_mode or settings.LAWYER_SEARCH_MODE
+    decoded_cursor = decode_cursor(cursor) if cursor else None
+    if decoded_cursor and decoded_cursor.sort != sort:
+        raise ValueError("Cursor does not match the requested sort")
+
+    # Areas and experience scores for the whole page come back in one batched IN query
+    base_query = db.query(LawyerModel).options(
+        selectinload(LawyerModel.area_links).joinedload(LawyerArea.area)
+    )
     
-    # Get total count
-    total = base_query.count()
-    
-    # Apply sorting
+    base_query, ts_query, area_joined, total, total_is_estimate = _filter_lawyers(
+        db, base_query, area_slug, city, query, user_id, search_mode
+    )
+
+    # Sort keys always end with the id so every row has a unique position for cursors
+    sort_keys = _sort_keys(sort, ts_query, area_joined)
+    key_columns = [key.expression for key in sort_keys]
+    page_query = base_query.add_columns(*key_columns)
+
+    if decoded_cursor:
+        # Keyset pagination: seek past the boundary row instead of skipping rows
+        forward = decoded_cursor.forward
+        page_query = page_query.filter(keyset_filter(sort_keys, decoded_cursor.values, forward))
+        rows = page_query.order_by(*keyset_order(sort_keys, forward)).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if forward:
+            offset = decoded_cursor.offset
+            has_next, has_prev = has_more, True
+        else:
+            rows.reverse()
+            offset = max(decoded_cursor.offset - len(rows), 0)
+            has_next, has_prev = True, has_more
+    else:
+        # The total may be an estimate, so look one row ahead to know if there is a next page
+        rows = page_query.order_by(*keyset_order(sort_keys)).offset(skip).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        offset = skip
+        has_prev = skip > 0
+
+    page_info = {
+        "next_cursor": None,
+        "prev_cursor": None,
+        "offset": offset,
+        "total_is_estimate": total_is_estimate,
+    }
+    if rows:
+        if has_next:
+            page_info["next_cursor"] = encode_cursor(sort, list(rows[-1][1:]), True, offset + len(rows))
+        if has_prev:
+            page_info["prev_cursor"] = encode_cursor(sort, list(rows[0][1:]), False, offset)
+
+    result_lawyers = [serialize_lawyer(row[0]) for row in rows]
+
+    return result_lawyers, total, page_info
+
+# Facet counts change slowly and are only hints next to the filters, a short TTL is enough
+_facets_cache = TTLCache(ttl_seconds=settings.LAWYER_FACETS_CACHE_TTL_SECONDS, max_entries=512)
+
+# grouping() bitmask of (city, is_verified, language): 1 marks a column aggregated away
+_CITY_SET, _VERIFIED_SET, _LANGUAGE_SET = 0b011, 0b101, 0b110
+
+def get_lawyer_facets(
+    db: Session,
+    area_slug: Optional[str] = None,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    search_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Count lawyers matching the current filters per practice area, city, language and
+    verification status
+    Two GROUP BY queries: one over lawyers (GROUPING SETS for city, verification and
+    languages) and one over lawyer_areas, cached briefly per filter combination
+    """
+    search_mode = search_mode or settings.LAWYER_SEARCH_MODE
+    cache_key = normalize_filters({
+        "area": area_slug, "city": city, "q": query, "user_id": user_id, "mode": search_mode if query else None
+    })
+    cached = _facets_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    filtered_query, _, _, total, total_is_estimate = _filter_lawyers(
+        db, db.query(LawyerModel), area_slug, city, query, user_id, search_mode
+    )
+    matches = filtered_query.with_entities(
+        LawyerModel.id, LawyerModel.city_id, LawyerModel.is_verified, LawyerModel.languages
+    ).subquery()
+
+    # Lawyers facets: each grouping set is one facet, distinct ids undo the languages unnest
+    language = func.unnest(matches.c.languages).table_valued("language").lateral("language")
+    grouping = func.grouping(City.slug, matches.c.is_verified, language.c.language)
+    rows = db.execute(
+        select(
+            grouping,
+            City.slug,
+            City.name,
+            matches.c.is_verified,
+            language.c.language,
+            func.count(func.distinct(matches.c.id)),
+        )
+        .select_from(matches)
+        .outerjoin(City, City.id == matches.c.city_id)
+        .outerjoin(language, true())
+        .group_by(func.grouping_sets(
+            tuple_(City.slug, City.name), tuple_(matches.c.is_verified), tuple_(language.c.language)
+        ))
+    ).all()
+
+    cities, languages = [], []
+    verified = {"verified": 0, "unverified": 0}
+    for group, city_slug, city_name, is_verified, language_value, count in rows:
+        if group == _CITY_SET and city_slug:
+            cities.append({"value": city_slug, "label": city_name, "count": count})
+        elif group == _VERIFIED_SET:
+            verified["verified" if is_verified else "unverified"] += count
+        elif group == _LANGUAGE_SET and language_value:
+            languages.append({"value": language_value, "label": language_value, "count": count})
+
+    # Area facet: one GROUP BY over the links of the matching lawyers
+    area_rows = db.execute(
+        select(PracticeArea.slug, PracticeArea.name, func.count())
+        .join(LawyerArea, LawyerArea.area_id == PracticeArea.id)
+        .where(LawyerArea.lawyer_id.in_(select(matches.c.id)))
+        .group_by(PracticeArea.id, PracticeArea.slug, PracticeArea.name)
+    ).all()
+    areas = [{"value": slug, "label": name, "count": count} for slug, name, count in area_rows]
+
+    def most_common_first(values):
+        return sorted(values, key=lambda facet: (-facet["count"], facet["label"]))
+
+    facets = {
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "areas": most_common_first(areas),
+        "cities": most_common_first(cities),
+        "languages": most_common_first(languages),
+        "verified": verified,
+    }
+    _facets_cache.set(cache_key, facets)
+    return facets
+
+def _sort_keys(sort: str, ts_query, area_joined: bool = False) -> List[SortKey]:
+    """
+    Ordering for each sort option, with the id as the final tie-breaker
+    Ranked sorts read the precomputed scores, so their pages come from an index scan
+    """
     if sort == "highest_rating":
-        # Assuming a review_score field or relationship
-        # For now, just sort by name as a placeholder
-        base_query = base_query.order_by(asc(LawyerModel.name))
+        keys = [SortKey(LawyerModel.rating_score, descending=True)]
     elif sort == "most_experience":
-        # Sort by experience (professional_start_date)
-        base_query = base_query.order_by(asc(LawyerModel.professional_start_date))
+        # Earliest professional start first, lawyers without a start date last
+        keys = [SortKey(LawyerModel.professional_start_date, nullable=True)]
     else:
-        # Default sorting (best_match)
-        # Here you might implement a more complex sort logic
-        base_query = base_query.order_by(asc(LawyerModel.name))
-    
-    # Apply pagination
-    lawyers_db = base_query.offset(skip).limit(limit).all()
-    
-    # Process lawyers to create dictionaries that match the expected format
-    result_lawyers = []
-    
-    for lawyer in lawyers_db:
-        # Get experience scores for each area
-        area_scores = db.query(
-            lawyer_area_association.c.area_id, 
-            lawyer_area_association.c.experience_score
-        ).filter(
-            lawyer_area_association.c.lawyer_id == lawyer.id
-        ).all()
-        
-        # Convert to dict for easy lookup
-        score_map = {str(area_id): score for area_id, score in area_scores}
-        
-        # Transform areas to match LawyerPracticeArea format
-        processed_areas = []
-        for area in lawyer.areas:
-            processed_areas.append({
-                "id": str(area.id),
-                "name": area.name,
-                "slug": area.slug,
-                "experience_score": score_map.get(str(area.id), 0)
-            })
-        
-        # Create a dictionary representation of the lawyer
-        lawyer_dict = {
-            "id": lawyer.id,
-            "user_id": lawyer.user_id,
-            "name": lawyer.name,
-            "title": lawyer.title,
-            "bio": lawyer.bio,
-            "phone": lawyer.phone,
-            "email": lawyer.email,
-            "city": lawyer.city,
-            "image_url": lawyer.image_url,
-            "languages": lawyer.languages,
-            "is_verified": lawyer.is_verified,
-            "professional_start_date": lawyer.professional_start_date,
-            "catchphrase": lawyer.catchphrase,
-            "created_at": lawyer.created_at,
-            "updated_at": lawyer.updated_at,
-            "areas": processed_areas,
-            "review_score": lawyer.review_score,
-            "review_count": lawyer.review_count
-        }
-        
-        result_lawyers.append(lawyer_dict)
-    
-    return result_lawyers, total
+        # Best match: within an area the per-area score, otherwise the overall one
+        if area_joined:
+            ranking = SortKey(lawyer_area_association.c.ranking_score, descending=True)
+        else:
+            ranking = SortKey(LawyerModel.ranking_score, descending=True)
+        keys = [ranking]
+        if ts_query is not None:
+            # With a text query relevance comes first, weighted name > title > bio
+            # ts_rank returns a real, compare as double precision so cursor values round-trip exactly
+            keys.insert(0, SortKey(cast(func.ts_rank(LawyerModel.search_vector, ts_query), Float(precision=53)), descending=True))
+    # Tie-break in the direction of the leading key so uniform orderings match the indexes,
+    # on the lawyer_id of the (area_id, ranking_score, lawyer_id) index within an area
+    tie_break = lawyer_area_association.c.lawyer_id if area_joined else LawyerModel.id
+    return keys + [SortKey(tie_break, descending=keys[0].descending)]
 
 def create_lawyer(db: Session, lawyer_in: LawyerCreate) -> LawyerModel:
     """
     Create a new lawyer
     """
-    # Create lawyer without areas first
     lawyer_data = lawyer_in.dict(exclude={"areas"})
     db_lawyer = LawyerModel(**lawyer_data)
-    db.add(db_lawyer)
-    db.flush()  # Flush to get the ID
+    db_lawyer.city_id = resolve_city_id(db, lawyer_in.city)
     
-    # Now add areas if provided
+    # Add areas if provided, skipping unknown ones (checked in one query)
     if lawyer_in.areas:
-        for area_assoc in lawyer_in.areas:
-            # Query to get the area
-            area = db.query(PracticeArea).filter(PracticeArea.id == area_assoc.area_id).first()
-            if area:
-                # Add to association table with experience score
-                db.execute(
-                    lawyer_area_association.insert().values(
-                        lawyer_id=db_lawyer.id,
-                        area_id=area.id,
-                        experience_score=area_assoc.experience_score
-                    )
-                )
+        scores = {area_assoc.area_id: area_assoc.experience_score for area_assoc in lawyer_in.areas}
+        existing_ids = get_existing_area_ids(db, scores.keys())
+        db_lawyer.area_links = [
+            LawyerArea(area_id=area_id, experience_score=score)
+            for area_id, score in scores.items()
+            if area_id in existing_ids
+        ]
     
+    db.add(db_lawyer)
+    db.flush()  # Flush to get the ID
+    lawyer_id = db_lawyer.id
     db.commit()
-    db.refresh(db_lawyer)
-    return db_lawyer
+    # Reload with area links so callers can serialize without extra queries
+    return get_lawyer_by_id(db, lawyer_id)
 
 def update_lawyer(db: Session, lawyer: LawyerModel, lawyer_in: LawyerUpdate) -> LawyerModel:
     """
@@ -188,31 +420,65 @@ def update_lawyer(db: Session, lawyer: LawyerModel, lawyer_in: LawyerUpdate) ->
     
     for key, value in update_data.items():
         setattr(lawyer, key, value)
+
+    # Keep the normalized city in sync with the display name
+    if "city" in update_data:
+        lawyer.city_id = resolve_city_id(db, lawyer.city)
     
     # Update areas if provided
     if lawyer_in.areas is not None:
-        # First remove all existing relationships
-        db.execute(
-            lawyer_area_association.delete().where(
-                lawyer_area_association.c.lawyer_id == lawyer.id
-            )
-        )
-        
-        # Then add the new ones
-        for area_assoc in lawyer_in.areas:
-            # Add to association table with experience score
-            db.execute(
-                lawyer_area_association.insert().values(
-                    lawyer_id=lawyer.id,
-                    area_id=area_assoc.area_id,
-                    experience_score=area_assoc.experience_score
-                )
-            )
+        scores = {area_assoc.area_id: area_assoc.experience_score for area_assoc in lawyer_in.areas}
+        current_links = {link.area_id: link for link in lawyer.area_links}
+
+        # Dropped links are deleted as orphans, kept ones are updated in place
+        lawyer.area_links = [link for link in lawyer.area_links if link.area_id in scores]
+        for area_id, score in scores.items():
+            if area_id in current_links:
+                current_links[area_id].experience_score = score
+            else:
+                lawyer.area_links.append(LawyerArea(area_id=area_id, experience_score=score))
+
+        # Area experience feeds the ranking score
+        lawyer.ranking_stale = True
     
+    lawyer_id = lawyer.id
     db.add(lawyer)
     db.commit()
-    db.refresh(lawyer)
-    return lawyer
+    # Reload with area links so callers can serialize without extra queries
+    return get_lawyer_by_id(db, lawyer_id)
+
+def backfill_city_ids(db: Session, batch_size: int = 5000) -> int:
+    """
+    Link lawyers that only have a free-text city (e.g. imported rows) to the cities table
+    Works through id-ordered batches, committing each one, returns the number linked
+    """
+    linked = 0
+    last_id = None
+    while True:
+        batch_query = db.query(LawyerModel.id, LawyerModel.city).filter(
+            LawyerModel.city.isnot(None), LawyerModel.city_id.is_(None)
+        )
+        if last_id:
+            batch_query = batch_query.filter(LawyerModel.id > last_id)
+        batch = batch_query.order_by(LawyerModel.id).limit(batch_size).all()
+        if not batch:
+            return linked
+
+        slugs = {lawyer_id: slugify(city) for lawyer_id, city in batch}
+        city_ids = dict(db.query(City.slug, City.id).filter(City.slug.in_(set(slugs.values()))))
+
+        # One UPDATE per matched city in the batch
+        lawyers_by_city: Dict[UUID, List[UUID]] = {}
+        for lawyer_id, slug in slugs.items():
+            if slug in city_ids:
+                lawyers_by_city.setdefault(city_ids[slug], []).append(lawyer_id)
+        for city_id, lawyer_ids in lawyers_by_city.items():
+            db.query(LawyerModel).filter(LawyerModel.id.in_(lawyer_ids)).update(
+                {"city_id": city_id}, synchronize_session=False
+            )
+            linked += len(lawyer_ids)
+        db.commit()
+        last_id = batch[-1][0]
 
 def delete_lawyer(db: Session, lawyer_id: UUID) -> None:
     """
@@ -241,13 +507,25 @@ def update_lawyer_review_score(db: Session, lawyer_id: UUID, rating: int) -> Non
     db.execute(
         LawyerModel.__table__.update().where(LawyerModel.id == lawyer_id).values(
             review_score=new_score,
-            review_count=new_count
+            review_count=new_count,
+            ranking_stale=True
         )
     )
     db.commit()
     return None
 
 
+def mark_ranking_stale(db: Session, lawyer_id: UUID) -> None:
+    """
+    Flag a lawyer for the next ranking refresh (e.g. after a review changed)
+    """
+    db.execute(
+        LawyerModel.__table__.update().where(LawyerModel.id == lawyer_id).values(ranking_stale=True)
+    )
+    db.commit()
+    return None
+
+
 def verify_lawyer(db: Session, lawyer_id: UUID) -> LawyerModel:
     """
     Verify a lawyer's profile
@@ -255,6 +533,7 @@ def verify_lawyer(db: Session, lawyer_id: UUID) -> LawyerModel:
     lawyer = db.query(LawyerModel).filter(LawyerModel.id == lawyer_id).first()
     if lawyer:
         lawyer.is_verified = True
+        lawyer.ranking_stale = True
         db.add(lawyer)
         db.commit()
         db.refresh(lawyer)
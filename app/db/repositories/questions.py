@@ -1,8 +1,9 @@
 from typing import List, Optional, Dict, Tuple
 from uuid import UUID
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, and_, desc, asc
+from sqlalchemy import Integer, column, func, or_, and_, desc, asc, update, values
 
+from app.db.counts import count_query
 from app.models.question import Question
 from app.models.topic import Topic, QuestionTopic
 from app.models.user import User
@@ -26,15 +27,23 @@ def get_question_by_id(db: Session, question_id: UUID) -> Optional[Question]:
     )
 
 
-def increment_view_count(db: Session, question: Question) -> Question:
+def add_view_counts(db: Session, counts: Dict[UUID, int]) -> None:
     """
-    Increment the view count of a question
+    Add batched view counts to their questions in one UPDATE ... FROM (VALUES ...),
+    committed by the caller
     """
-    question.view_count += 1
-    db.add(question)
-    db.commit()
-    db.refresh(question)
-    return question
+    if not counts:
+        return
+    # Rows are locked in id order, so concurrent flushes cannot deadlock
+    deltas = values(
+        column("id", Question.id.type), column("views", Integer), name="deltas"
+    ).data(sorted(counts.items(), key=lambda item: str(item[0])))
+    db.execute(
+        update(Question)
+        .where(Question.id == deltas.c.id)
+        .values(view_count=func.coalesce(Question.view_count, 0) + deltas.c.views)
+        .execution_options(synchronize_session=False)
+    )
 
 
 def get_questions(
@@ -46,9 +55,10 @@ def get_questions(
     user_id: Optional[UUID] = None,
     sort: str = "latest",
     answered: Optional[bool] = None,
-) -> Tuple[List[Question], int]:
+) -> Tuple[List[Question], int, bool]:
     """
     Get questions with filtering and pagination
+    Returns questions, total count and whether the total is an estimate
     """
     # Base query with eager loads
     query = db.query(Question).options(
@@ -82,8 +92,24 @@ def get_questions(
             )
             query = query.filter(~exists_query)
 
-    # Get total count before pagination
-    total = query.count()
+    # Get total count before pagination (cached, estimated for large results)
+    depends_on = []
+    if topic_id or topic_slug:
+        depends_on += ["question_topics", "topics"]
+    if answered is not None:
+        depends_on.append("answers")
+    total, total_is_estimate = count_query(
+        db,
+        query,
+        "questions",
+        {
+            "topic_id": topic_id,
+            "topic_slug": topic_slug,
+            "user_id": user_id,
+            "answered": answered,
+        },
+        depends_on=depends_on,
+    )
 
     # Apply sorting
     if sort == "latest":
@@ -107,7 +133,7 @@ def get_questions(
     # Apply pagination
     questions = query.offset(skip).limit(limit).all()
 
-    return questions, total
+    return questions, total, total_is_estimate
 
 
 def create_question(
@@ -0,0 +1,195 @@
+"""
+Typeahead suggestions across lawyers, practice areas, topics, guides and cities
+
+Each entity type is matched on its lowercased, unaccented name through a pg_trgm
+GIN index (see lexic_normalize in the search trigram migration):
+
+- prefix matches, of the whole name or of any word in it, score highest
+- otherwise the query must be word-similar to part of the name, which tolerates typos
+
+All types are fetched with a single UNION ALL statement, each branch with its own
+limit. Suggestions from the small reference tables (areas, topics, cities) are cached
+per typed prefix and dropped when any of those tables is written.
+
+search_guides/search_questions/search_topics back the sections of GET /search: every
+word of the query must appear in the title (substring match, same trigram indexes).
+"""
+import unicodedata
+from typing import Dict, List, Tuple
+
+from sqlalchemy import String, and_, bindparam, case, func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.events import on_tables_committed
+from app.models.area import PracticeArea
+from app.models.city import City
+from app.models.guide import Guide
+from app.models.lawyer import Lawyer
+from app.models.question import Question
+from app.models.topic import Topic
+
+# Shortest normalized query worth matching, shorter ones have no usable trigrams
+MIN_QUERY_LENGTH = 2
+
+REFERENCE_TYPES = ("area", "topic", "city")
+REFERENCE_TABLES = {"practice_areas", "topics", "cities"}
+
+_reference_cache = TTLCache(
+    ttl_seconds=settings.SEARCH_SUGGEST_CACHE_TTL_SECONDS,
+    max_entries=settings.SEARCH_SUGGEST_CACHE_MAX_ENTRIES,
+)
+
+
+@on_tables_committed
+def _invalidate_reference_suggestions(tables) -> None:
+    if not REFERENCE_TABLES.isdisjoint(tables):
+        _reference_cache.clear()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase, strip accents and collapse whitespace, like lexic_normalize() does in SQL
+    """
+    decomposed = unicodedata.normalize("NFKD", query)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _suggestion_select(suggestion_type: str, id_column, label_column, slug_column, query: str, limit: int, *filters):
+    """
+    Best `limit` matches of one entity type, scored prefix first, then by word similarity
+    """
+    normalized = func.lexic_normalize(label_column)
+    escaped = _escape_like(query)
+    is_prefix = normalized.like(f"{escaped}%", escape="\\")
+    is_word_prefix = normalized.like(f"% {escaped}%", escape="\\")
+    # word_similarity() alone cannot use the index, the <% operator can
+    is_similar = bindparam("q", query).op("<%", is_comparison=True)(normalized)
+
+    score = (
+        func.word_similarity(bindparam("q", query), normalized)
+        + case((is_prefix, 1.0), (is_word_prefix, 0.5), else_=0.0)
+    ).label("score")
+
+    return (
+        select(
+            literal(suggestion_type).label("type"),
+            id_column.label("id"),
+            label_column.label("label"),
+            slug_column.label("slug"),
+            score,
+        )
+        .where(or_(is_prefix, is_word_prefix, is_similar), *filters)
+        .order_by(score.desc(), label_column)
+        .limit(limit)
+    )
+
+
+def _suggestion_selects(query: str, limit: int, include_reference: bool) -> list:
+    selects = [
+        _suggestion_select("lawyer", Lawyer.id, Lawyer.name, null().cast(String), query, limit),
+        _suggestion_select("guide", Guide.id, Guide.title, Guide.slug, query, limit, Guide.published.is_(True)),
+    ]
+    if include_reference:
+        selects += [
+            _suggestion_select("area", PracticeArea.id, PracticeArea.name, PracticeArea.slug, query, limit),
+            _suggestion_select("topic", Topic.id, Topic.name, Topic.slug, query, limit),
+            _suggestion_select("city", City.id, City.name, City.slug, query, limit, City.is_active.is_(True)),
+        ]
+    return selects
+
+
+def get_suggestions(db: Session, query: str, limit: int) -> List[Dict]:
+    """
+    Mixed suggestions for a partial query, at most `limit` per entity type,
+    best scored first
+    """
+    normalized = normalize_query(query)
+    if len(normalized) < MIN_QUERY_LENGTH:
+        return []
+
+    cache_key = (normalized, limit)
+    reference = _reference_cache.get(cache_key)
+
+    # Scoped to the current transaction, so other queries keep the server default
+    db.execute(
+        select(func.set_config("pg_trgm.word_similarity_threshold", str(settings.SEARCH_SUGGEST_MIN_SIMILARITY), True))
+    )
+    rows = db.execute(
+        union_all(*_suggestion_selects(normalized, limit, include_reference=reference is None))
+    ).mappings().all()
+
+    suggestions = [
+        {
+            "type": row["type"],
+            "id": row["id"],
+            "label": row["label"],
+            "slug": row["slug"],
+            "score": round(float(row["score"]), 4),
+        }
+        for row in rows
+    ]
+    if reference is None:
+        reference = [suggestion for suggestion in suggestions if suggestion["type"] in REFERENCE_TYPES]
+        _reference_cache.set(cache_key, reference)
+        suggestions = [suggestion for suggestion in suggestions if suggestion["type"] not in REFERENCE_TYPES]
+
+    suggestions += reference
+    suggestions.sort(key=lambda suggestion: (-suggestion["score"], suggestion["label"]))
+    return suggestions
+
+
+def clear_suggestion_cache() -> None:
+    _reference_cache.clear()
+
+
+def _contains_words(column, query: str):
+    """
+    Every word of the normalized query appears somewhere in the column
+    """
+    normalized = func.lexic_normalize(column)
+    return and_(*[normalized.like(f"%{_escape_like(word)}%", escape="\\") for word in query.split()])
+
+
+def _search_section(db: Session, model, column, query: str, limit: int, *filters) -> Tuple[List, bool]:
+    """
+    Best `limit` rows whose column contains the query words, and whether more match
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return [], False
+    rows = (
+        db.query(model)
+        .filter(_contains_words(column, normalized), *filters)
+        .order_by(func.word_similarity(normalized, func.lexic_normalize(column)).desc(), column)
+        .limit(limit + 1)
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def search_guides(db: Session, query: str, limit: int) -> Tuple[List[Guide], bool]:
+    """
+    Published guides whose title matches the query
+    """
+    return _search_section(db, Guide, Guide.title, query, limit, Guide.published.is_(True))
+
+
+def search_questions(db: Session, query: str, limit: int) -> Tuple[List[Question], bool]:
+    """
+    Questions whose title matches the query
+    """
+    return _search_section(db, Question, Question.title, query, limit)
+
+
+def search_topics(db: Session, query: str, limit: int) -> Tuple[List[Topic], bool]:
+    """
+    Topics whose name matches the query
+    """
+    return _search_section(db, Topic, Topic.name, query, limit)
@@ -19,9 +19,19 @@ from app.api import (
     navigation,
     conversations,
     users,
-    documents
+    documents,
+    search,
+    leaderboards,
 )
 from app.core.config import settings
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.analytics_partitions import PARTITION_JOB, maintain_partitions
+from app.services.analytics_rollups import ROLLUP_JOB, rollup_analytics
+from app.services.jobs import job_runner
+from app.services.leaderboards import LEADERBOARD_JOB, refresh_leaderboards
+from app.services.search import shutdown_executor as shutdown_search_executor
+from app.services.tasks import task_executor
+from app.services.rankings import RANKING_JOB, refresh_stale_rankings
 
 app = FastAPI(
     title="Lexic API",
@@ -62,3 +72,32 @@ app.include_router(
 app.include_router(navigation.router, prefix="/navigation", tags=["navigation"])
 app.include_router(conversations.router, prefix="/conversations", tags=["conversations"])
 app.include_router(users.router, prefix="/users", tags=["users"])
+app.include_router(search.router, prefix="/search", tags=["search"])
+app.include_router(leaderboards.router, prefix="/leaderboards", tags=["leaderboards"])
+
+
+# Background jobs
+job_runner.register(RANKING_JOB, refresh_stale_rankings, settings.RANKING_REFRESH_INTERVAL_SECONDS)
+job_runner.register(ROLLUP_JOB, rollup_analytics, settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+job_runner.register(LEADERBOARD_JOB, refresh_leaderboards, settings.LEADERBOARD_REFRESH_INTERVAL_SECONDS)
+job_runner.register(PARTITION_JOB, maintain_partitions, settings.ANALYTICS_PARTITION_MAINTENANCE_INTERVAL_SECONDS)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    if settings.ANALYTICS_BUFFER_ENABLED:
+        analytics_buffer.start()
+    if settings.TASK_EXECUTOR_ENABLED:
+        task_executor.start()
+    if settings.BACKGROUND_JOBS_ENABLED:
+        job_runner.start()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    job_runner.stop()
+    # Deferred tracking tasks feed the analytics buffer, run them before it stops
+    task_executor.stop()
+    # Write the events still queued before the process exits
+    analytics_buffer.stop()
+    shutdown_search_executor()
@@ -1,7 +1,7 @@
 from app.models.user import User
 from app.models.token import Token
 from app.models.category import PracticeAreaCategory
-from app.models.area import PracticeArea, lawyer_area_association
+from app.models.area import PracticeArea, LawyerArea, lawyer_area_association
 from app.models.lawyer import Lawyer
 from app.models.city import City
 from app.models.topic import Topic, QuestionTopic
@@ -18,7 +18,11 @@ from app.models.analytics import (
     ProfileImpression, ProfileImpressionCount,
     ListingClick, ListingClickCount,
     GuideView, GuideViewCount,
-    QuestionView, QuestionViewCount
+    QuestionView, QuestionViewCount,
+    AnalyticsRollupHourly, AnalyticsRollupDaily,
+    AnalyticsVisitorSketch,
 )
 from app.models.featured_item import FeaturedItem
-from app.models.conversation import Conversation, ConversationMessage
\ No newline at end of file
+from app.models.conversation import Conversation, ConversationMessage
+from app.models.job import JobWatermark
+from app.models.leaderboard import LeaderboardEntry
@@ -1,20 +1,25 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
 
+# The raw event tables are partitioned by month of timestamp, which is therefore part
+# of their primary key (see app/services/analytics_partitions.py)
+
 class ProfileView(Base):
     __tablename__ = "profile_views"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     source = Column(String, nullable=True)  # Where the click came from (e.g., "name", "button", etc.)
-    timestamp = Column(DateTime, nullable=False)
+    visitor_id = Column(String, nullable=True)  # Anonymous visitor (e.g. cookie id), for unique visitors
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -33,12 +38,13 @@ class ProfileViewCount(Base):
 
 class MessageEvent(Base):
     __tablename__ = "message_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     status = Column(String, nullable=False)  # "opened", "sent", etc.
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -58,12 +64,13 @@ class MessageEventCount(Base):
 
 class CallEvent(Base):
     __tablename__ = "call_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     completed = Column(Boolean, default=False)
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -83,6 +90,7 @@ class CallEventCount(Base):
 
 class ProfileImpression(Base):
     __tablename__ = "profile_impressions"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), nullable=False)
@@ -91,7 +99,7 @@ class ProfileImpression(Base):
     area_slug = Column(String, nullable=True)
     city_slug = Column(String, nullable=True)
     position = Column(Integer, nullable=True)
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -110,6 +118,7 @@ class ProfileImpressionCount(Base):
 
 class ListingClick(Base):
     __tablename__ = "listing_clicks"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     lawyer_id = Column(UUID(as_uuid=True), ForeignKey("lawyers.id", ondelete="CASCADE"), nullable=False)
@@ -118,7 +127,7 @@ class ListingClick(Base):
     area_slug = Column(String, nullable=True)
     city_slug = Column(String, nullable=True)
     position = Column(Integer, nullable=True)
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -137,11 +146,13 @@ class ListingClickCount(Base):
 
 class GuideView(Base):
     __tablename__ = "guide_views"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     guide_id = Column(UUID(as_uuid=True), ForeignKey("guides.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    timestamp = Column(DateTime, nullable=False)
+    visitor_id = Column(String, nullable=True)  # Anonymous visitor, for unique visitors
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -160,11 +171,13 @@ class GuideViewCount(Base):
 
 class QuestionView(Base):
     __tablename__ = "question_views"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    timestamp = Column(DateTime, nullable=False)
+    visitor_id = Column(String, nullable=True)  # Anonymous visitor, for unique visitors
+    timestamp = Column(DateTime, primary_key=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -180,3 +193,35 @@ class QuestionViewCount(Base):
 
     # Relationships
     question = relationship("app.models.question.Question", backref="analytics_view_count")
+
+# Event counts per metric, entity and time bucket, built from the raw event tables by
+# the rollup job (app/services/analytics_rollups.py). entity_id is a lawyer, guide or
+# question id depending on the metric, so it has no foreign key.
+class AnalyticsRollupHourly(Base):
+    __tablename__ = "analytics_rollups_hourly"
+
+    metric = Column(String, primary_key=True)  # "profile_views", "messages_sent", "guide_views", ...
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+class AnalyticsRollupDaily(Base):
+    __tablename__ = "analytics_rollups_daily"
+
+    metric = Column(String, primary_key=True)
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+# HyperLogLog sketch of the distinct visitors of an entity on one day, maintained by
+# the rollup job (app/services/analytics_rollups.py, app/utils/hyperloglog.py)
+class AnalyticsVisitorSketch(Base):
+    __tablename__ = "analytics_visitor_sketches"
+
+    metric = Column(String, primary_key=True)  # "profile_views", "guide_views" or "question_views"
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(DateTime, primary_key=True)
+    sketch = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -1,20 +1,27 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, Table, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
 
-# Association table for many-to-many relationships between lawyers and practice areas
-lawyer_area_association = Table(
-    'lawyer_areas',
-    Base.metadata,
-    Column('lawyer_id', UUID(as_uuid=True), ForeignKey('lawyers.id', ondelete="CASCADE"), primary_key=True),
-    Column('area_id', UUID(as_uuid=True), ForeignKey('practice_areas.id', ondelete="CASCADE"), primary_key=True),
-    Column('experience_score', Integer, default=0),  # 0-100 score representing expertise level
-)
+# Association object between lawyers and practice areas, carrying the lawyer's experience in that area
+class LawyerArea(Base):
+    __tablename__ = "lawyer_areas"
+
+    lawyer_id = Column(UUID(as_uuid=True), ForeignKey('lawyers.id', ondelete="CASCADE"), primary_key=True)
+    area_id = Column(UUID(as_uuid=True), ForeignKey('practice_areas.id', ondelete="CASCADE"), primary_key=True)
+    experience_score = Column(Integer, default=0)  # 0-100 score representing expertise level
+    ranking_score = Column(Float, nullable=False, default=0.0, server_default="0")  # Ranking within this area
+
+    # Relationships
+    lawyer = relationship("app.models.lawyer.Lawyer", back_populates="area_links", overlaps="areas,lawyers")
+    area = relationship("PracticeArea", overlaps="areas,lawyers")
+
+# Table for many-to-many relationships between lawyers and practice areas
+lawyer_area_association = LawyerArea.__table__
 
 class PracticeArea(Base):
     __tablename__ = "practice_areas"
@@ -30,9 +37,10 @@ class PracticeArea(Base):
     # Relationship with category
     category_rel = relationship("app.models.category.PracticeAreaCategory", back_populates="areas")
     
-    # Relationship with lawyers
+    # Relationship with lawyers (read-only, writes go through LawyerArea)
     lawyers = relationship(
         "app.models.lawyer.Lawyer", 
         secondary=lawyer_area_association,
-        back_populates="areas"
+        back_populates="areas",
+        viewonly=True,
     )
\ No newline at end of file
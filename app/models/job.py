@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime
+
+from app.db.database import Base
+
+
+# Progress marker of an incremental background job (e.g. last processed timestamp)
+class JobWatermark(Base):
+    __tablename__ = "job_watermarks"
+
+    name = Column(String, primary_key=True)
+    value = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
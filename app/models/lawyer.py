@@ -3,8 +3,8 @@ from datetime import datetime, timezone
 from typing import List
 
 from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, ARRAY, Integer, Float
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from app.db.database import Base
 from app.models.area import lawyer_area_association
@@ -19,7 +19,8 @@ class Lawyer(Base):
     bio = Column(Text, nullable=True)
     phone = Column(String, nullable=True)
     email = Column(String, nullable=False, unique=True, index=True)
-    city = Column(String, nullable=True)
+    city = Column(String, nullable=True)  # Display name as entered, filtering uses city_id
+    city_id = Column(UUID(as_uuid=True), ForeignKey("cities.id", ondelete="SET NULL"), nullable=True, index=True)
     image_url = Column(String, nullable=True)
     languages = Column(ARRAY(String), nullable=True)
     is_verified = Column(Boolean, default=False)
@@ -29,15 +30,34 @@ class Lawyer(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     review_score = Column(Float, default=0.0)
     review_count = Column(Integer, default=0)
+    # Precomputed by the ranking job (app/services/rankings.py), indexed for ranked pages
+    rating_score = Column(Float, nullable=False, default=0.0, server_default="0")  # Bayesian-averaged rating
+    ranking_score = Column(Float, nullable=False, default=0.0, server_default="0")
+    ranking_stale = Column(Boolean, nullable=False, default=True, server_default="true")
+    ranking_updated_at = Column(DateTime, nullable=True)
+    # Weighted full-text document (name > title > bio), maintained by a database trigger
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
     
     # Relationship with user - using string to avoid circular import
     user = relationship("app.models.user.User", backref="lawyer_profile")
+
+    # Normalized city
+    city_rel = relationship("app.models.city.City")
     
-    # Relationship with practice areas
+    # Relationship with practice areas (read-only, writes go through area_links)
     areas = relationship(
         "app.models.area.PracticeArea", 
         secondary=lawyer_area_association,
-        back_populates="lawyers"
+        back_populates="lawyers",
+        viewonly=True,
+    )
+    # Practice area associations with their experience scores
+    area_links = relationship(
+        "app.models.area.LawyerArea",
+        back_populates="lawyer",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        overlaps="areas,lawyers",
     )
     # Additional relationships
     reviews = relationship("app.models.review.Review", back_populates="lawyer", cascade="all, delete-orphan")
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.database import Base
+
+
+# Top entities of a leaderboard for one period and scope, precomputed from the analytics
+# rollups by the leaderboard job (app/services/leaderboards.py). entity_id is a lawyer,
+# guide or question id depending on the board, so it has no foreign key.
+class LeaderboardEntry(Base):
+    __tablename__ = "leaderboard_entries"
+
+    board = Column(String, primary_key=True)  # "lawyers", "guides" or "questions"
+    period = Column(String, primary_key=True)  # "24h", "7d" or "30d"
+    scope = Column(String, primary_key=True)  # "all", or the id of a practice area, guide category or topic
+    rank = Column(Integer, primary_key=True)
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    score = Column(Float, nullable=False)  # Time-decayed event count
+    count = Column(Integer, nullable=False)  # Events in the period
+    refreshed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # Base response models
@@ -19,6 +19,8 @@ class ProfileViewCreate(BaseModel):
     lawyer_id: UUID
     user_id: Optional[UUID] = None
     source: Optional[str] = None
+    # Anonymous visitor (e.g. a first-party cookie id), counted in the unique visitors
+    visitor_id: Optional[str] = Field(None, max_length=64)
     timestamp: datetime
 
 
@@ -83,6 +85,7 @@ class ListingClickResponse(SuccessResponse):
 class GuideViewCreate(BaseModel):
     guide_id: UUID
     user_id: Optional[UUID] = None
+    visitor_id: Optional[str] = Field(None, max_length=64)
     timestamp: datetime
 
 
@@ -94,8 +97,63 @@ class GuideViewResponse(SuccessResponse):
 class QuestionViewCreate(BaseModel):
     question_id: UUID
     user_id: Optional[UUID] = None
+    visitor_id: Optional[str] = Field(None, max_length=64)
     timestamp: datetime
 
 
 class QuestionViewResponse(SuccessResponse):
     data: Optional[dict] = None
+
+
+# Batched events: each event is its *Create schema plus a `type`
+class ProfileViewEvent(ProfileViewCreate):
+    type: Literal["profile_view"]
+
+
+class MessageEventEvent(MessageEventCreate):
+    type: Literal["message_event"]
+
+
+class CallEventEvent(CallEventCreate):
+    type: Literal["call_event"]
+
+
+class ProfileImpressionEvent(ProfileImpressionCreate):
+    type: Literal["profile_impression"]
+
+
+class ListingClickEvent(ListingClickCreate):
+    type: Literal["listing_click"]
+
+
+class GuideViewEvent(GuideViewCreate):
+    type: Literal["guide_view"]
+
+
+class QuestionViewEvent(QuestionViewCreate):
+    type: Literal["question_view"]
+
+
+AnalyticsEvent = Annotated[
+    Union[
+        ProfileViewEvent,
+        MessageEventEvent,
+        CallEventEvent,
+        ProfileImpressionEvent,
+        ListingClickEvent,
+        GuideViewEvent,
+        QuestionViewEvent,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class RejectedEvent(BaseModel):
+    index: int  # Position of the event in the posted batch
+    error: str
+
+
+class AnalyticsEventBatchResponse(SuccessResponse):
+    accepted: int
+    suppressed: int = 0  # Repeat views dropped by the dedup window
+    rejected: List[RejectedEvent] = []
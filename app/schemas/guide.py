@@ -121,6 +121,8 @@ class GuideDetail(GuideInDB):
 class GuidesList(BaseModel):
     guides: List[GuideListItem]
     total: int
+    # True when total is the planner's estimate rather than an exact count
+    total_is_estimate: bool = False
     page: int
     pages: int
 
@@ -45,6 +45,7 @@ class LawyerUpdate(BaseModel):
 class LawyerInDB(LawyerBase):
     id: UUID
     user_id: Optional[UUID] = None
+    city_id: Optional[UUID] = None
     is_verified: bool = False
     created_at: datetime
     updated_at: datetime
@@ -66,9 +67,33 @@ class LawyerList(BaseModel):
     """Schema for listing lawyers with pagination"""
     lawyers: List[Lawyer]
     total: int
+    # True when total is the planner's estimate rather than an exact count
+    total_is_estimate: bool = False
     page: int
     size: int
     pages: int
+    # Opaque keyset cursors, pass one back as `cursor` to fetch the adjacent page
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+class FacetValue(BaseModel):
+    """Number of matching lawyers for one filter value"""
+    value: str
+    label: str
+    count: int
+
+class VerifiedFacet(BaseModel):
+    verified: int = 0
+    unverified: int = 0
+
+class LawyerFacets(BaseModel):
+    """Counts next to each search filter for the current filter set"""
+    total: int
+    total_is_estimate: bool = False
+    areas: List[FacetValue] = []
+    cities: List[FacetValue] = []
+    languages: List[FacetValue] = []
+    verified: VerifiedFacet = VerifiedFacet()
 
 class LawyerSearchParams(BaseModel):
     """Schema for lawyer search parameters"""
@@ -77,4 +102,5 @@ class LawyerSearchParams(BaseModel):
     query: Optional[str] = None
     sort: Optional[str] = "best_match"  # best_match, highest_rating, most_experience
     page: int = 1
-    size: int = 10
\ No newline at end of file
+    size: int = 10
+    cursor: Optional[str] = None
\ No newline at end of file
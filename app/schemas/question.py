@@ -53,6 +53,8 @@ class QuestionsList(BaseModel):
     """List of questions with pagination"""
     questions: List[QuestionResponse]
     total: int
+    # True when total is the planner's estimate rather than an exact count
+    total_is_estimate: bool = False
     page: int
     size: int
     pages: int
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+from app.schemas.lawyer import Lawyer
+
+class SearchSuggestion(BaseModel):
+    """One typeahead suggestion"""
+    type: Literal["lawyer", "area", "topic", "guide", "city"]
+    id: UUID
+    label: str
+    slug: Optional[str] = None
+    score: float
+
+class SearchSuggestions(BaseModel):
+    """Mixed suggestions, best scored first"""
+    query: str
+    suggestions: List[SearchSuggestion]
+
+class GuideHit(BaseModel):
+    id: UUID
+    title: str
+    slug: str
+    description: Optional[str] = None
+
+class QuestionHit(BaseModel):
+    id: UUID
+    title: str
+    view_count: int = 0
+    created_at: Optional[datetime] = None
+
+class TopicHit(BaseModel):
+    id: UUID
+    name: str
+    slug: str
+
+class SearchSection(BaseModel):
+    """Results of one entity type"""
+    # "timeout" and "error" sections are empty
+    status: Literal["ok", "timeout", "error"]
+    has_more: bool = False
+
+class LawyerSection(SearchSection):
+    items: List[Lawyer] = []
+    total: Optional[int] = None
+
+class GuideSection(SearchSection):
+    items: List[GuideHit] = []
+
+class QuestionSection(SearchSection):
+    items: List[QuestionHit] = []
+
+class TopicSection(SearchSection):
+    items: List[TopicHit] = []
+
+class SearchSections(BaseModel):
+    lawyers: Optional[LawyerSection] = None
+    guides: Optional[GuideSection] = None
+    questions: Optional[QuestionSection] = None
+    topics: Optional[TopicSection] = None
+
+class SearchResults(BaseModel):
+    """Federated search results, one section per requested entity type"""
+    query: str
+    sections: SearchSections
+    # True when a section timed out or failed
+    partial: bool
+    took_ms: int
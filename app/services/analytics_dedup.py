@@ -0,0 +1,163 @@
+"""
+Deduplication window for view events
+
+A visitor refreshing a lawyer profile, guide or question would otherwise write a new
+view row and bump its counter every time. The first view of an entity by a visitor
+opens a window of ANALYTICS_DEDUP_WINDOW_SECONDS during which further views by the
+same visitor are dropped before they reach the database; the window is not extended
+by the repeats.
+
+A visitor is the signed-in user, else the visitor_id sent with the event, else a
+fingerprint of the client (address, user agent and language). Views carrying none of
+them are never dropped.
+
+Open windows are keys in the backend configured by ANALYTICS_DEDUP_URL (see
+app/core/cache.py): "memory://" keeps them per worker in a TTL/LRU cache of
+ANALYTICS_DEDUP_MAX_ENTRIES keys, "redis://..." shares them between workers.
+Backend errors never drop a view: the view is recorded and the error counted.
+"""
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from app.core.cache import CacheBackend, CacheError, create_cache_backend
+from app.core.config import settings
+from app.services.analytics_ingestion import analytics_buffer
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analytics_dedup"
+# View event types and the column holding the viewed entity
+VIEW_TARGETS = {
+    "profile_view": "lawyer_id",
+    "guide_view": "guide_id",
+    "question_view": "question_id",
+}
+
+_backend: Optional[CacheBackend] = None
+_backend_configured = False
+_backend_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"recorded": 0, "suppressed": 0, "unidentified": 0, "errors": 0}
+_suppressed_by_type = {kind: 0 for kind in VIEW_TARGETS}
+
+
+def get_backend() -> Optional[CacheBackend]:
+    global _backend, _backend_configured
+    with _backend_lock:
+        if not _backend_configured:
+            _backend = create_cache_backend(
+                settings.ANALYTICS_DEDUP_URL, max_entries=settings.ANALYTICS_DEDUP_MAX_ENTRIES
+            )
+            _backend_configured = True
+        return _backend
+
+
+def set_backend(backend: Optional[CacheBackend]) -> None:
+    """
+    Replace the configured backend, None disables deduplication
+    """
+    global _backend, _backend_configured
+    with _backend_lock:
+        _backend = backend
+        _backend_configured = True
+
+
+def reset_backend() -> None:
+    """
+    Forget every open window; the backend is created again from the settings on next use
+    """
+    global _backend, _backend_configured
+    with _backend_lock:
+        _backend = None
+        _backend_configured = False
+
+
+def client_fingerprint(request: Request) -> str:
+    """
+    Short hash identifying an anonymous client by address, user agent and language
+    """
+    parts = [
+        request.client.host if request.client else "",
+        request.headers.get("user-agent", ""),
+        request.headers.get("accept-language", ""),
+    ]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def _visitor(data: Dict[str, Any], fingerprint: Optional[str]) -> Optional[str]:
+    if data.get("user_id"):
+        return f"u:{data['user_id']}"
+    if data.get("visitor_id"):
+        return f"v:{data['visitor_id']}"
+    if fingerprint:
+        return f"f:{fingerprint}"
+    return None
+
+
+def _count(name: str, kind: Optional[str] = None) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+        if kind is not None:
+            _suppressed_by_type[kind] += 1
+
+
+def is_repeat_view(kind: str, event: Any, fingerprint: Optional[str] = None) -> bool:
+    """
+    Whether an event is a repeat view inside an open window, and should be dropped
+    `event` is a *Create schema or a dict/row; other event types are never repeats.
+    Opens the window when it is not
+    """
+    window = settings.ANALYTICS_DEDUP_WINDOW_SECONDS
+    backend = get_backend()
+    if kind not in VIEW_TARGETS or window <= 0 or backend is None:
+        return False
+
+    data = event.model_dump() if isinstance(event, BaseModel) else event
+    visitor = _visitor(data, fingerprint)
+    if visitor is None:
+        _count("unidentified")
+        return False
+
+    key = f"{KEY_PREFIX}:{kind}:{data[VIEW_TARGETS[kind]]}:{visitor}"
+    try:
+        opened = backend.add(key, b"1", window)
+    except CacheError as e:
+        _count("errors")
+        logger.warning("Analytics dedup check failed: %s", e)
+        return False
+    if opened:
+        _count("recorded")
+        return False
+    _count("suppressed", kind)
+    return True
+
+
+def repeat_flags(events: Iterable[Tuple[str, Any]], fingerprint: Optional[str] = None) -> List[bool]:
+    """
+    is_repeat_view of each (kind, event) pair, in order
+    """
+    return [is_repeat_view(kind, event, fingerprint) for kind, event in events]
+
+
+def enqueue_view(kind: str, event: Any, fingerprint: Optional[str] = None) -> bool:
+    """
+    Queue a view for the ingestion buffer unless it is a repeat, returns whether it was queued
+    Runs as a background task, so a shared backend is not queried on the request path
+    """
+    if is_repeat_view(kind, event, fingerprint):
+        return False
+    return analytics_buffer.enqueue(kind, event)
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Views checked by this worker: recorded (opened a window), suppressed (writes saved),
+    unidentified (no visitor to check) and backend errors
+    """
+    with _stats_lock:
+        return {**_stats, "suppressed_by_type": dict(_suppressed_by_type)}
@@ -0,0 +1,157 @@
+"""
+Raw analytics event export (GET /analytics/lawyers/{id}/export)
+
+A lawyer's raw events of one type and date range are streamed as CSV or NDJSON,
+optionally gzipped on the fly. Memory stays constant whatever the number of rows:
+
+- The rows come from a server-side cursor (stream_results) in batches of
+  ANALYTICS_EXPORT_BATCH_ROWS, as plain Core row tuples rather than ORM objects.
+- Each batch is encoded (and compressed) into one chunk of the response and
+  dropped before the next one is fetched.
+
+The stream runs on a connection of its own, opened when the response starts and
+closed when it ends or the client goes away: the request's session is closed by
+get_db before a streaming body is sent. Rows are read in timestamp order through
+the (lawyer_id, timestamp) indexes of the event tables.
+
+The user and visitor ids of the events are only exported for admins.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.analytics import CallEvent, ListingClick, MessageEvent, ProfileImpression, ProfileView
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+IDENTITY_COLUMNS = ("user_id", "visitor_id")
+
+
+class ExportType(NamedTuple):
+    model: Any
+    # Exported columns, in order
+    columns: Sequence[str]
+
+
+EXPORT_TYPES: Dict[str, ExportType] = {
+    "profile_views": ExportType(ProfileView, ("id", "timestamp", "source", "user_id", "visitor_id")),
+    "impressions": ExportType(
+        ProfileImpression, ("id", "timestamp", "position", "search_query", "area_slug", "city_slug", "user_id")
+    ),
+    "clicks": ExportType(
+        ListingClick, ("id", "timestamp", "position", "search_query", "area_slug", "city_slug", "user_id")
+    ),
+    "messages": ExportType(MessageEvent, ("id", "timestamp", "status", "user_id")),
+    "calls": ExportType(CallEvent, ("id", "timestamp", "completed", "user_id")),
+}
+
+
+def export_columns(event_type: str, include_identity: bool = False) -> List[str]:
+    """
+    Columns exported for an event type; raises ValueError for an unknown type
+    """
+    if event_type not in EXPORT_TYPES:
+        raise ValueError(f"Unknown export type: {event_type}")
+    columns = EXPORT_TYPES[event_type].columns
+    return [column for column in columns if include_identity or column not in IDENTITY_COLUMNS]
+
+
+def stream_rows(
+    engine: Engine,
+    event_type: str,
+    lawyer_id: UUID,
+    start: datetime,
+    end: datetime,
+    columns: Sequence[str],
+) -> Iterator[List[tuple]]:
+    """
+    Batches of row tuples of a lawyer's events in [start, end), oldest first
+    """
+    model = EXPORT_TYPES[event_type].model
+    statement = (
+        select(*(getattr(model, column) for column in columns))
+        .where(model.lawyer_id == lawyer_id, model.timestamp >= start, model.timestamp < end)
+        .order_by(model.timestamp)
+    )
+    batch_rows = settings.ANALYTICS_EXPORT_BATCH_ROWS
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_rows).execute(statement)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_csv(columns: Sequence[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """
+    A header line, then one chunk of CSV lines per batch
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_value(value) for value in row] for row in batch)
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(columns: Sequence[str], batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """
+    One chunk of JSON objects, one per line, per batch
+    """
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + "\n" for row in batch
+        ).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks into a single gzip member, chunk by chunk
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_events(
+    engine: Engine,
+    event_type: str,
+    lawyer_id: UUID,
+    start: datetime,
+    end: datetime,
+    format: str = "csv",
+    gzip: bool = False,
+    include_identity: bool = False,
+) -> Iterator[bytes]:
+    """
+    The encoded export as a stream of chunks; the query only runs once it is iterated
+    Raises ValueError for an unknown type or format
+    """
+    columns = export_columns(event_type, include_identity)
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    encode = encode_csv if format == "csv" else encode_ndjson
+    chunks = encode(columns, stream_rows(engine, event_type, lawyer_id, start, end, columns))
+    return gzip_chunks(chunks) if gzip else chunks
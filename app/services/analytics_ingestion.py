@@ -0,0 +1,559 @@
+"""
+Buffered ingestion of analytics events
+
+Tracking calls enqueue events in process instead of writing them one by one. A
+flusher thread writes the queue every ANALYTICS_FLUSH_MAX_EVENTS events or
+ANALYTICS_FLUSH_INTERVAL_MS milliseconds, whichever comes first. Each flush is one
+transaction with one multi-row INSERT per event table and one aggregated
+INSERT ... ON CONFLICT upsert per *_counts table. Question views also add to
+Question.view_count, in one UPDATE ... FROM (VALUES ...) per flush.
+
+Question and guide views still queued are kept per target in a counter map:
+pending_count() / pending_counts() give the views not written yet, for reads to
+add to the stored counts.
+
+Backpressure: when ANALYTICS_QUEUE_MAX_EVENTS are pending, producers wait up to
+ANALYTICS_ENQUEUE_TIMEOUT_MS for room, then the event is dropped and counted.
+A failed flush is retried with later flushes, up to ANALYTICS_FLUSH_MAX_ATTEMPTS.
+Events pointing at rows deleted in the meantime are discarded rather than failing
+the whole batch. stop() flushes whatever is still queued. Each written batch drops
+the cached analytics summaries of its lawyers.
+
+Without a running flusher (scripts, disabled buffering) events are written as
+soon as they are enqueued.
+
+With ANALYTICS_SPOOL_DIR set, a running buffer appends events to a local spool
+(app/utils/spool.py) instead of the in-memory queue, and the flusher loads them
+from there in batches of ANALYTICS_SPOOL_LOAD_BATCH_EVENTS, committing the spool
+checkpoint after each written batch. Events then survive restarts and outages of
+the database: nothing is dropped while it is unreachable, the loader resumes from
+the checkpoint. A batch failing for another reason is retried up to
+ANALYTICS_FLUSH_MAX_ATTEMPTS times, then skipped. If appending fails the event
+falls back to the in-memory queue.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.events import notify_tables_committed
+from app.db.repositories import analytics as analytics_repository
+from app.models.analytics import (
+    CallEvent, CallEventCount,
+    GuideView, GuideViewCount,
+    ListingClick, ListingClickCount,
+    MessageEvent, MessageEventCount,
+    ProfileImpression, ProfileImpressionCount,
+    ProfileView, ProfileViewCount,
+    QuestionView, QuestionViewCount,
+)
+from app.models.guide import Guide
+from app.models.lawyer import Lawyer
+from app.models.question import Question
+from app.db.repositories import questions as questions_repository
+from app.services import analytics_summary
+from app.utils.spool import Spool
+
+logger = logging.getLogger(__name__)
+
+
+class EventType(NamedTuple):
+    """How one kind of event is stored and counted"""
+    model: Any
+    count_model: Any
+    # Columns identifying the counter row
+    count_key: Tuple[str, ...]
+    # Column referencing the tracked entity, and that entity's model
+    target_column: str
+    target_model: Any
+    # Counter increments for one event
+    increments: Callable[[Dict], Dict[str, int]] = lambda event: {"count": 1}
+    # Adds the number of events per target to a counter on the target itself
+    add_target_counts: Optional[Callable[[Session, Dict[Any, int]], None]] = None
+
+
+EVENT_TYPES: Dict[str, EventType] = {
+    "profile_view": EventType(ProfileView, ProfileViewCount, ("lawyer_id",), "lawyer_id", Lawyer),
+    "message_event": EventType(MessageEvent, MessageEventCount, ("lawyer_id", "status"), "lawyer_id", Lawyer),
+    "call_event": EventType(
+        CallEvent, CallEventCount, ("lawyer_id",), "lawyer_id", Lawyer,
+        lambda event: {"count": 1, "completed_count": 1 if event.get("completed") else 0},
+    ),
+    "profile_impression": EventType(
+        ProfileImpression, ProfileImpressionCount, ("lawyer_id",), "lawyer_id", Lawyer
+    ),
+    "listing_click": EventType(ListingClick, ListingClickCount, ("lawyer_id",), "lawyer_id", Lawyer),
+    "guide_view": EventType(GuideView, GuideViewCount, ("guide_id",), "guide_id", Guide),
+    "question_view": EventType(
+        QuestionView, QuestionViewCount, ("question_id",), "question_id", Question,
+        add_target_counts=questions_repository.add_view_counts,
+    ),
+}
+# Kinds whose queued events are counted per target, see EventBuffer.pending_count
+PENDING_COUNTED_KINDS = ("question_view", "guide_view")
+
+
+class QueuedEvent(NamedTuple):
+    kind: str
+    row: Dict[str, Any]
+    attempts: int = 0
+
+
+def event_row(kind: str, event: Any) -> Dict[str, Any]:
+    """
+    Insertable row for an event given as a *Create schema or a dict
+    Raises ValueError for an unknown kind
+    """
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"Unknown analytics event type: {kind}")
+    data = event.model_dump() if isinstance(event, BaseModel) else dict(event)
+    columns = EVENT_TYPES[kind].model.__table__.c
+    row = {name: value for name, value in data.items() if name in columns}
+    row.setdefault("id", uuid.uuid4())
+    row.setdefault("created_at", datetime.now(timezone.utc))
+    return row
+
+
+def write_events(db: Session, events: Iterable[Tuple[str, Dict]]) -> Dict[str, int]:
+    """
+    Insert the event rows and add them to their counters, in one transaction
+    Returns the number of rows written per kind
+    """
+    rows_by_kind: Dict[str, List[Dict]] = {}
+    for kind, row in events:
+        rows_by_kind.setdefault(kind, []).append(row)
+
+    now = datetime.now()
+    tables = set()
+    for kind, rows in rows_by_kind.items():
+        event_type = EVENT_TYPES[kind]
+        analytics_repository.insert_events(db, event_type.model, rows)
+
+        counts: Dict[Tuple, Counter] = {}
+        for row in rows:
+            key = tuple(row.get(column) for column in event_type.count_key)
+            counts.setdefault(key, Counter()).update(event_type.increments(row))
+        analytics_repository.upsert_counts(
+            db,
+            event_type.count_model,
+            event_type.count_key,
+            [
+                {**dict(zip(event_type.count_key, key)), **increments, "updated_at": now}
+                for key, increments in counts.items()
+            ],
+        )
+        tables.update({event_type.model.__tablename__, event_type.count_model.__tablename__})
+
+        if event_type.add_target_counts is not None:
+            event_type.add_target_counts(db, Counter(row[event_type.target_column] for row in rows))
+
+    db.commit()
+    # Core writes bypass the ORM commit hooks
+    notify_tables_committed(tables)
+    analytics_summary.invalidate_lawyers({
+        row["lawyer_id"]
+        for kind, rows in rows_by_kind.items() if EVENT_TYPES[kind].target_model is Lawyer
+        for row in rows
+    })
+    return {kind: len(rows) for kind, rows in rows_by_kind.items()}
+
+
+def existing_targets(db: Session, events: Sequence[Tuple[str, Dict]]) -> List[bool]:
+    """
+    Whether the lawyer, guide or question tracked by each (kind, row) event exists,
+    checked with one IN query per entity type
+    """
+    ids_by_model: Dict[Any, set] = {}
+    for kind, row in events:
+        event_type = EVENT_TYPES[kind]
+        ids_by_model.setdefault(event_type.target_model, set()).add(row[event_type.target_column])
+    existing = {
+        model: {target_id for (target_id,) in db.query(model.id).filter(model.id.in_(ids))}
+        for model, ids in ids_by_model.items()
+    }
+    return [
+        row[EVENT_TYPES[kind].target_column] in existing[EVENT_TYPES[kind].target_model]
+        for kind, row in events
+    ]
+
+
+def _existing_targets(db: Session, events: List[QueuedEvent]) -> List[QueuedEvent]:
+    """
+    Events whose tracked lawyer, guide or question still exists
+    """
+    found = existing_targets(db, [(event.kind, event.row) for event in events])
+    return [event for event, exists in zip(events, found) if exists]
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (uuid.UUID, datetime)):
+        return str(value) if isinstance(value, uuid.UUID) else value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_event(event: QueuedEvent) -> bytes:
+    """
+    Spool record of a queued event
+    """
+    return json.dumps({"kind": event.kind, "row": event.row}, default=_json_default).encode()
+
+
+def decode_event(payload: bytes) -> QueuedEvent:
+    """
+    Queued event of a spool record, with UUID and datetime columns restored
+    """
+    data = json.loads(payload)
+    columns = EVENT_TYPES[data["kind"]].model.__table__.c
+    row = {}
+    for name, value in data["row"].items():
+        if isinstance(value, str) and name in columns:
+            python_type = columns[name].type.python_type
+            if python_type is uuid.UUID:
+                value = uuid.UUID(value)
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+        row[name] = value
+    return QueuedEvent(data["kind"], row)
+
+
+class EventBuffer:
+    """
+    Process-wide queue of analytics events with a background flusher thread
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        self._queue: Deque[QueuedEvent] = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # Queued events of PENDING_COUNTED_KINDS per (kind, target id)
+        self._pending: Counter = Counter()
+        self.spool: Optional[Spool] = None
+        self._load_lock = threading.Lock()
+        # Events appended to the spool since the last load, and failed loads of the current batch
+        self._spooled_since_load = 0
+        self._spool_failures = 0
+        self._stats = {
+            "enqueued": 0,
+            "spooled": 0,
+            "written": 0,
+            "dropped": 0,
+            "discarded": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if settings.ANALYTICS_SPOOL_DIR and self.spool is None:
+            try:
+                self.spool = Spool.open_slot(
+                    settings.ANALYTICS_SPOOL_DIR,
+                    segment_bytes=settings.ANALYTICS_SPOOL_SEGMENT_BYTES,
+                    fsync=settings.ANALYTICS_SPOOL_FSYNC,
+                    fsync_interval=settings.ANALYTICS_SPOOL_FSYNC_INTERVAL_MS / 1000,
+                )
+                logger.info("Analytics events spooled to %s", self.spool.directory)
+            except OSError:
+                logger.exception("Cannot open the analytics spool, events stay in memory")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="analytics-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the flusher and write everything still queued
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        if self.spool is not None:
+            # Whatever could not be loaded stays in the spool for the next start
+            self.spool.close()
+            self.spool = None
+
+    def enqueue(self, kind: str, event: Any) -> bool:
+        """
+        Queue one event, returns False if it was dropped because the queue stayed full
+        """
+        return self.enqueue_many([(kind, event)]) == 1
+
+    def enqueue_many(self, events: Iterable[Tuple[str, Any]]) -> int:
+        """
+        Queue several events, returns how many were accepted
+        """
+        rows = [QueuedEvent(kind, event_row(kind, event)) for kind, event in events]
+        if not rows:
+            return 0
+        if not settings.ANALYTICS_BUFFER_ENABLED or not self.running:
+            written = self._write(rows, requeue=False)
+            return len(rows) if written is not None else 0
+        if self.spool is not None and self._append_to_spool(rows):
+            return len(rows)
+
+        accepted = 0
+        deadline = time.monotonic() + settings.ANALYTICS_ENQUEUE_TIMEOUT_MS / 1000
+        with self._condition:
+            for row in rows:
+                while len(self._queue) >= settings.ANALYTICS_QUEUE_MAX_EVENTS:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.notify_all()
+                    self._condition.wait(remaining)
+                if len(self._queue) >= settings.ANALYTICS_QUEUE_MAX_EVENTS:
+                    self._stats["dropped"] += 1
+                    continue
+                self._queue.append(row)
+                self._add_pending([row], 1)
+                accepted += 1
+            self._stats["enqueued"] += accepted
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+            if len(self._queue) >= settings.ANALYTICS_FLUSH_MAX_EVENTS:
+                self._condition.notify_all()
+        if accepted < len(rows):
+            logger.warning("Analytics queue full, dropped %d events", len(rows) - accepted)
+        return accepted
+
+    def _append_to_spool(self, rows: List[QueuedEvent]) -> bool:
+        try:
+            self.spool.append([encode_event(row) for row in rows])
+        except (OSError, ValueError):
+            logger.exception("Analytics spool append failed, queueing %d events in memory", len(rows))
+            return False
+        with self._condition:
+            self._add_pending(rows, 1)
+            self._stats["enqueued"] += len(rows)
+            self._stats["spooled"] += len(rows)
+            self._spooled_since_load += len(rows)
+            if self._spooled_since_load >= settings.ANALYTICS_FLUSH_MAX_EVENTS:
+                self._condition.notify_all()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write every queued and spooled event now, in batches; returns how many were written
+        """
+        written = self._flush_queue()
+        if self.spool is not None:
+            written += self._load_spool()
+        return written
+
+    def _load_spool(self) -> int:
+        """
+        Write the spooled events in batches, committing the checkpoint after each one
+        Stops at the first failed batch, which is read again by the next flush
+        """
+        written = 0
+        with self._load_lock:
+            while True:
+                with self._condition:
+                    self._spooled_since_load = 0
+                payloads, position = self.spool.read(settings.ANALYTICS_SPOOL_LOAD_BATCH_EVENTS)
+                if not payloads:
+                    # Past a corrupt record or the end of a finished segment
+                    if position != self.spool.checkpoint:
+                        self.spool.commit(position)
+                    return written
+                batch = []
+                for payload in payloads:
+                    try:
+                        batch.append(decode_event(payload))
+                    except (ValueError, KeyError, TypeError):
+                        logger.error("Skipping an undecodable spooled analytics event")
+                        self._stats["dropped"] += 1
+                try:
+                    written += self._write_batch(batch)
+                except Exception as e:
+                    logger.exception("Analytics spool load of %d events failed", len(batch))
+                    self._stats["failed_flushes"] += 1
+                    # While the database is unreachable the events wait in the spool
+                    if isinstance(e, OperationalError):
+                        return written
+                    self._spool_failures += 1
+                    if self._spool_failures < settings.ANALYTICS_FLUSH_MAX_ATTEMPTS:
+                        return written
+                    logger.error("Skipping %d spooled analytics events after repeated failures", len(batch))
+                    self._stats["dropped"] += len(batch)
+                self._spool_failures = 0
+                self.spool.commit(position)
+                self._settle(batch)
+
+    def _flush_queue(self) -> int:
+        written = 0
+        while True:
+            with self._condition:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(len(self._queue), settings.ANALYTICS_FLUSH_MAX_EVENTS))
+                ]
+                self._condition.notify_all()
+            if not batch:
+                return written
+            batch_written = self._write(batch)
+            if batch_written is not None:
+                # Written, or discarded for a missing target
+                self._settle(batch)
+            if batch_written is None:
+                if self._stopping:
+                    continue
+                # The database is failing, leave the retries for the next flush
+                return written
+            written += batch_written
+
+    def _write(self, batch: List[QueuedEvent], requeue: bool = True) -> Optional[int]:
+        """
+        Write a batch in one transaction, returns the number of events written or None
+        if it failed, in which case the batch is queued again for a later flush
+        """
+        try:
+            return self._write_batch(batch)
+        except Exception:
+            logger.exception("Analytics flush of %d events failed", len(batch))
+            self._stats["failed_flushes"] += 1
+            if requeue:
+                self._requeue(batch)
+            else:
+                self._stats["dropped"] += len(batch)
+            return None
+
+    def _write_batch(self, batch: List[QueuedEvent]) -> int:
+        """
+        Write a batch in one transaction, discarding events whose target is gone;
+        returns the number of events written, raises if the transaction failed
+        """
+        started = time.monotonic()
+        with self._flush_lock:
+            db = self.session_factory()
+            try:
+                try:
+                    write_events(db, ((event.kind, event.row) for event in batch))
+                except IntegrityError:
+                    # Usually an event for a lawyer, guide or question deleted since
+                    db.rollback()
+                    kept = _existing_targets(db, batch)
+                    db.rollback()
+                    self._stats["discarded"] += len(batch) - len(kept)
+                    write_events(db, ((event.kind, event.row) for event in kept))
+                    batch = kept
+                self._record_flush(started, len(batch))
+                return len(batch)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    def _requeue(self, batch: List[QueuedEvent]) -> None:
+        retry = [event._replace(attempts=event.attempts + 1) for event in batch]
+        retry = [event for event in retry if event.attempts < settings.ANALYTICS_FLUSH_MAX_ATTEMPTS]
+        with self._condition:
+            room = max(settings.ANALYTICS_QUEUE_MAX_EVENTS - len(self._queue), 0)
+            self._queue.extendleft(reversed(retry[:room]))
+            self._stats["dropped"] += len(batch) - min(len(retry), room)
+            # Events given up on leave the pending counts
+            self._add_pending(batch, -1)
+            self._add_pending(retry[:room], 1)
+
+    def _settle(self, events: List[QueuedEvent]) -> None:
+        """
+        Remove events that left the queue for good from the pending counts
+        """
+        with self._condition:
+            self._add_pending(events, -1)
+
+    def _add_pending(self, events: Iterable[QueuedEvent], delta: int) -> None:
+        # Called with the condition held
+        for event in events:
+            if event.kind not in PENDING_COUNTED_KINDS:
+                continue
+            key = (event.kind, event.row[EVENT_TYPES[event.kind].target_column])
+            self._pending[key] += delta
+            if self._pending[key] <= 0:
+                del self._pending[key]
+
+    def pending_count(self, kind: str, target_id: Any) -> int:
+        """
+        Queued, not yet written events of a PENDING_COUNTED_KINDS kind for one target
+        """
+        with self._condition:
+            return self._pending.get((kind, target_id), 0)
+
+    def pending_counts(self, kind: str, target_ids: Iterable[Any]) -> Dict[Any, int]:
+        """
+        pending_count of several targets, leaving out those with none
+        """
+        with self._condition:
+            counts = {target_id: self._pending.get((kind, target_id), 0) for target_id in target_ids}
+        return {target_id: count for target_id, count in counts.items() if count}
+
+    def _record_flush(self, started: float, written: int) -> None:
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self._stats["flushes"] += 1
+        self._stats["written"] += written
+        self._stats["last_flush_ms"] = round(elapsed_ms, 2)
+        self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 2)
+        self._stats["total_flush_ms"] += elapsed_ms
+
+    def _loop(self) -> None:
+        interval = settings.ANALYTICS_FLUSH_INTERVAL_MS / 1000
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + interval
+                while (
+                    not self._stopping
+                    and len(self._queue) + self._spooled_since_load < settings.ANALYTICS_FLUSH_MAX_EVENTS
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+                if self.spool is not None:
+                    self.spool.sync_if_due()
+            except Exception:
+                logger.exception("Analytics flusher failed")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            depth = len(self._queue)
+        stats = dict(self._stats)
+        flushes = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = round(flushes / stats["flushes"], 2) if stats["flushes"] else 0.0
+        stats["queue_depth"] = depth
+        stats["running"] = self.running
+        spool = self.spool
+        stats["spool"] = spool.stats() if spool is not None else None
+        return stats
+
+
+# Process-wide buffer, started and stopped with the app
+analytics_buffer = EventBuffer()
@@ -0,0 +1,169 @@
+"""
+Monthly partitions of the raw analytics event tables
+
+The raw event tables are partitioned by RANGE (timestamp), one partition per
+calendar month named <table>_pYYYY_MM, plus <table>_default for timestamps outside
+every month partition. Queries filtering on timestamp only read the months they
+cover, and expiring a month is a DROP of its partition instead of a huge DELETE
+and the vacuum after it.
+
+maintain_partitions, run daily by the job runner and by
+scripts/maintain_analytics_partitions.py:
+
+- creates the partitions of the current month and the next
+  ANALYTICS_PARTITION_MONTHS_AHEAD months, moving into them any rows the default
+  partition already holds for those months. The table is locked against inserts
+  from the first partition it creates until its transaction commits, so ingestion
+  into that table waits while rows are moved (the ingestion buffer keeps queuing).
+- when ANALYTICS_RETENTION_MONTHS is set, removes the month partitions older than
+  that many months: dropped, or with ANALYTICS_RETENTION_ARCHIVE detached into the
+  analytics_archive schema, to be dumped and dropped by hand. Rows left in the
+  default partition are not expired.
+
+Rollups and the *_counts totals are kept, so expired months still count in them.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_JOB = "analytics_partitions"
+ARCHIVE_SCHEMA = "analytics_archive"
+
+PARTITIONED_TABLES = (
+    "profile_views",
+    "message_events",
+    "call_events",
+    "profile_impressions",
+    "listing_clicks",
+    "guide_views",
+    "question_views",
+)
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def month_partitions(db: Session, table: str) -> Dict[datetime, str]:
+    """
+    Month partitions currently attached to a table, by first day of the month
+    """
+    pattern = re.compile(rf"^{table}_p(\d{{4}})_(\d{{2}})$")
+    names = db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    ).scalars()
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(db: Session, table: str, month: datetime) -> int:
+    """
+    Create the partition of `table` for `month` (committed by the caller)
+    Returns the number of rows moved into it from the default partition
+    Inserts into `table` wait until the caller's transaction ends
+    """
+    name = partition_name(table, month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_month = "timestamp >= :start AND timestamp < :end"
+    default = f"{table}_default"
+
+    # Block inserts first: a row landing in the default partition after the count
+    # would make CREATE TABLE ... PARTITION OF fail
+    db.execute(text(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+    moved = db.execute(text(f"SELECT count(*) FROM {default} WHERE {in_month}"), bounds).scalar()
+    # The default partition may not hold rows of a new partition's range
+    if moved:
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    db.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+    ))
+    if moved:
+        db.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}"), bounds)
+        db.execute(text(f"DELETE FROM {default} WHERE {in_month}"), bounds)
+        db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    return moved
+
+
+def expire_partition(db: Session, table: str, name: str, archive: bool) -> None:
+    """
+    Drop a month partition, or detach it into the archive schema (committed by the caller)
+    """
+    if archive:
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    else:
+        db.execute(text(f"DROP TABLE {name}"))
+
+
+def maintain_partitions(
+    db: Session,
+    months_ahead: Optional[int] = None,
+    retention_months: Optional[int] = None,
+    archive: Optional[bool] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, List[str]]:
+    """
+    Create upcoming month partitions and expire old ones, one transaction per table
+    Arguments default to the ANALYTICS_PARTITION_* / ANALYTICS_RETENTION_* settings
+    Returns the partitions created, moved into (from the default partition) and expired
+    """
+    summary = {"created": [], "filled_from_default": [], "expired": []}
+    if db.get_bind().dialect.name != "postgresql":
+        return summary
+
+    months_ahead = settings.ANALYTICS_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    retention_months = settings.ANALYTICS_RETENTION_MONTHS if retention_months is None else retention_months
+    archive = settings.ANALYTICS_RETENTION_ARCHIVE if archive is None else archive
+    this_month = month_start(now or datetime.now())
+    # Months before the cutoff are expired; 0 keeps every month
+    cutoff = add_months(this_month, -retention_months) if retention_months > 0 else None
+
+    for table in PARTITIONED_TABLES:
+        partitions = month_partitions(db, table)
+        for offset in range(months_ahead + 1):
+            month = add_months(this_month, offset)
+            if month in partitions:
+                continue
+            moved = create_partition(db, table, month)
+            summary["created"].append(partition_name(table, month))
+            if moved:
+                summary["filled_from_default"].append(partition_name(table, month))
+
+        if cutoff is not None:
+            for month, name in sorted(partitions.items()):
+                if month < cutoff:
+                    expire_partition(db, table, name, archive)
+                    summary["expired"].append(name)
+        db.commit()
+
+    if any(summary.values()):
+        logger.info("Analytics partition maintenance: %s", summary)
+    return summary
@@ -0,0 +1,361 @@
+"""
+Hourly and daily analytics rollups
+
+The rollup job turns the raw event tables into per-bucket counts in
+analytics_rollups_hourly and analytics_rollups_daily, one row per (metric, entity,
+bucket). Time-range questions ("views last 7 days") are then answered from a few
+rollup rows instead of scanning the raw events.
+
+Each run picks up the events inserted since its watermark (created_at, so events
+arriving late with an old timestamp are still counted) and recounts every
+(entity, hour) bucket they fall in from the raw table, then the days containing
+those hours from the hourly rows. Buckets are recounted rather than incremented,
+so runs are idempotent and overlap the previous one by
+ANALYTICS_ROLLUP_OVERLAP_SECONDS to catch events committed after it read them.
+
+Each run also folds the visitors of the view events it picked up into per-day
+HyperLogLog sketches (analytics_visitor_sketches), which merge into the unique
+visitors of any range of days; see unique_visitors. Adding a visitor to a sketch
+twice changes nothing, so the overlap is harmless there too. A visitor is the
+signed-in user, else the anonymous visitor_id sent with the event; views with
+neither are not counted as visitors.
+
+Buckets are in the time zone the event timestamps are stored in.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import String, and_, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.events import notify_tables_committed
+from app.db.repositories import analytics as analytics_repository
+from app.models.analytics import (
+    AnalyticsRollupDaily,
+    AnalyticsRollupHourly,
+    AnalyticsVisitorSketch,
+    CallEvent,
+    GuideView,
+    ListingClick,
+    MessageEvent,
+    ProfileImpression,
+    ProfileView,
+    QuestionView,
+)
+from app.services.jobs import get_watermark, set_watermark
+from app.utils.hyperloglog import HyperLogLog, relative_error
+
+ROLLUP_JOB = "analytics_rollups"
+
+GRANULARITIES = {
+    "hour": (AnalyticsRollupHourly, timedelta(hours=1)),
+    "day": (AnalyticsRollupDaily, timedelta(days=1)),
+}
+
+
+class RollupSource(NamedTuple):
+    """A metric counted from one raw event table"""
+    model: Any
+    entity_column: str
+    # Metric name, or a function of the raw table giving it per row
+    metric: Any
+    # Optional extra condition on the raw table
+    condition: Optional[Callable] = None
+
+
+ROLLUP_SOURCES: List[RollupSource] = [
+    RollupSource(ProfileView, "lawyer_id", "profile_views"),
+    RollupSource(MessageEvent, "lawyer_id", lambda t: func.concat("messages_", t.c.status)),
+    RollupSource(CallEvent, "lawyer_id", "calls"),
+    RollupSource(CallEvent, "lawyer_id", "calls_completed", lambda t: t.c.completed.is_(True)),
+    RollupSource(ProfileImpression, "lawyer_id", "impressions"),
+    RollupSource(ListingClick, "lawyer_id", "clicks"),
+    RollupSource(GuideView, "guide_id", "guide_views"),
+    RollupSource(QuestionView, "question_id", "question_views"),
+]
+
+# View metrics with unique visitor sketches
+VISITOR_SOURCES: List[RollupSource] = [
+    RollupSource(ProfileView, "lawyer_id", "profile_views"),
+    RollupSource(GuideView, "guide_id", "guide_views"),
+    RollupSource(QuestionView, "question_id", "question_views"),
+]
+VISITOR_METRICS = tuple(source.metric for source in VISITOR_SOURCES)
+# Entity-days whose sketches are merged and written per statement
+VISITOR_SKETCH_BATCH_SIZE = 500
+
+LAWYER_METRICS = ("profile_views", "impressions", "clicks", "calls", "calls_completed")
+# Message metrics are "messages_" + the event status ("messages_sent", "messages_read", ...)
+LAWYER_METRIC_PREFIXES = ("messages_",)
+
+
+def is_lawyer_metric(metric: str) -> bool:
+    return metric in LAWYER_METRICS or any(
+        metric.startswith(prefix) and len(metric) > len(prefix) for prefix in LAWYER_METRIC_PREFIXES
+    )
+
+
+def _interval(delta: timedelta):
+    return literal_column(f"interval '{int(delta.total_seconds())} seconds'")
+
+
+def _rollup_hours(db: Session, source: RollupSource, since: Optional[datetime], until: datetime, run_at: datetime) -> None:
+    """
+    Recount the (entity, hour) buckets of `source` that received events in [since, until)
+    """
+    raw = source.model.__table__
+    entity = raw.c[source.entity_column]
+
+    touched_filter = raw.c.created_at < until
+    if since is not None:
+        touched_filter = and_(raw.c.created_at >= since, touched_filter)
+    touched = (
+        select(entity.label("entity_id"), func.date_trunc("hour", raw.c.timestamp).label("bucket_start"))
+        .where(touched_filter)
+        .distinct()
+        .subquery("touched")
+    )
+
+    events = raw.alias("events")
+    bucket = func.date_trunc("hour", events.c.timestamp)
+    group_by = [events.c[source.entity_column], bucket]
+    if callable(source.metric):
+        metric = source.metric(events)
+        group_by.append(metric)
+    else:
+        metric = literal(source.metric)
+    recount = (
+        select(
+            metric.label("metric"),
+            events.c[source.entity_column],
+            bucket,
+            func.count(),
+            literal(run_at),
+        )
+        .select_from(
+            events.join(
+                touched,
+                and_(
+                    events.c[source.entity_column] == touched.c.entity_id,
+                    events.c.timestamp >= touched.c.bucket_start,
+                    events.c.timestamp < touched.c.bucket_start + _interval(timedelta(hours=1)),
+                ),
+            )
+        )
+        .group_by(*group_by)
+    )
+    if source.condition is not None:
+        recount = recount.where(source.condition(events))
+
+    _upsert_buckets(db, AnalyticsRollupHourly, recount)
+
+
+def _rollup_days(db: Session, run_at: datetime) -> None:
+    """
+    Recount the days containing the hourly buckets written by this run
+    """
+    hourly = AnalyticsRollupHourly.__table__
+    touched = (
+        select(
+            hourly.c.metric,
+            hourly.c.entity_id,
+            func.date_trunc("day", hourly.c.bucket_start).label("bucket_start"),
+        )
+        .where(hourly.c.updated_at == run_at)
+        .distinct()
+        .subquery("touched")
+    )
+    hours = hourly.alias("hours")
+    day = func.date_trunc("day", hours.c.bucket_start)
+    recount = (
+        select(hours.c.metric, hours.c.entity_id, day, func.sum(hours.c.count), literal(run_at))
+        .select_from(
+            hours.join(
+                touched,
+                and_(
+                    hours.c.metric == touched.c.metric,
+                    hours.c.entity_id == touched.c.entity_id,
+                    hours.c.bucket_start >= touched.c.bucket_start,
+                    hours.c.bucket_start < touched.c.bucket_start + _interval(timedelta(days=1)),
+                ),
+            )
+        )
+        .group_by(hours.c.metric, hours.c.entity_id, day)
+    )
+    _upsert_buckets(db, AnalyticsRollupDaily, recount)
+
+
+def _upsert_buckets(db: Session, rollup_model, recount) -> None:
+    statement = insert(rollup_model).from_select(
+        ["metric", "entity_id", "bucket_start", "count", "updated_at"], recount
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["metric", "entity_id", "bucket_start"],
+            set_={"count": statement.excluded.count, "updated_at": statement.excluded.updated_at},
+        )
+    )
+
+
+def _update_visitor_sketches(db: Session, source: RollupSource, since: Optional[datetime], until: datetime) -> None:
+    """
+    Add the visitors of the `source` views created in [since, until) to their daily sketches
+    """
+    raw = source.model.__table__
+    entity = raw.c[source.entity_column]
+    day = func.date_trunc("day", raw.c.timestamp)
+    # NULL when the view has neither a user nor a visitor id
+    visitor = func.coalesce(
+        literal("u:") + cast(raw.c.user_id, String), literal("v:") + raw.c.visitor_id
+    )
+
+    window = raw.c.created_at < until
+    if since is not None:
+        window = and_(raw.c.created_at >= since, window)
+    visits = (
+        select(entity, day, visitor)
+        .where(window, visitor.is_not(None))
+        .distinct()
+        .order_by(entity, day)
+        .execution_options(yield_per=10000)
+    )
+
+    pending: Dict[Tuple[UUID, datetime], HyperLogLog] = {}
+    for entity_id, visit_day, visitor_key in db.execute(visits):
+        key = (entity_id, visit_day)
+        if key not in pending:
+            # Rows come ordered by entity and day, so full batches are complete
+            if len(pending) >= VISITOR_SKETCH_BATCH_SIZE:
+                _merge_sketches(db, source.metric, pending, until)
+                pending = {}
+            pending[key] = HyperLogLog()
+        pending[key].add(visitor_key)
+    _merge_sketches(db, source.metric, pending, until)
+
+
+def _merge_sketches(
+    db: Session, metric: str, sketches: Dict[Tuple[UUID, datetime], HyperLogLog], run_at: datetime
+) -> None:
+    """
+    Merge new sketches into the stored ones of the same entity-days and write them back
+    """
+    if not sketches:
+        return
+    stored = analytics_repository.get_visitor_sketches_for_update(db, metric, list(sketches))
+    rows = []
+    for (entity_id, day), sketch in sketches.items():
+        if (entity_id, day) in stored:
+            sketch.merge(HyperLogLog.from_bytes(stored[(entity_id, day)]))
+        rows.append({
+            "metric": metric,
+            "entity_id": entity_id,
+            "day": day,
+            "sketch": sketch.to_bytes(),
+            "updated_at": run_at,
+        })
+    statement = insert(AnalyticsVisitorSketch).values(rows)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["metric", "entity_id", "day"],
+            set_={"sketch": statement.excluded.sketch, "updated_at": statement.excluded.updated_at},
+        )
+    )
+
+
+def rollup_analytics(db: Session, rebuild: bool = False) -> datetime:
+    """
+    Bring the rollups up to date with the raw events, in one transaction
+    Run periodically by the job runner; `rebuild` recounts every bucket from scratch.
+    Returns the new watermark
+    """
+    watermark = None if rebuild else get_watermark(db, ROLLUP_JOB)
+    since = watermark - timedelta(seconds=settings.ANALYTICS_ROLLUP_OVERLAP_SECONDS) if watermark else None
+    # Read in the session time zone, like the stored created_at values; the overlap
+    # absorbs clock differences with the API processes. Also marks this run's rows
+    until = db.execute(select(func.localtimestamp())).scalar()
+
+    for source in ROLLUP_SOURCES:
+        _rollup_hours(db, source, since, until, until)
+    _rollup_days(db, until)
+    for source in VISITOR_SOURCES:
+        _update_visitor_sketches(db, source, since, until)
+
+    set_watermark(db, ROLLUP_JOB, until)
+    db.commit()
+    notify_tables_committed([
+        AnalyticsRollupHourly.__tablename__,
+        AnalyticsRollupDaily.__tablename__,
+        AnalyticsVisitorSketch.__tablename__,
+    ])
+    return until
+
+
+def timeseries(
+    db: Session,
+    metric: str,
+    entity_id: UUID,
+    start: datetime,
+    end: datetime,
+    granularity: str = "day",
+) -> List[Dict]:
+    """
+    Counts of `metric` for one entity per bucket from `start` up to `end` (exclusive),
+    zero-filled; the first bucket is the one containing `start`
+    Raises ValueError for an unknown granularity or too many buckets
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    rollup_model, step = GRANULARITIES[granularity]
+
+    start, end = _naive(start), _naive(end)
+    if end <= start:
+        raise ValueError("`to` must be after `from`")
+    first_bucket = _bucket_start(start, granularity)
+    if (end - first_bucket) / step > settings.ANALYTICS_TIMESERIES_MAX_POINTS:
+        raise ValueError(
+            f"At most {settings.ANALYTICS_TIMESERIES_MAX_POINTS} {granularity}s per time series"
+        )
+    counts = analytics_repository.get_rollup_counts(db, rollup_model, metric, entity_id, first_bucket, end)
+
+    points = []
+    bucket = first_bucket
+    while bucket < end:
+        points.append({"bucket": bucket, "count": counts.get(bucket, 0)})
+        bucket += step
+    return points
+
+
+def unique_visitors(db: Session, metric: str, entity_id: UUID, start: datetime, end: datetime) -> Dict:
+    """
+    Estimated distinct visitors of one entity per day from the day containing `start`
+    up to `end` (exclusive), and over the whole range, as of the last rollup run
+    Estimates have a relative standard error of `relative_error` (about 1.6%)
+    Raises ValueError for a metric without visitor sketches
+    """
+    if metric not in VISITOR_METRICS:
+        raise ValueError(f"No unique visitors for metric: {metric}")
+    first_day = _bucket_start(_naive(start), "day")
+    sketches = analytics_repository.get_visitor_sketches(db, metric, entity_id, first_day, _naive(end))
+
+    by_day = {}
+    union = HyperLogLog()
+    for day, data in sketches.items():
+        sketch = HyperLogLog.from_bytes(data)
+        by_day[day] = sketch.count()
+        union.merge(sketch)
+    return {"by_day": by_day, "total": union.count(), "relative_error": round(relative_error(), 4)}
+
+
+def _naive(value: datetime) -> datetime:
+    # Event timestamps are stored without a time zone, aware bounds are taken as UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _bucket_start(value: datetime, granularity: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if granularity == "day" else value
@@ -0,0 +1,115 @@
+"""
+Analytics summary of a lawyer profile (GET /analytics/summary)
+
+A summary is built from three statements, all lifetime counters in one UNION ALL
+over the *_counts tables, the position statistics in another and the unique visitor
+sketches of the last 30 days in a third, and cached per lawyer for
+ANALYTICS_SUMMARY_CACHE_TTL_SECONDS. Unique visitors are HyperLogLog estimates
+(relative standard error about 1.6%) as of the last rollup run. The analytics flusher drops the cached
+summaries (and position statistics) of the lawyers in every batch it writes, so a
+summary is never staler than the ingestion buffer itself in this process; other
+processes rely on the TTL.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.repositories import analytics as analytics_repository
+from app.utils.hyperloglog import HyperLogLog, relative_error
+
+_summary_cache = TTLCache(
+    ttl_seconds=settings.ANALYTICS_SUMMARY_CACHE_TTL_SECONDS,
+    max_entries=settings.ANALYTICS_SUMMARY_CACHE_MAX_ENTRIES,
+)
+
+
+def _rate(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total > 0 else 0
+
+
+def _unique_visitors(db: Session, lawyer_id: UUID) -> Dict:
+    """
+    Estimated distinct profile visitors of the last 7 and 30 days, today included
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today - timedelta(days=6)
+    sketches = analytics_repository.get_visitor_sketches(
+        db, "profile_views", lawyer_id, today - timedelta(days=29), today + timedelta(days=1)
+    )
+    week, month = HyperLogLog(), HyperLogLog()
+    for day, data in sketches.items():
+        sketch = HyperLogLog.from_bytes(data)
+        month.merge(sketch)
+        if day >= week_start:
+            week.merge(sketch)
+    return {
+        "last_7_days": week.count(),
+        "last_30_days": month.count(),
+        "relative_error": round(relative_error(), 4),
+    }
+
+
+def build_summary(db: Session, lawyer_id: UUID) -> Dict:
+    """
+    Counts, rates and position data of a lawyer, without the cache
+    """
+    counters = analytics_repository.get_lawyer_counters(db, lawyer_id)
+    positions = analytics_repository.get_position_stats(db, lawyer_id)
+
+    profile_views = counters.get("profile_views", 0)
+    messages_sent = counters.get("messages_sent", 0)
+    calls = counters.get("calls", 0)
+    impressions = counters.get("impressions", 0)
+    clicks = sum(row["clicks"] for row in positions.values())
+
+    return {
+        "counts": {
+            "profile_views": profile_views,
+            "messages_sent": messages_sent,
+            "messages_read": counters.get("messages_read", 0),
+            "calls": calls,
+            "calls_completed": counters.get("calls_completed", 0),
+            "impressions": impressions,
+            "clicks": clicks,
+        },
+        "rates": {
+            "message_rate": _rate(messages_sent, profile_views),
+            "call_rate": _rate(calls, profile_views),
+            "overall_ctr": _rate(clicks, impressions),
+        },
+        "position_data": {
+            "impression_stats": {r: row["impressions"] for r, row in positions.items() if row["impressions"]},
+            "click_stats": {r: row["clicks"] for r, row in positions.items() if row["clicks"]},
+            "ctr_by_position": {r: row["ctr"] for r, row in positions.items() if row["impressions"]},
+        },
+        "unique_visitors": _unique_visitors(db, lawyer_id),
+    }
+
+
+def get_summary(db: Session, lawyer_id: UUID) -> Dict:
+    """
+    Cached build_summary
+    """
+    summary = _summary_cache.get(lawyer_id)
+    if summary is None:
+        summary = build_summary(db, lawyer_id)
+        _summary_cache.set(lawyer_id, summary)
+    return summary
+
+
+def invalidate_lawyers(lawyer_ids: Iterable[UUID]) -> None:
+    """
+    Drop the cached summaries and position statistics of these lawyers
+    """
+    lawyer_ids = list(lawyer_ids)
+    for lawyer_id in lawyer_ids:
+        _summary_cache.delete(lawyer_id)
+    analytics_repository.invalidate_position_stats(lawyer_ids)
+
+
+def clear_summary_cache() -> None:
+    _summary_cache.clear()
@@ -0,0 +1,146 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db.database import SessionLocal
+from app.models.job import JobWatermark
+
+logger = logging.getLogger(__name__)
+
+
+def get_watermark(db: Session, name: str) -> Optional[datetime]:
+    """
+    Last processed position of an incremental job, None if it never ran
+    """
+    watermark = db.query(JobWatermark).filter(JobWatermark.name == name).first()
+    return watermark.value if watermark else None
+
+
+def set_watermark(db: Session, name: str, value: datetime) -> None:
+    """
+    Store the progress of an incremental job (committed by the caller)
+    """
+    watermark = db.query(JobWatermark).filter(JobWatermark.name == name).first()
+    if watermark:
+        watermark.value = value
+    else:
+        db.add(JobWatermark(name=name, value=value))
+
+
+class PeriodicJob:
+    """A function run on a fixed interval with a fresh database session"""
+
+    def __init__(self, name: str, func: Callable[[Session], None], interval_seconds: float):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+        self.failures = 0
+
+
+class JobRunner:
+    """
+    Runs registered jobs in background threads, one thread per job.
+    On PostgreSQL each run holds an advisory lock named after the job, so with several
+    API workers only one of them runs a given job at a time.
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+
+    def register(self, name: str, func: Callable[[Session], None], interval_seconds: float) -> PeriodicJob:
+        job = PeriodicJob(name, func, interval_seconds)
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        self._stop.clear()
+        for name, job in self.jobs.items():
+            if name in self._threads and self._threads[name].is_alive():
+                continue
+            thread = threading.Thread(target=self._loop, args=(job,), name=f"job-{name}", daemon=True)
+            self._threads[name] = thread
+            thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        for thread in self._threads.values():
+            thread.join(timeout)
+        self._threads.clear()
+
+    def run_once(self, name: str) -> bool:
+        """
+        Run a job now in the calling thread, returns False if another worker holds its lock
+        """
+        job = self.jobs[name]
+        engine = self.session_factory.kw["bind"]
+        if engine.dialect.name != "postgresql":
+            self._run(job)
+            return True
+
+        # The lock lives on its own connection so the job's commits cannot release it
+        with engine.connect() as lock_connection:
+            acquired = lock_connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": f"job:{name}"}
+            ).scalar()
+            if not acquired:
+                return False
+            try:
+                self._run(job)
+            finally:
+                lock_connection.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": f"job:{name}"}
+                )
+                lock_connection.commit()
+        return True
+
+    def _run(self, job: PeriodicJob) -> None:
+        db = self.session_factory()
+        try:
+            job.func(db)
+            job.last_error = None
+        except Exception as e:
+            db.rollback()
+            job.failures += 1
+            job.last_error = str(e)
+            raise
+        finally:
+            db.close()
+            job.runs += 1
+            job.last_run_at = datetime.now()
+
+    def _loop(self, job: PeriodicJob) -> None:
+        # Run once on start, then every interval: a worker restarted more often than a
+        # job's interval would otherwise never run it
+        while not self._stop.is_set():
+            try:
+                self.run_once(job.name)
+            except Exception:
+                logger.exception("Background job %s failed", job.name)
+            if self._stop.wait(job.interval_seconds):
+                return
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                "interval_seconds": job.interval_seconds,
+                "runs": job.runs,
+                "failures": job.failures,
+                "last_run_at": job.last_run_at,
+                "last_error": job.last_error,
+            }
+            for name, job in self.jobs.items()
+        }
+
+
+# Process-wide runner, jobs are registered by their services and started with the app
+job_runner = JobRunner()
@@ -0,0 +1,332 @@
+"""
+Precomputed leaderboards of the most viewed lawyers, guides and questions
+
+Each board ranks the entities of one view metric over the last 24 hours (hourly
+rollups), 7 days or 30 days (daily rollups, today included), site-wide and per scope:
+lawyers per practice area, guides per guide category and questions per topic. The
+top LEADERBOARD_SIZE entries of every (board, period, scope) are stored in
+leaderboard_entries, so a read is a primary key range instead of a GROUP BY over
+the raw events.
+
+Scores are time-decayed counts: the views of a bucket weigh
+0.5 ** (age / half_life), where age is measured from the middle of the bucket and
+the half-life is LEADERBOARD_HALF_LIFE_FRACTION of the period, so recent views
+count more ("trending" rather than "most viewed"). A fraction of 0 ranks by plain
+counts. The plain count of the period is stored alongside.
+
+The leaderboard job refreshes boards incrementally, one transaction per run. When
+the rollup job has written rows of a board's metric since the previous run, only
+the rankings those rows can change are recomputed: the site-wide ranking and the
+scopes of the changed entities, for every period (each includes the current
+bucket). Other scopes keep their snapshot: decay scales every bucket of a period
+alike, so their order only goes stale as buckets leave the period. A board older
+than LEADERBOARD_MAX_AGE_SECONDS is rebuilt in full, every period and scope.
+Readers keep seeing the previous snapshot until the new one commits.
+
+Reads are cached per (board, period, scope) for LEADERBOARD_CACHE_TTL_SECONDS and
+dropped when this process commits a rebuild; other processes rely on the TTL.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import Float, String, and_, cast, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.events import notify_tables_committed, on_tables_committed
+from app.models.analytics import AnalyticsRollupDaily, AnalyticsRollupHourly
+from app.models.area import LawyerArea, PracticeArea
+from app.models.guide import Guide, GuideCategory
+from app.models.lawyer import Lawyer
+from app.models.leaderboard import LeaderboardEntry
+from app.models.question import Question
+from app.models.topic import QuestionTopic, Topic
+from app.services.jobs import get_watermark, set_watermark
+
+LEADERBOARD_JOB = "leaderboards"
+ALL_SCOPE = "all"
+
+
+class Period(NamedTuple):
+    length: timedelta
+    rollup_model: Any
+    bucket: timedelta
+
+
+PERIODS: Dict[str, Period] = {
+    "24h": Period(timedelta(hours=24), AnalyticsRollupHourly, timedelta(hours=1)),
+    "7d": Period(timedelta(days=7), AnalyticsRollupDaily, timedelta(days=1)),
+    "30d": Period(timedelta(days=30), AnalyticsRollupDaily, timedelta(days=1)),
+}
+
+
+class Board(NamedTuple):
+    """Top entities of one rollup metric"""
+    metric: str
+    entity_model: Any
+    # Columns returned with each entry
+    fields: tuple
+    # Entities shown on the board, e.g. published guides only
+    visible: Optional[Callable] = None
+    # Scope of the per-scope boards: the entity column and scope column of the table
+    # linking them (possibly the entity table itself), and the scope model
+    scope_entity: Any = None
+    scope_column: Any = None
+    scope_model: Any = None
+
+
+BOARDS: Dict[str, Board] = {
+    "lawyers": Board(
+        "profile_views",
+        Lawyer,
+        ("name", "title", "image_url", "is_verified"),
+        scope_entity=LawyerArea.lawyer_id,
+        scope_column=LawyerArea.area_id,
+        scope_model=PracticeArea,
+    ),
+    "guides": Board(
+        "guide_views",
+        Guide,
+        ("title", "slug", "description"),
+        visible=lambda: Guide.published.is_(True),
+        scope_entity=Guide.id,
+        scope_column=Guide.category_id,
+        scope_model=GuideCategory,
+    ),
+    "questions": Board(
+        "question_views",
+        Question,
+        ("title", "view_count", "created_at"),
+        scope_entity=QuestionTopic.question_id,
+        scope_column=QuestionTopic.topic_id,
+        scope_model=Topic,
+    ),
+}
+
+_cache = TTLCache(
+    ttl_seconds=settings.LEADERBOARD_CACHE_TTL_SECONDS,
+    max_entries=settings.LEADERBOARD_CACHE_MAX_ENTRIES,
+)
+
+
+def _ranked(board: Board, period: Period, now: datetime, scoped: bool, scopes: Optional[Any] = None):
+    """
+    SELECT of the top entries of every scope, of the `scopes` given, or the site-wide
+    one, in the column order of leaderboard_entries after `board` and `period`
+    """
+    rollup = period.rollup_model
+    # The period is made of whole buckets, the current one included
+    current = now.replace(minute=0, second=0, microsecond=0)
+    if period.bucket >= timedelta(days=1):
+        current = current.replace(hour=0)
+    start = current - (period.length - period.bucket)
+
+    half_life = period.length.total_seconds() * settings.LEADERBOARD_HALF_LIFE_FRACTION
+    if half_life > 0:
+        age = func.greatest(
+            func.date_part("epoch", literal(now) - rollup.bucket_start) - period.bucket.total_seconds() / 2, 0
+        )
+        weight = func.exp(-math.log(2) * age / half_life)
+    else:
+        weight = literal(1.0)
+
+    entity = board.entity_model
+    scope = cast(board.scope_column, String) if scoped else literal(ALL_SCOPE)
+    query = (
+        select(
+            rollup.entity_id,
+            scope.label("scope"),
+            func.sum(cast(rollup.count, Float) * weight).label("score"),
+            func.sum(rollup.count).label("count"),
+        )
+        .join(entity, entity.id == rollup.entity_id)
+        .where(rollup.metric == board.metric, rollup.bucket_start >= start)
+        .group_by(rollup.entity_id, *([board.scope_column] if scoped else []))
+    )
+    if board.visible is not None:
+        query = query.where(board.visible())
+    if scoped:
+        if board.scope_entity.table is not entity.__table__:
+            query = query.join(board.scope_entity.table, board.scope_entity == rollup.entity_id)
+        query = query.where(board.scope_column.is_not(None))
+        if scopes is not None:
+            query = query.where(board.scope_column.in_(scopes))
+    scored = query.subquery("scored")
+
+    rank = func.row_number().over(
+        partition_by=scored.c.scope, order_by=(scored.c.score.desc(), scored.c.entity_id)
+    )
+    ranked = select(scored, rank.label("rank")).subquery("ranked")
+    return select(
+        ranked.c.scope, ranked.c.rank, ranked.c.entity_id, ranked.c.score, ranked.c.count, literal(now)
+    ).where(ranked.c.rank <= settings.LEADERBOARD_SIZE)
+
+
+def _board_watermark(name: str) -> str:
+    # Time of the last full rebuild of a board, even one that left it empty
+    return f"{LEADERBOARD_JOB}:{name}"
+
+
+def rebuild_board(db: Session, name: str, now: Optional[datetime] = None, scopes: Optional[List] = None) -> None:
+    """
+    Replace every period and scope of a board with a fresh ranking, or with `scopes`
+    only the site-wide ranking and those scopes (committed by the caller)
+    """
+    board = BOARDS[name]
+    now = now or db.execute(select(func.localtimestamp())).scalar()
+    replaced = delete(LeaderboardEntry).where(LeaderboardEntry.board == name)
+    if scopes is None:
+        set_watermark(db, _board_watermark(name), now)
+    else:
+        replaced = replaced.where(LeaderboardEntry.scope.in_([ALL_SCOPE, *(str(scope) for scope in scopes)]))
+    db.execute(replaced)
+    for period_name, period in PERIODS.items():
+        for scoped in (False, True):
+            if scoped and (board.scope_column is None or scopes == []):
+                continue
+            ranked = _ranked(board, period, now, scoped, scopes)
+            db.execute(
+                insert(LeaderboardEntry).from_select(
+                    ["board", "period", "scope", "rank", "entity_id", "score", "count", "refreshed_at"],
+                    select(literal(name), literal(period_name), *ranked.subquery().c),
+                )
+            )
+
+
+def _changed_scopes(db: Session, board: Board, since: datetime) -> Optional[List]:
+    """
+    Scopes of the entities whose rollups of the board's metric were written since
+    `since`, None if there are no such rollups
+    """
+    changed = select(AnalyticsRollupHourly.entity_id).where(
+        AnalyticsRollupHourly.metric == board.metric, AnalyticsRollupHourly.updated_at >= since
+    )
+    if not db.query(changed.exists()).scalar():
+        return None
+    if board.scope_column is None:
+        return []
+    return list(
+        db.execute(
+            select(board.scope_column)
+            .where(board.scope_entity.in_(changed), board.scope_column.is_not(None))
+            .distinct()
+        ).scalars()
+    )
+
+
+def refresh_leaderboards(db: Session, force: bool = False) -> List[str]:
+    """
+    Refresh the boards whose rollups changed and rebuild those that are too old, run
+    periodically by the job runner; `force` rebuilds all of them. Returns the
+    refreshed boards
+    """
+    now = db.execute(select(func.localtimestamp())).scalar()
+    watermark = get_watermark(db, LEADERBOARD_JOB)
+    # Rollup runs commit after stamping their rows, overlap like the rollups themselves
+    since = watermark - timedelta(seconds=settings.ANALYTICS_ROLLUP_OVERLAP_SECONDS) if watermark else None
+    oldest = now - timedelta(seconds=settings.LEADERBOARD_MAX_AGE_SECONDS)
+
+    rebuilt = []
+    for name, board in BOARDS.items():
+        last = get_watermark(db, _board_watermark(name))
+        if force or since is None or last is None or last < oldest:
+            rebuild_board(db, name, now)
+            rebuilt.append(name)
+            continue
+        scopes = _changed_scopes(db, board, since)
+        if scopes is not None:
+            rebuild_board(db, name, now, scopes)
+            rebuilt.append(name)
+
+    set_watermark(db, LEADERBOARD_JOB, now)
+    db.commit()
+    if rebuilt:
+        notify_tables_committed([LeaderboardEntry.__tablename__])
+    return rebuilt
+
+
+def resolve_scope(db: Session, name: str, scope: str) -> Optional[UUID]:
+    """
+    Id of a board's scope given by id or slug, None if there is no such scope
+    Raises ValueError for a board without scopes
+    """
+    model = BOARDS[name].scope_model
+    if model is None:
+        raise ValueError(f"The {name} leaderboard has no scopes")
+    try:
+        condition = model.id == UUID(scope)
+    except ValueError:
+        condition = model.slug == scope
+    return db.query(model.id).filter(condition).scalar()
+
+
+def get_leaderboard(
+    db: Session, name: str, period: str, scope_id: Optional[UUID] = None, limit: Optional[int] = None
+) -> Dict:
+    """
+    Current snapshot of a board, with the listed fields of each entity, cached
+    Raises ValueError for an unknown board or period
+    """
+    if name not in BOARDS:
+        raise ValueError(f"Unknown leaderboard: {name}")
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    scope = str(scope_id) if scope_id is not None else ALL_SCOPE
+
+    key = (name, period, scope)
+    snapshot = _cache.get(key)
+    if snapshot is None:
+        snapshot = _load_snapshot(db, name, period, scope)
+        _cache.set(key, snapshot)
+    if limit is not None:
+        snapshot = {**snapshot, "entries": snapshot["entries"][:limit]}
+    return snapshot
+
+
+def _load_snapshot(db: Session, name: str, period: str, scope: str) -> Dict:
+    board = BOARDS[name]
+    entity = board.entity_model
+    rows = (
+        db.query(LeaderboardEntry, *(getattr(entity, field) for field in board.fields))
+        .join(entity, entity.id == LeaderboardEntry.entity_id)
+        .filter(
+            and_(
+                LeaderboardEntry.board == name,
+                LeaderboardEntry.period == period,
+                LeaderboardEntry.scope == scope,
+            )
+        )
+        .order_by(LeaderboardEntry.rank)
+        .all()
+    )
+    entries = [
+        {
+            "rank": entry.rank,
+            "id": entry.entity_id,
+            "score": round(entry.score, 3),
+            "count": entry.count,
+            **dict(zip(board.fields, values)),
+        }
+        for entry, *values in rows
+    ]
+    return {
+        "board": name,
+        "metric": board.metric,
+        "period": period,
+        "scope": scope,
+        "refreshed_at": rows[0][0].refreshed_at if rows else None,
+        "entries": entries,
+    }
+
+
+def clear_leaderboard_cache() -> None:
+    _cache.clear()
+
+
+@on_tables_committed
+def _invalidate_on_rebuild(tables) -> None:
+    if LeaderboardEntry.__tablename__ in tables:
+        _cache.clear()
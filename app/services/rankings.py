@@ -0,0 +1,225 @@
+"""
+Precomputed lawyer ranking scores
+
+Each lawyer gets a persisted rating_score (Bayesian-averaged rating, used by
+sort=highest_rating) and ranking_score (used by sort=best_match), plus a
+ranking_score per practice area on lawyer_areas. The ranking score is a weighted
+sum of components normalized to 0..1:
+
+- rating: Bayesian average of the lawyer's reviews, shrunk towards the site-wide mean
+  by RANKING_PRIOR_REVIEWS virtual reviews
+- experience: experience_score of the area (best area for the overall score) / 100
+- verified: 1 for verified lawyers
+- ctr: listing clicks / profile impressions smoothed towards the site-wide CTR, where
+  the site average maps to 0.5
+
+The refresh job only rescores lawyers flagged ranking_stale (reviews, verification,
+area changes) and lawyers whose impression/click counts changed since its watermark.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.events import notify_tables_committed
+from app.models.analytics import ListingClickCount, ProfileImpressionCount
+from app.models.area import LawyerArea
+from app.models.lawyer import Lawyer
+from app.models.review import Review
+from app.services.jobs import get_watermark, set_watermark
+
+RANKING_JOB = "lawyer_rankings"
+
+
+def bayesian_rating(review_count: int, review_average: float, prior_mean: float, prior_weight: float) -> float:
+    """
+    Average rating shrunk towards the prior mean, so a single 5-star review does not
+    outrank many 4.8 ones
+    """
+    if review_count + prior_weight <= 0:
+        return prior_mean
+    return (prior_weight * prior_mean + review_count * review_average) / (prior_weight + review_count)
+
+
+def smoothed_ctr(clicks: int, impressions: int, prior_ctr: float, prior_impressions: float) -> float:
+    if impressions + prior_impressions <= 0:
+        return prior_ctr
+    return (clicks + prior_impressions * prior_ctr) / (impressions + prior_impressions)
+
+
+def ranking_score(rating: float, experience_score: int, is_verified: bool, ctr: float, site_ctr: float) -> float:
+    """
+    Weighted 0..1 ranking score from a lawyer's (already smoothed) rating and CTR
+    """
+    rating_component = min(max((rating - 1) / 4, 0.0), 1.0)
+    experience_component = min(max((experience_score or 0) / 100, 0.0), 1.0)
+    ctr_component = min(ctr / (2 * site_ctr), 1.0) if site_ctr > 0 else 0.0
+    return (
+        settings.RANKING_WEIGHT_RATING * rating_component
+        + settings.RANKING_WEIGHT_EXPERIENCE * experience_component
+        + settings.RANKING_WEIGHT_VERIFIED * (1.0 if is_verified else 0.0)
+        + settings.RANKING_WEIGHT_CTR * ctr_component
+    )
+
+
+def _site_stats(db: Session) -> Dict[str, float]:
+    """
+    Site-wide priors: mean review rating and click-through rate
+    """
+    mean_rating = db.query(func.avg(Review.rating)).scalar()
+    impressions = db.query(func.coalesce(func.sum(ProfileImpressionCount.count), 0)).scalar()
+    clicks = db.query(func.coalesce(func.sum(ListingClickCount.count), 0)).scalar()
+    return {
+        "mean_rating": float(mean_rating) if mean_rating is not None else settings.RANKING_DEFAULT_RATING,
+        "ctr": clicks / impressions if impressions else 0.0,
+    }
+
+
+def recompute_rankings(db: Session, lawyer_ids: Iterable[UUID], site_stats: Optional[Dict] = None) -> int:
+    """
+    Recompute and store scores for the given lawyers in one transaction
+    Also refreshes review_score/review_count from the reviews table
+    Returns the number of lawyers updated
+    """
+    lawyer_ids = list(lawyer_ids)
+    if not lawyer_ids:
+        return 0
+    site_stats = site_stats or _site_stats(db)
+
+    # Clear the flag first: the row locks make concurrent writers that mark a lawyer stale
+    # wait for this transaction, so their change is either seen here or flags it again
+    lawyers_table = Lawyer.__table__
+    db.execute(
+        update(lawyers_table)
+        .where(lawyers_table.c.id.in_(lawyer_ids))
+        .values(ranking_stale=False, updated_at=lawyers_table.c.updated_at)
+    )
+
+    lawyers = db.query(Lawyer.id, Lawyer.is_verified).filter(Lawyer.id.in_(lawyer_ids)).all()
+    reviews = {
+        lawyer_id: (count, float(average))
+        for lawyer_id, count, average in db.query(
+            Review.lawyer_id, func.count(Review.id), func.avg(Review.rating)
+        ).filter(Review.lawyer_id.in_(lawyer_ids)).group_by(Review.lawyer_id)
+    }
+    impressions = dict(
+        db.query(ProfileImpressionCount.lawyer_id, ProfileImpressionCount.count)
+        .filter(ProfileImpressionCount.lawyer_id.in_(lawyer_ids))
+    )
+    clicks = dict(
+        db.query(ListingClickCount.lawyer_id, ListingClickCount.count)
+        .filter(ListingClickCount.lawyer_id.in_(lawyer_ids))
+    )
+    areas: Dict[UUID, List] = {}
+    for link in db.query(LawyerArea.lawyer_id, LawyerArea.area_id, LawyerArea.experience_score).filter(
+        LawyerArea.lawyer_id.in_(lawyer_ids)
+    ):
+        areas.setdefault(link.lawyer_id, []).append(link)
+
+    now = datetime.now()
+    lawyer_rows, area_rows = [], []
+    for lawyer_id, is_verified in lawyers:
+        review_count, review_average = reviews.get(lawyer_id, (0, 0.0))
+        rating = bayesian_rating(
+            review_count, review_average, site_stats["mean_rating"], settings.RANKING_PRIOR_REVIEWS
+        )
+        ctr = smoothed_ctr(
+            clicks.get(lawyer_id) or 0,
+            impressions.get(lawyer_id) or 0,
+            site_stats["ctr"],
+            settings.RANKING_PRIOR_IMPRESSIONS,
+        )
+        links = areas.get(lawyer_id, [])
+        best_experience = max((link.experience_score or 0 for link in links), default=0)
+
+        lawyer_rows.append({
+            "lawyer_id": lawyer_id,
+            "review_score": review_average,
+            "review_count": review_count,
+            "rating_score": rating,
+            "ranking_score": ranking_score(rating, best_experience, is_verified, ctr, site_stats["ctr"]),
+            "ranking_updated_at": now,
+        })
+        for link in links:
+            area_rows.append({
+                "lawyer_id": lawyer_id,
+                "area_id": link.area_id,
+                "ranking_score": ranking_score(rating, link.experience_score, is_verified, ctr, site_stats["ctr"]),
+            })
+
+    # One executemany per table; scores are not profile edits, so updated_at is kept
+    if lawyer_rows:
+        db.execute(
+            update(lawyers_table)
+            .where(lawyers_table.c.id == bindparam("lawyer_id"))
+            .values(
+                review_score=bindparam("review_score"),
+                review_count=bindparam("review_count"),
+                rating_score=bindparam("rating_score"),
+                ranking_score=bindparam("ranking_score"),
+                ranking_updated_at=bindparam("ranking_updated_at"),
+                updated_at=lawyers_table.c.updated_at,
+            ),
+            lawyer_rows,
+        )
+    if area_rows:
+        db.execute(update(LawyerArea), area_rows)
+    db.commit()
+    # Core statements bypass the ORM flush hooks, tell the caches about the new scores
+    notify_tables_committed(["lawyers", "lawyer_areas"])
+    return len(lawyer_rows)
+
+
+def _changed_lawyer_ids(db: Session, since: Optional[datetime]) -> Set[UUID]:
+    """
+    Lawyers flagged stale plus those whose impression or click counts changed since `since`
+    """
+    lawyer_ids = {lawyer_id for (lawyer_id,) in db.query(Lawyer.id).filter(Lawyer.ranking_stale.is_(True))}
+    for count_model in (ProfileImpressionCount, ListingClickCount):
+        query = db.query(count_model.lawyer_id)
+        if since is not None:
+            query = query.filter(count_model.updated_at >= since)
+        lawyer_ids.update(lawyer_id for (lawyer_id,) in query)
+    return lawyer_ids
+
+
+def refresh_stale_rankings(db: Session) -> int:
+    """
+    Incremental ranking refresh, run periodically by the job runner
+    Returns the number of lawyers rescored
+    """
+    started_at = datetime.now()
+    watermark = get_watermark(db, RANKING_JOB)
+    # Overlap with the previous run so counters committed late (or on a skewed clock) are not missed
+    since = watermark - timedelta(seconds=settings.RANKING_WATERMARK_OVERLAP_SECONDS) if watermark else None
+
+    lawyer_ids = list(_changed_lawyer_ids(db, since))
+    site_stats = _site_stats(db)
+    db.rollback()
+
+    updated = 0
+    batch_size = settings.RANKING_BATCH_SIZE
+    for start in range(0, len(lawyer_ids), batch_size):
+        updated += recompute_rankings(db, lawyer_ids[start:start + batch_size], site_stats)
+
+    set_watermark(db, RANKING_JOB, started_at)
+    db.commit()
+    return updated
+
+
+def recompute_all_rankings(db: Session) -> int:
+    """
+    Rescore every lawyer, e.g. after changing the weights
+    """
+    lawyer_ids = [lawyer_id for (lawyer_id,) in db.query(Lawyer.id)]
+    site_stats = _site_stats(db)
+    db.rollback()
+
+    updated = 0
+    batch_size = settings.RANKING_BATCH_SIZE
+    for start in range(0, len(lawyer_ids), batch_size):
+        updated += recompute_rankings(db, lawyer_ids[start:start + batch_size], site_stats)
+    return updated
@@ -0,0 +1,165 @@
+"""
+Federated search behind GET /search
+
+Each section (lawyers, guides, questions, topics) runs on its own session in a
+process-wide thread pool of SEARCH_MAX_WORKERS threads, so one request costs the
+slowest section rather than the sum of them. Sections still running when the time
+budget runs out are reported as timed out and the rest is returned; their
+statement_timeout is set to the remaining budget, so the database stops them too.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.repositories import lawyers as lawyers_repository
+from app.db.repositories import search as search_repository
+from app.services.analytics_ingestion import analytics_buffer
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def _lawyers_section(db: Session, query: str, limit: int) -> Dict:
+    lawyers, total, page_info = lawyers_repository.search_lawyers(db, query=query, limit=limit)
+    return {"items": lawyers, "has_more": page_info["next_cursor"] is not None, "total": total}
+
+
+def _guides_section(db: Session, query: str, limit: int) -> Dict:
+    guides, has_more = search_repository.search_guides(db, query, limit)
+    items = [
+        {"id": guide.id, "title": guide.title, "slug": guide.slug, "description": guide.description}
+        for guide in guides
+    ]
+    return {"items": items, "has_more": has_more}
+
+
+def _questions_section(db: Session, query: str, limit: int) -> Dict:
+    questions, has_more = search_repository.search_questions(db, query, limit)
+    pending_views = analytics_buffer.pending_counts("question_view", [question.id for question in questions])
+    items = [
+        {
+            "id": question.id,
+            "title": question.title,
+            "view_count": (question.view_count or 0) + pending_views.get(question.id, 0),
+            "created_at": question.created_at,
+        }
+        for question in questions
+    ]
+    return {"items": items, "has_more": has_more}
+
+
+def _topics_section(db: Session, query: str, limit: int) -> Dict:
+    topics, has_more = search_repository.search_topics(db, query, limit)
+    items = [{"id": topic.id, "name": topic.name, "slug": topic.slug} for topic in topics]
+    return {"items": items, "has_more": has_more}
+
+
+SECTIONS: Dict[str, Callable[[Session, str, int], Dict]] = {
+    "lawyers": _lawyers_section,
+    "guides": _guides_section,
+    "questions": _questions_section,
+    "topics": _topics_section,
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.SEARCH_MAX_WORKERS, thread_name_prefix="search")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _run_section(engine: Engine, section: str, query: str, limit: int, deadline: float) -> Dict:
+    """
+    Run one section on its own session, within what is left of the time budget
+    """
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise TimeoutError(f"No time left for {section}")
+
+    db = Session(bind=engine)
+    try:
+        if engine.dialect.name == "postgresql":
+            db.execute(select(func.set_config("statement_timeout", str(remaining_ms), True)))
+        return SECTIONS[section](db, query, limit)
+    except OperationalError as e:
+        if getattr(e.orig, "pgcode", None) == QUERY_CANCELED:
+            raise TimeoutError(f"{section} ran out of time") from e
+        raise
+    finally:
+        db.close()
+
+
+async def federated_search(
+    engine: Engine,
+    query: str,
+    limit: int,
+    sections: Optional[Iterable[str]] = None,
+    budget_ms: Optional[int] = None,
+) -> Dict:
+    """
+    Search every requested section concurrently
+    Each section has a status of "ok", "timeout" or "error", `partial` is set when any
+    section is missing. Raises ValueError for unknown section names.
+    """
+    sections = list(dict.fromkeys(sections)) if sections else list(SECTIONS)
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown search sections: {', '.join(unknown)}")
+
+    budget_ms = budget_ms or settings.SEARCH_TIME_BUDGET_MS
+    started = time.monotonic()
+    deadline = started + budget_ms / 1000
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    tasks = {
+        section: loop.run_in_executor(executor, _run_section, engine, section, query, limit, deadline)
+        for section in sections
+    }
+    await asyncio.wait(tasks.values(), timeout=budget_ms / 1000)
+
+    results = {}
+    for section, task in tasks.items():
+        if not task.done():
+            # Drops it if still queued, a running query is stopped by its statement_timeout
+            task.cancel()
+            results[section] = {"status": "timeout", "items": [], "has_more": False}
+        elif task.exception() is not None:
+            error = task.exception()
+            status = "timeout" if isinstance(error, TimeoutError) else "error"
+            if status == "error":
+                logger.error("Search section %s failed", section, exc_info=error)
+            results[section] = {"status": status, "items": [], "has_more": False}
+        else:
+            results[section] = {"status": "ok", **task.result()}
+
+    return {
+        "query": query,
+        "sections": results,
+        "partial": any(result["status"] != "ok" for result in results.values()),
+        "took_ms": int((time.monotonic() - started) * 1000),
+    }
@@ -0,0 +1,179 @@
+"""
+Result cache for GET /lawyers
+
+Pages are cached by the normalized (area, city, q, sort, skip, limit) of the request,
+in the backend configured by LAWYER_SEARCH_CACHE_URL (see app/core/cache.py). Keyset
+(cursor) pages and per-user listings go straight to the database.
+
+Keys embed a generation number kept in the backend. Committed writes to lawyers,
+areas, reviews or cities bump it, which orphans every cached page at once (they
+expire through their TTL), across all processes sharing a Redis backend.
+
+Backend errors never fail a search: they count as a miss and are logged.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core.cache import CacheBackend, CacheError, create_cache_backend
+from app.core.config import settings
+from app.db.events import on_tables_committed
+from app.db.repositories import lawyers as lawyers_repository
+from app.schemas.lawyer import Lawyer
+from app.utils.slug import slugify
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lawyer_search"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+# Tables whose writes can change a search page
+INVALIDATING_TABLES = {"lawyers", "lawyer_areas", "practice_areas", "reviews", "cities"}
+
+_backend: Optional[CacheBackend] = None
+_backend_configured = False
+_backend_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "errors": 0, "invalidations": 0}
+
+
+class _CachedPage(BaseModel):
+    lawyers: List[Lawyer]
+    total: int
+    page_info: Dict[str, Any]
+
+
+def get_backend() -> Optional[CacheBackend]:
+    global _backend, _backend_configured
+    with _backend_lock:
+        if not _backend_configured:
+            _backend = create_cache_backend(
+                settings.LAWYER_SEARCH_CACHE_URL, max_entries=settings.LAWYER_SEARCH_CACHE_MAX_ENTRIES
+            )
+            _backend_configured = True
+        return _backend
+
+
+def set_backend(backend: Optional[CacheBackend]) -> None:
+    """
+    Replace the configured backend, None disables the cache
+    """
+    global _backend, _backend_configured
+    with _backend_lock:
+        _backend = backend
+        _backend_configured = True
+
+
+def cache_key(
+    generation: int,
+    area_slug: Optional[str],
+    city: Optional[str],
+    query: Optional[str],
+    sort: str,
+    skip: int,
+    limit: int,
+) -> str:
+    """
+    Backend key for a page; filters are normalized the way the search applies them
+    """
+    parts = [
+        (area_slug or "").strip().lower(),
+        slugify(city) if city and city.strip() else "",
+        " ".join((query or "").lower().split()),
+        sort,
+        skip,
+        limit,
+    ]
+    digest = hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+    return f"{KEY_PREFIX}:{generation}:{digest}"
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _generation(backend: CacheBackend) -> int:
+    value = backend.get(GENERATION_KEY)
+    return int(value) if value else 0
+
+
+def search_lawyers(
+    db: Session,
+    area_slug: Optional[str] = None,
+    city: Optional[str] = None,
+    query: Optional[str] = None,
+    sort: str = "best_match",
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[UUID] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], int, Dict[str, Any]]:
+    """
+    lawyers_repository.search_lawyers with cached pages, same arguments and result
+    """
+    backend = get_backend()
+    if backend is None or cursor or user_id:
+        return lawyers_repository.search_lawyers(
+            db, area_slug=area_slug, city=city, query=query, sort=sort,
+            skip=skip, limit=limit, user_id=user_id, cursor=cursor,
+        )
+
+    key = None
+    try:
+        key = cache_key(_generation(backend), area_slug, city, query, sort, skip, limit)
+        cached = backend.get(key)
+    except CacheError as e:
+        _count("errors")
+        logger.warning("Lawyer search cache read failed: %s", e)
+        cached = None
+
+    if cached is not None:
+        _count("hits")
+        page = _CachedPage.model_validate_json(cached)
+        return [lawyer.model_dump() for lawyer in page.lawyers], page.total, page.page_info
+
+    _count("misses")
+    lawyers, total, page_info = lawyers_repository.search_lawyers(
+        db, area_slug=area_slug, city=city, query=query, sort=sort, skip=skip, limit=limit,
+    )
+    if key is not None:
+        ttl = settings.LAWYER_SEARCH_CACHE_TTL_SECONDS if query else settings.LAWYER_SEARCH_CACHE_BROWSE_TTL_SECONDS
+        try:
+            payload = _CachedPage(lawyers=lawyers, total=total, page_info=page_info)
+            backend.set(key, payload.model_dump_json().encode(), ttl)
+        except CacheError as e:
+            _count("errors")
+            logger.warning("Lawyer search cache write failed: %s", e)
+    return lawyers, total, page_info
+
+
+def invalidate_search_cache() -> None:
+    """
+    Orphan every cached page by moving to a new generation
+    """
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        backend.incr(GENERATION_KEY)
+        _count("invalidations")
+    except CacheError as e:
+        _count("errors")
+        logger.warning("Lawyer search cache invalidation failed: %s", e)
+
+
+@on_tables_committed
+def _invalidate_on_write(tables) -> None:
+    if not INVALIDATING_TABLES.isdisjoint(tables):
+        invalidate_search_cache()
+
+
+def stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
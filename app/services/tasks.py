@@ -0,0 +1,281 @@
+"""
+Executor for work deferred past the response
+
+Starlette runs BackgroundTasks and run_in_threadpool calls on the same thread pool
+as synchronous request handlers, so a burst of tracking work (or a slow dedup
+backend) could hold every thread while requests wait. Deferred work goes through
+this executor instead: a fixed pool of TASK_MAX_WORKERS threads of its own,
+fed by a queue bounded at TASK_QUEUE_MAX_TASKS.
+
+- Load shedding: when the queue is full submit() drops the task and returns None,
+  counted as shed; the request it came from is never slowed down. Requests that
+  need a task's result await run() instead, which returns a fallback when shed.
+- Database sessions: a task submitted with with_session=True is called with a
+  session of its own as first argument, closed (rolled back if it failed) when the
+  task returns. Tasks never see the request's session, which get_db has closed by
+  the time they run.
+- Retries: a task failing with a transient database error (OperationalError, or a
+  dropped connection) runs again up to TASK_MAX_ATTEMPTS times, with an exponential
+  backoff from TASK_RETRY_BACKOFF_MS, on a fresh session. Other errors are logged
+  and counted as failures.
+
+While the executor is not running (TASK_EXECUTOR_ENABLED=false, or outside the app
+lifespan) each task runs on a short-lived thread of its own: callers are async
+handlers, which must not run it on the event loop. wait_idle() waits for every
+queued and running task. stats() reports the queue depth, wait and run times,
+retries, failures and shed tasks, per task name too.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class Task(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+    args: tuple
+    with_session: bool
+    future: Future
+    submitted_at: float
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed task may succeed if run again: the database was unreachable or
+    the connection dropped
+    """
+    return isinstance(error, OperationalError) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+
+class TaskExecutor:
+    """
+    Bounded pool of worker threads running deferred tasks
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        self._queue: Deque[Task] = deque()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._busy = 0
+        # Tasks running on threads of their own while the executor is stopped
+        self._detached = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "shed": 0,
+            "max_queue_depth": 0,
+        }
+        self._by_task: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        with self._condition:
+            self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"task-worker-{index}", daemon=True)
+            for index in range(settings.TASK_MAX_WORKERS)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the workers once the queued tasks have run, or after `timeout` seconds;
+        whatever is left is run in the calling thread
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._threads = []
+        while True:
+            with self._condition:
+                if not self._queue:
+                    break
+                task = self._queue.popleft()
+            self._run(task)
+        self.wait_idle(max(deadline - time.monotonic(), 0))
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no task is queued or running, returns False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._queue and not self._busy and not self._detached, timeout
+            )
+
+    def submit(
+        self, name: str, func: Callable[..., Any], *args: Any, with_session: bool = False
+    ) -> Optional[Future]:
+        """
+        Queue func(*args), or func(db, *args) with a session of its own
+        Returns a future of its result, or None if the queue is full and it was shed
+        """
+        task = Task(name, func, args, with_session, Future(), time.monotonic())
+        if not self.running:
+            self._count(name, "submitted")
+            with self._condition:
+                self._detached += 1
+            threading.Thread(target=self._run_detached, args=(task,), name=f"task-{name}", daemon=True).start()
+            return task.future
+
+        with self._condition:
+            if len(self._queue) >= settings.TASK_QUEUE_MAX_TASKS:
+                self._stats["shed"] += 1
+                self._task_stats(name)["shed"] += 1
+                logger.warning("Task queue full, shedding %s", name)
+                return None
+            self._queue.append(task)
+            self._stats["submitted"] += 1
+            self._task_stats(name)["submitted"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+            self._condition.notify_all()
+        return task.future
+
+    async def run(
+        self, name: str, func: Callable[..., Any], *args: Any, shed_result: Any = None, with_session: bool = False
+    ) -> Any:
+        """
+        Run a task whose result the request needs, without blocking the event loop
+        Returns `shed_result` if the task was shed
+        """
+        future = self.submit(name, func, *args, with_session=with_session)
+        if future is None:
+            return shed_result
+        return await asyncio.wrap_future(future)
+
+    def _loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                task = self._queue.popleft()
+                self._busy += 1
+            try:
+                self._run(task)
+            finally:
+                with self._condition:
+                    self._busy -= 1
+                    self._condition.notify_all()
+
+    def _run_detached(self, task: Task) -> None:
+        try:
+            self._run(task)
+        finally:
+            with self._condition:
+                self._detached -= 1
+                self._condition.notify_all()
+
+    def _run(self, task: Task) -> None:
+        if not task.future.set_running_or_notify_cancel():
+            return
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                result = self._call(task)
+            except Exception as e:
+                if is_transient(e) and attempt < settings.TASK_MAX_ATTEMPTS:
+                    logger.warning("Task %s failed (attempt %d), retrying: %s", task.name, attempt, e)
+                    self._count(task.name, "retried")
+                    time.sleep(settings.TASK_RETRY_BACKOFF_MS / 1000 * 2 ** (attempt - 1))
+                    attempt += 1
+                    continue
+                logger.exception("Task %s failed", task.name)
+                self._count(task.name, "failed")
+                self._record_times(task, started)
+                task.future.set_exception(e)
+                return
+            self._count(task.name, "completed")
+            self._record_times(task, started)
+            task.future.set_result(result)
+            return
+
+    def _call(self, task: Task) -> Any:
+        if not task.with_session:
+            return task.func(*task.args)
+        db = self.session_factory()
+        try:
+            return task.func(db, *task.args)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _task_stats(self, name: str) -> Dict[str, float]:
+        # Called with the condition held
+        if name not in self._by_task:
+            self._by_task[name] = {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "retried": 0,
+                "shed": 0,
+                "total_wait_ms": 0.0,
+                "total_run_ms": 0.0,
+                "max_run_ms": 0.0,
+            }
+        return self._by_task[name]
+
+    def _count(self, name: str, counter: str) -> None:
+        with self._condition:
+            self._stats[counter] += 1
+            self._task_stats(name)[counter] += 1
+
+    def _record_times(self, task: Task, started: float) -> None:
+        wait_ms = (started - task.submitted_at) * 1000
+        run_ms = (time.monotonic() - started) * 1000
+        with self._condition:
+            stats = self._task_stats(task.name)
+            stats["total_wait_ms"] += wait_ms
+            stats["total_run_ms"] += run_ms
+            stats["max_run_ms"] = round(max(stats["max_run_ms"], run_ms), 2)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["queue_depth"] = len(self._queue)
+            stats["busy_workers"] = self._busy
+            by_task = {name: dict(task_stats) for name, task_stats in self._by_task.items()}
+        stats["workers"] = len(self._threads)
+        stats["running"] = self.running
+        for task_stats in by_task.values():
+            finished = task_stats["completed"] + task_stats["failed"]
+            wait_ms, run_ms = task_stats.pop("total_wait_ms"), task_stats.pop("total_run_ms")
+            task_stats["avg_wait_ms"] = round(wait_ms / finished, 2) if finished else 0.0
+            task_stats["avg_run_ms"] = round(run_ms / finished, 2) if finished else 0.0
+        stats["tasks"] = by_task
+        return stats
+
+
+# Process-wide executor, started and stopped with the app
+task_executor = TaskExecutor()
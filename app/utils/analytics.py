@@ -1,12 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import BackgroundTasks, Depends
-from sqlalchemy.orm import Session
-
-from app.db.database import get_db
-from app.db.repositories import analytics as analytics_repository
+from app.services import analytics_dedup
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.tasks import task_executor
 from app.schemas.analytics import (
     ProfileViewCreate,
     MessageEventCreate,
@@ -16,32 +14,28 @@ from app.schemas.analytics import (
     GuideViewCreate,
     QuestionViewCreate,
 )
-from app.models.user import User
 
 
 def track_profile_view_async(
-    background_tasks: BackgroundTasks,
     lawyer_id: UUID,
     user_id: Optional[UUID] = None,
     source: Optional[str] = None,
-    db: Session = None,
+    fingerprint: Optional[str] = None,
 ):
     """
-    Track a profile view asynchronously
+    Track a profile view asynchronously, unless it repeats one inside the dedup window
     """
     view = ProfileViewCreate(
         lawyer_id=lawyer_id, user_id=user_id, source=source, timestamp=datetime.now()
     )
 
-    background_tasks.add_task(analytics_repository.create_profile_view, db, view)
+    task_executor.submit("profile_view", analytics_dedup.enqueue_view, "profile_view", view, fingerprint)
 
 
 def track_message_event_async(
-    background_tasks: BackgroundTasks,
     lawyer_id: UUID,
     status: str,
     user_id: Optional[UUID] = None,
-    db: Session = None,
 ):
     """
     Track a message event asynchronously
@@ -50,15 +44,13 @@ def track_message_event_async(
         lawyer_id=lawyer_id, user_id=user_id, status=status, timestamp=datetime.now()
     )
 
-    background_tasks.add_task(analytics_repository.create_message_event, db, event)
+    task_executor.submit("message_event", analytics_buffer.enqueue, "message_event", event)
 
 
 def track_call_event_async(
-    background_tasks: BackgroundTasks,
     lawyer_id: UUID,
     completed: bool = False,
     user_id: Optional[UUID] = None,
-    db: Session = None,
 ):
     """
     Track a call event asynchronously
@@ -70,18 +62,16 @@ def track_call_event_async(
         timestamp=datetime.now(),
     )
 
-    background_tasks.add_task(analytics_repository.create_call_event, db, event)
+    task_executor.submit("call_event", analytics_buffer.enqueue, "call_event", event)
 
 
 def track_profile_impression_async(
-    background_tasks: BackgroundTasks,
     lawyer_id: UUID,
     search_query: Optional[str] = None,
     area_slug: Optional[str] = None,
     city_slug: Optional[str] = None,
     position: Optional[int] = None,
     user_id: Optional[UUID] = None,
-    db: Session = None,
 ):
     """
     Track a profile impression asynchronously
@@ -96,20 +86,49 @@ def track_profile_impression_async(
         timestamp=datetime.now(),
     )
 
-    background_tasks.add_task(
-        analytics_repository.create_profile_impression, db, impression
-    )
+    task_executor.submit("profile_impression", analytics_buffer.enqueue, "profile_impression", impression)
+
+
+def track_search_impressions_async(
+    lawyer_ids: List[UUID],
+    first_position: int = 1,
+    search_query: Optional[str] = None,
+    area_slug: Optional[str] = None,
+    city_slug: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+):
+    """
+    Track the impressions of a whole results page with a single task
+    Written together: one multi-row insert and one grouped counter upsert, on the
+    ingestion pipeline's own session
+    """
+    timestamp = datetime.now()
+    impressions = [
+        (
+            "profile_impression",
+            ProfileImpressionCreate(
+                lawyer_id=lawyer_id,
+                user_id=user_id,
+                search_query=search_query,
+                area_slug=area_slug,
+                city_slug=city_slug,
+                position=first_position + index,
+                timestamp=timestamp,
+            ),
+        )
+        for index, lawyer_id in enumerate(lawyer_ids)
+    ]
+    if impressions:
+        task_executor.submit("search_impressions", analytics_buffer.enqueue_many, impressions)
 
 
 def track_listing_click_async(
-    background_tasks: BackgroundTasks,
     lawyer_id: UUID,
     search_query: Optional[str] = None,
     area_slug: Optional[str] = None,
     city_slug: Optional[str] = None,
     position: Optional[int] = None,
     user_id: Optional[UUID] = None,
-    db: Session = None
 ):
     """
     Track a listing click asynchronously
@@ -124,34 +143,32 @@ def track_listing_click_async(
         timestamp=datetime.now()
     )
     
-    background_tasks.add_task(analytics_repository.create_listing_click, db, click)
+    task_executor.submit("listing_click", analytics_buffer.enqueue, "listing_click", click)
 
 
 def track_guide_view_async(
-    background_tasks: BackgroundTasks,
     guide_id: UUID,
     user_id: Optional[UUID] = None,
-    db: Session = None,
+    fingerprint: Optional[str] = None,
 ):
     """
-    Track a guide view asynchronously
+    Track a guide view asynchronously, unless it repeats one inside the dedup window
     """
     view = GuideViewCreate(guide_id=guide_id, user_id=user_id, timestamp=datetime.now())
 
-    background_tasks.add_task(analytics_repository.create_guide_view, db, view)
+    task_executor.submit("guide_view", analytics_dedup.enqueue_view, "guide_view", view, fingerprint)
 
 
 def track_question_view_async(
-    background_tasks: BackgroundTasks,
     question_id: UUID,
     user_id: Optional[UUID] = None,
-    db: Session = None,
+    fingerprint: Optional[str] = None,
 ):
     """
-    Track a question view asynchronously
+    Track a question view asynchronously, unless it repeats one inside the dedup window
     """
     view = QuestionViewCreate(
         question_id=question_id, user_id=user_id, timestamp=datetime.now()
     )
 
-    background_tasks.add_task(analytics_repository.create_question_view, db, view)
+    task_executor.submit("question_view", analytics_dedup.enqueue_view, "question_view", view, fingerprint)
@@ -0,0 +1,85 @@
+"""
+HyperLogLog cardinality sketches
+
+A sketch estimates how many distinct values were added to it in a fixed amount of
+memory, and sketches of different sets merge into the sketch of their union. With
+2**precision registers the relative standard error is 1.04 / sqrt(2**precision):
+1.63% at the default precision of 12, so about 95% of estimates fall within 3.3% of
+the true count. Small cardinalities are estimated by linear counting and are
+close to exact.
+
+Serialized sketches are one precision byte followed by the zlib-compressed
+registers; a sketch of a few visitors takes a few dozen bytes.
+"""
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+DEFAULT_PRECISION = 12
+
+
+def relative_error(precision: int = DEFAULT_PRECISION) -> float:
+    """
+    Relative standard error of the estimates of a sketch with this precision
+    """
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count estimator over string values
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, registers: Optional[bytes] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is not None and len(registers) != self.size:
+            raise ValueError("Register count does not match the precision")
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.size)
+
+    def add(self, value: str) -> None:
+        hashed = _hash(value)
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1 bit in the remaining 64 - precision bits
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        Fold another sketch into this one, which then describes the union of both sets
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """
+        Estimated number of distinct values added
+        """
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(self.size, 0.7213 / (1 + 1.079 / self.size))
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(precision=data[0], registers=zlib.decompress(data[1:]))
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import and_, false, or_, tuple_
+
+
+class SortKey(NamedTuple):
+    """
+    One column (or expression) of a keyset ordering.
+    Nullable keys always sort their NULLs last.
+    """
+    expression: Any
+    descending: bool = False
+    nullable: bool = False
+
+
+class Cursor(NamedTuple):
+    """
+    Decoded pagination cursor
+    """
+    sort: str
+    forward: bool
+    values: List[Any]
+    offset: int
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"d": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"u": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "d" in value:
+            return datetime.fromisoformat(value["d"])
+        if "u" in value:
+            return UUID(value["u"])
+        raise ValueError("Invalid cursor value")
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence[Any], forward: bool, offset: int) -> str:
+    """
+    Build an opaque cursor from the sort keys of a boundary row.
+    `offset` is the position of the first row of the page the cursor points to.
+    """
+    payload = {
+        "s": sort,
+        "f": forward,
+        "v": [_encode_value(value) for value in values],
+        "o": offset,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode a cursor built by encode_cursor, raising ValueError if it is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return Cursor(
+            sort=str(payload["s"]),
+            forward=bool(payload["f"]),
+            values=[_decode_value(value) for value in payload["v"]],
+            offset=max(int(payload["o"]), 0),
+        )
+    except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _after(key: SortKey, value: Any):
+    """
+    Rows strictly after `value` in the key's order
+    """
+    if value is None:
+        # NULLs sort last, nothing comes after them
+        return false()
+    condition = key.expression < value if key.descending else key.expression > value
+    if key.nullable:
+        condition = or_(condition, key.expression.is_(None))
+    return condition
+
+
+def _before(key: SortKey, value: Any):
+    """
+    Rows strictly before `value` in the key's order
+    """
+    if value is None:
+        return key.expression.isnot(None)
+    return key.expression > value if key.descending else key.expression < value
+
+
+def _equal(key: SortKey, value: Any):
+    if value is None:
+        return key.expression.is_(None)
+    return key.expression == value
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any], forward: bool = True):
+    """
+    Filter for the rows after (or before, when going backwards) the row with `values`.
+    Uses a row comparison when all keys sort the same way, otherwise expands to
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... so mixed directions work.
+    """
+    if len(keys) != len(values):
+        raise ValueError("Invalid cursor")
+
+    # Same direction everywhere: a row comparison, which an index on the keys can seek to
+    directions = {key.descending for key in keys}
+    if len(directions) == 1 and not any(key.nullable for key in keys) and None not in values:
+        row, boundary = tuple_(*[key.expression for key in keys]), tuple_(*values)
+        return row < boundary if directions.pop() == forward else row > boundary
+
+    compare = _after if forward else _before
+    clauses = []
+    for index, key in enumerate(keys):
+        equal_prefix = [_equal(k, v) for k, v in zip(keys[:index], values[:index])]
+        clauses.append(and_(*equal_prefix, compare(key, values[index])))
+    return or_(*clauses)
+
+
+def keyset_order(keys: Sequence[SortKey], forward: bool = True) -> list:
+    """
+    ORDER BY clauses for the keys; reversed when paging backwards
+    """
+    clauses = []
+    for key in keys:
+        descending = key.descending != (not forward)
+        clause = key.expression.desc() if descending else key.expression.asc()
+        if key.nullable:
+            clause = clause.nulls_last() if forward else clause.nulls_first()
+        clauses.append(clause)
+    return clauses
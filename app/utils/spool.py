@@ -0,0 +1,275 @@
+"""
+Append-only on-disk spool of byte records (a small write-ahead log)
+
+A spool is a directory of numbered segment files. Each record is stored as a 4-byte
+length, a 4-byte CRC32 of the payload and the payload itself, all big-endian.
+Writers append to the newest segment and start a new one once it reaches
+`segment_bytes`. A reader consumes records in order from a checkpoint (segment,
+offset) that is only moved by commit(), once the records read have been processed,
+so after a crash the uncommitted records are read again. Consumed segments are
+deleted on commit.
+
+Durability follows the fsync policy:
+
+- "always": every append is fsynced before it returns
+- "interval": appends are fsynced at most every `fsync_interval` seconds (and by
+  sync_if_due()), a crash of the machine can lose that much
+- "never": the operating system decides; a crash of the process loses nothing, one
+  of the machine can
+
+A record cut short by a crash (or failing its CRC) ends its segment: the reader
+counts it as corrupt and moves on to the next segment. Writers never append to a
+segment left by a previous process, they start a new one.
+
+Several processes can share a base directory: open_slot() gives each its own
+numbered slot, locked with flock for as long as the spool is open. A process taking
+over a slot after a crash drains what the previous owner left there.
+"""
+import fcntl
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HEADER = struct.Struct(">II")
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT_FILE = "checkpoint"
+LOCK_FILE = "lock"
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# (segment number, byte offset in it)
+Position = Tuple[int, int]
+
+
+class Spool:
+    """
+    Segmented append-only record log with a committed read checkpoint
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._file = None
+        self._segment = 0
+        self._size = 0
+        self._last_fsync = time.monotonic()
+        self._checkpoint: Position = (0, 0)
+        self._stats = {"appended": 0, "committed": 0, "corrupt": 0, "segments_rotated": 0}
+
+    @classmethod
+    def open_slot(cls, base_directory: str, **options) -> "Spool":
+        """
+        Open the first slot of `base_directory` not held by another process
+        """
+        base = Path(base_directory)
+        base.mkdir(parents=True, exist_ok=True)
+        slot = 0
+        while True:
+            spool = cls(str(base / f"slot-{slot}"), **options)
+            if spool.open(blocking=False):
+                return spool
+            slot += 1
+
+    def open(self, blocking: bool = True) -> bool:
+        """
+        Lock the directory and start a new segment; False if another process holds it
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.directory / LOCK_FILE, "a+b")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+
+        segments = self._segments()
+        self._checkpoint = self._read_checkpoint() or ((segments[0], 0) if segments else (0, 0))
+        self._open_segment(segments[-1] + 1 if segments else max(self._checkpoint[0], 1))
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                if self.fsync != "never":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def append(self, payloads: List[bytes]) -> None:
+        """
+        Append records, durable according to the fsync policy when this returns
+        """
+        data = b"".join(HEADER.pack(len(payload), zlib.crc32(payload)) + payload for payload in payloads)
+        with self._lock:
+            if self._file is None:
+                raise ValueError("Spool is not open")
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+            self._stats["appended"] += len(payloads)
+            now = time.monotonic()
+            if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+            if self._size >= self.segment_bytes:
+                self._rotate()
+
+    def sync_if_due(self) -> None:
+        """
+        fsync the current segment if the "interval" policy is due
+        """
+        with self._lock:
+            if self._file is None or self.fsync != "interval":
+                return
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+
+    def read(self, max_records: int) -> Tuple[List[bytes], Position]:
+        """
+        Up to `max_records` records from the checkpoint on, and the position after them
+        Reading again without a commit returns the same records
+        """
+        with self._lock:
+            active, active_size = self._segment, self._size
+        records: List[bytes] = []
+        segment, offset = self._checkpoint
+        for number in [n for n in self._segments() if n >= segment]:
+            if number != segment:
+                segment, offset = number, 0
+            end = active_size if number == active else None
+            offset = self._read_segment(number, offset, end, records, max_records)
+            if len(records) >= max_records or number == active:
+                break
+        return records, (segment, offset)
+
+    @property
+    def checkpoint(self) -> Position:
+        return self._checkpoint
+
+    def commit(self, position: Position) -> None:
+        """
+        Mark everything before `position` as processed and delete consumed segments
+        """
+        path = self.directory / CHECKPOINT_FILE
+        temporary = path.with_suffix(".tmp")
+        with open(temporary, "w") as checkpoint:
+            json.dump({"segment": position[0], "offset": position[1]}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temporary, path)
+        self._fsync_directory()
+        self._checkpoint = position
+        self._stats["committed"] += 1
+        for number in self._segments():
+            if number < position[0]:
+                (self.directory / f"{number:016d}{SEGMENT_SUFFIX}").unlink(missing_ok=True)
+
+    def backlog_bytes(self) -> int:
+        """
+        Bytes appended and not committed yet
+        """
+        with self._lock:
+            active, active_size = self._segment, self._size
+        segment, offset = self._checkpoint
+        total = 0
+        for number in self._segments():
+            if number < segment:
+                continue
+            size = active_size if number == active else self._segment_path(number).stat().st_size
+            total += size - (offset if number == segment else 0)
+        return max(total, 0)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "directory": str(self.directory),
+            "segments": len(self._segments()),
+            "backlog_bytes": self.backlog_bytes(),
+        }
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(path.stem) for path in self.directory.glob(f"*{SEGMENT_SUFFIX}") if path.stem.isdigit()
+        )
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{number:016d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self, number: int) -> None:
+        self._segment = number
+        self._file = open(self._segment_path(number), "ab")
+        self._size = self._file.tell()
+        self._fsync_directory()
+
+    def _rotate(self) -> None:
+        # Called with the lock held
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._stats["segments_rotated"] += 1
+        self._open_segment(self._segment + 1)
+
+    def _read_segment(
+        self, number: int, offset: int, end: Optional[int], records: List[bytes], max_records: int
+    ) -> int:
+        """
+        Append the records of one segment from `offset` to `records`, returns the offset reached
+        """
+        with open(self._segment_path(number), "rb") as segment:
+            segment.seek(offset)
+            while len(records) < max_records and (end is None or offset < end):
+                header = segment.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    if header:
+                        self._stats["corrupt"] += 1
+                    break
+                length, checksum = HEADER.unpack(header)
+                payload = segment.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    # Torn write at the end of a segment left by a crash
+                    self._stats["corrupt"] += 1
+                    return os.fstat(segment.fileno()).st_size
+                records.append(payload)
+                offset += HEADER.size + length
+        return offset
+
+    def _read_checkpoint(self) -> Optional[Position]:
+        try:
+            with open(self.directory / CHECKPOINT_FILE) as checkpoint:
+                data = json.load(checkpoint)
+            return data["segment"], data["offset"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _fsync_directory(self) -> None:
+        if self.fsync == "never":
+            return
+        descriptor = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
@@ -1,12 +1,49 @@
 # tests/conftest.py
+import os
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
 import pytest
+from alembic import command
+from alembic.config import Config as AlembicConfig
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker, close_all_sessions
 from sqlalchemy.pool import StaticPool
 
-from app.db.database import Base, get_db
+# Background jobs would run against the application database, tests drive them directly
+os.environ.setdefault("BACKGROUND_JOBS_ENABLED", "false")
+# Deferred tasks run on threads of their own, the test client waits for them
+os.environ.setdefault("TASK_EXECUTOR_ENABLED", "false")
+
+from app.core.config import settings
+from app.db.counts import clear_counts
+from app.db.database import Base, get_db, get_engine
+from app.db.repositories import analytics as analytics_repository
+from app.db.repositories import lawyers as lawyers_repository
+from app.db.repositories import search as search_repository
 from app.main import app
+from app.models import Guide, Lawyer
+from app.services import analytics_dedup, analytics_summary, leaderboards, search_cache
+from app.services.analytics_ingestion import EventBuffer, analytics_buffer
+from app.services.tasks import task_executor
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+class DeferringTestClient(TestClient):
+    """
+    Test client whose requests return once the tasks they deferred have run, so
+    tracked events are already in the analytics buffer
+    """
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        task_executor.wait_idle(timeout=10)
+        return response
 
 
 @pytest.fixture
@@ -35,19 +72,237 @@ def test_db():
             db.close()
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_engine] = lambda: engine
+    # Queued analytics events are written through their own sessions
+    analytics_buffer.session_factory = TestingSessionLocal
     
     yield TestingSessionLocal
 
+    analytics_dedup.reset_backend()
+
 
 @pytest.fixture
 def client(test_db):
     """
     Create a test client for FastAPI
     """
-    with TestClient(app) as client:
+    with DeferringTestClient(app) as client:
         yield client
 
 
+@pytest.fixture(scope="session")
+def pg_engine():
+    """
+    Create a PostgreSQL test database for tests that rely on Postgres features
+    The schema is built by running the Alembic migrations, so triggers, text search
+    configurations and extensions match production
+    Skipped unless TEST_DATABASE_URL points to a disposable database
+    """
+    database_url = os.getenv("TEST_DATABASE_URL")
+    if not database_url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    engine = create_engine(database_url)
+    _reset_schema(engine)
+
+    # alembic/env.py reads the target database from DATABASE_URL
+    original_url = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = database_url
+    try:
+        command.upgrade(AlembicConfig(str(ROOT_DIR / "alembic.ini")), "head")
+    finally:
+        if original_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = original_url
+
+    yield engine
+
+    # Background tasks may still hold sessions with open transactions
+    close_all_sessions()
+    _reset_schema(engine)
+    engine.dispose()
+
+
+def _reset_schema(engine):
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+
+
+def _truncate_tables(engine):
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest.fixture
+def pg_db(pg_engine):
+    """
+    Session factory bound to the PostgreSQL test database
+    """
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)
+
+    # Dependency override
+    def override_get_db():
+        try:
+            db = TestingSessionLocal()
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_engine] = lambda: pg_engine
+    analytics_buffer.session_factory = TestingSessionLocal
+
+    yield TestingSessionLocal
+
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_engine, None)
+    close_all_sessions()
+    _truncate_tables(pg_engine)
+    # TRUNCATE bypasses the ORM write hooks that invalidate cached totals
+    clear_counts()
+    lawyers_repository._facets_cache.clear()
+    search_repository.clear_suggestion_cache()
+    analytics_repository.clear_position_stats_cache()
+    analytics_summary.clear_summary_cache()
+    leaderboards.clear_leaderboard_cache()
+    search_cache.invalidate_search_cache()
+    analytics_dedup.reset_backend()
+
+
+@pytest.fixture
+def pg_client(pg_db):
+    """
+    Create a test client for FastAPI backed by PostgreSQL
+    """
+    with DeferringTestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def lawyer_id(pg_db):
+    """
+    Id of a lawyer created in the PostgreSQL test database, for tests tracking events
+    """
+    db = pg_db()
+    lawyer = Lawyer(name="Abogada Medida", email="medida@example.com")
+    db.add(lawyer)
+    db.commit()
+    lawyer_id = lawyer.id
+    db.close()
+    return lawyer_id
+
+
+@contextmanager
+def capture_queries(engine):
+    """
+    Collect every SQL statement executed on the engine
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def buffer(pg_db, monkeypatch):
+    """
+    A started buffer that only flushes when told to (or when full)
+    """
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_INTERVAL_MS", 60000)
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_MAX_EVENTS", 1000)
+    event_buffer = EventBuffer(session_factory=pg_db)
+    event_buffer.start()
+    yield event_buffer
+    event_buffer.stop()
+
+
+def seed_targets(session_factory):
+    db = session_factory()
+    lawyers = [Lawyer(name=f"Abogado {i}", email=f"ingest{i}@example.com") for i in range(2)]
+    guide = Guide(title="Guía", slug="guia", published=True)
+    db.add_all(lawyers + [guide])
+    db.commit()
+    ids = [lawyer.id for lawyer in lawyers], guide.id
+    db.close()
+    return ids
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """
+    In-process stand-in for a Redis server, speaking just enough RESP for the cache
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RespHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            self.wfile.write(self.execute(args[0].upper(), args[1:]))
+
+    def execute(self, command, args):
+        data, now = self.server.data, time.monotonic()
+        with self.server.lock:
+            if command == b"GET":
+                value, expires_at = data.get(args[0], (None, None))
+                if value is None or (expires_at and expires_at <= now):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == b"SET":
+                options = [arg.upper() for arg in args[2:]]
+                _, current_expiry = data.get(args[0], (None, None))
+                live = args[0] in data and not (current_expiry and current_expiry <= now)
+                if b"NX" in options and live:
+                    return b"$-1\r\n"
+                expires_at = now + int(args[3]) / 1000 if b"PX" in options else None
+                data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if command == b"INCR":
+                value = int(data.get(args[0], (b"0", None))[0]) + 1
+                data[args[0]] = (str(value).encode(), None)
+                return b":%d\r\n" % value
+            if command == b"DEL":
+                return b":%d\r\n" % (1 if data.pop(args[0], None) else 0)
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 # tests/test_health.py
 def test_health_check(client):
     """
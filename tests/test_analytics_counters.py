@@ -0,0 +1,77 @@
+import threading
+from datetime import datetime
+
+from app.db.repositories import analytics as analytics_repository
+from app.models.analytics import CallEventCount, ProfileView, ProfileViewCount
+from app.schemas.analytics import CallEventCreate, ProfileViewCreate
+
+WORKERS = 8
+EVENTS_PER_WORKER = 25
+
+
+def run_concurrently(session_factory, record):
+    """
+    Call record(db, i) EVENTS_PER_WORKER times from each of WORKERS threads, each
+    thread with its own session, all starting together; returns the errors raised
+    """
+    start = threading.Barrier(WORKERS)
+    errors = []
+
+    def worker():
+        db = session_factory()
+        try:
+            start.wait()
+            for i in range(EVENTS_PER_WORKER):
+                record(db, i)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_profile_views_lose_no_increments(pg_db, lawyer_id):
+    """
+    Concurrent first views neither collide on the new counter row nor lose updates
+    """
+
+    errors = run_concurrently(
+        pg_db,
+        lambda db, i: analytics_repository.create_profile_view(
+            db, ProfileViewCreate(lawyer_id=lawyer_id, timestamp=datetime.now())
+        ),
+    )
+
+    assert errors == []
+    db = pg_db()
+    assert db.query(ProfileView).count() == WORKERS * EVENTS_PER_WORKER
+    assert db.query(ProfileViewCount.count).filter(ProfileViewCount.lawyer_id == lawyer_id).scalar() == (
+        WORKERS * EVENTS_PER_WORKER
+    )
+    db.close()
+
+
+def test_concurrent_call_events_keep_both_counters(pg_db, lawyer_id):
+    """
+    The total and completed call counters are incremented together
+    """
+
+    errors = run_concurrently(
+        pg_db,
+        lambda db, i: analytics_repository.create_call_event(
+            db, CallEventCreate(lawyer_id=lawyer_id, completed=i % 5 == 0, timestamp=datetime.now())
+        ),
+    )
+
+    assert errors == []
+    db = pg_db()
+    counts = db.query(CallEventCount).filter(CallEventCount.lawyer_id == lawyer_id).one()
+    assert counts.count == WORKERS * EVENTS_PER_WORKER
+    assert counts.completed_count == WORKERS * EVENTS_PER_WORKER // 5
+    db.close()
@@ -0,0 +1,109 @@
+import json
+
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend
+from app.core.config import settings
+from app.models import Question, User
+from app.models.analytics import GuideView, ProfileView, ProfileViewCount, QuestionView
+from app.services import analytics_dedup
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import seed_targets
+
+TIMESTAMP = "2026-10-18T12:00:00"
+
+
+def profile_view(lawyer_id, **fields):
+    return {"lawyer_id": str(lawyer_id), "timestamp": TIMESTAMP, **fields}
+
+
+def test_repeat_views_inside_the_window_are_not_written(pg_client, pg_db):
+    """
+    Only the first view of a lawyer by each visitor is written; anonymous clients are
+    told apart by their fingerprint
+    """
+    (lawyer_id, _), _ = seed_targets(pg_db)
+    before = pg_client.get("/health/metrics").json()["analytics_dedup"]
+    for _ in range(3):
+        pg_client.post("/analytics/profile-view", json=profile_view(lawyer_id, visitor_id="cookie-a"))
+        pg_client.post("/analytics/profile-view", json=profile_view(lawyer_id, visitor_id="cookie-b"))
+        pg_client.post("/analytics/profile-view", json=profile_view(lawyer_id))
+    pg_client.post(
+        "/analytics/profile-view", json=profile_view(lawyer_id), headers={"User-Agent": "other-browser"}
+    )
+    analytics_buffer.flush()
+
+    db = pg_db()
+    assert db.query(ProfileView).count() == 4
+    assert db.query(ProfileViewCount).one().count == 4
+    db.close()
+
+    stats = pg_client.get("/health/metrics").json()["analytics_dedup"]
+    assert stats["recorded"] - before["recorded"] == 4
+    assert stats["suppressed"] - before["suppressed"] == 6
+    assert stats["suppressed_by_type"]["profile_view"] - before["suppressed_by_type"]["profile_view"] == 6
+
+
+def test_repeat_question_views_do_not_bump_the_view_count(pg_client, pg_db):
+    db = pg_db()
+    user = User(email="cliente@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    question = Question(title="Despido sin finiquito", content="...", user_id=user.id)
+    db.add(question)
+    db.commit()
+    question_id = question.id
+    db.close()
+
+    for _ in range(3):
+        assert pg_client.get(f"/questions/{question_id}").status_code == 200
+    analytics_buffer.flush()
+
+    db = pg_db()
+    assert db.get(Question, question_id).view_count == 1
+    assert db.query(QuestionView).count() == 1
+    db.close()
+
+
+def test_beacon_batch_reports_suppressed_views(pg_client, pg_db):
+    (lawyer_id, _), guide_id = seed_targets(pg_db)
+    guide_view = {"type": "guide_view", "guide_id": str(guide_id), "visitor_id": "cookie-a", "timestamp": TIMESTAMP}
+    impression = {"type": "profile_impression", "lawyer_id": str(lawyer_id), "timestamp": TIMESTAMP}
+    events = [guide_view, guide_view, impression, impression]
+
+    body = pg_client.post("/analytics/events", content=json.dumps(events)).json()
+    assert (body["accepted"], body["suppressed"]) == (3, 1)
+    body = pg_client.post("/analytics/events", content=json.dumps([guide_view])).json()
+    assert (body["accepted"], body["suppressed"]) == (0, 1)
+
+    analytics_buffer.flush()
+    db = pg_db()
+    assert db.query(GuideView).count() == 1
+    db.close()
+
+
+def test_shared_backend_deduplicates_across_workers(resp_server, monkeypatch):
+    """
+    Two workers sharing a Redis backend see each other's windows; a disabled window
+    or an unreachable backend never drops a view
+    """
+    host, port = resp_server.server_address
+    event = {"lawyer_id": "3f1c", "user_id": "u1"}
+    analytics_dedup.set_backend(RedisCacheBackend(host=host, port=port))
+    assert not analytics_dedup.is_repeat_view("profile_view", event)
+    analytics_dedup.set_backend(RedisCacheBackend(host=host, port=port))
+    assert analytics_dedup.is_repeat_view("profile_view", event)
+    assert not analytics_dedup.is_repeat_view("guide_view", {"guide_id": "3f1c", "user_id": "u1"})
+    assert not analytics_dedup.is_repeat_view("listing_click", event)
+
+    monkeypatch.setattr(settings, "ANALYTICS_DEDUP_WINDOW_SECONDS", 0)
+    assert not analytics_dedup.is_repeat_view("profile_view", event)
+    monkeypatch.undo()
+
+    analytics_dedup.set_backend(RedisCacheBackend(host="127.0.0.1", port=1, timeout_seconds=0.1))
+    errors = analytics_dedup.stats()["errors"]
+    assert not analytics_dedup.is_repeat_view("profile_view", event)
+    assert analytics_dedup.stats()["errors"] == errors + 1
+
+    analytics_dedup.set_backend(MemoryCacheBackend())
+    assert not analytics_dedup.is_repeat_view("profile_view", event)
+    assert analytics_dedup.is_repeat_view("profile_view", event)
+    analytics_dedup.reset_backend()
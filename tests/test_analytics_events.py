@@ -0,0 +1,59 @@
+import json
+import uuid
+
+from app.core.config import settings
+from app.models.analytics import GuideView, ListingClick, ProfileImpression, ProfileViewCount
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import capture_queries, seed_targets
+
+TIMESTAMP = "2026-10-18T12:00:00"
+
+
+def test_beacon_batch_validates_targets_once_per_type(pg_client, pg_db, pg_engine):
+    """
+    A text/plain beacon with mixed events checks each entity type with one IN query
+    and writes the valid events together
+    """
+    (first, second), guide_id = seed_targets(pg_db)
+    events = [
+        {"type": "profile_impression", "lawyer_id": str(first), "position": 1, "timestamp": TIMESTAMP},
+        {"type": "profile_impression", "lawyer_id": str(second), "position": 2, "timestamp": TIMESTAMP},
+        {"type": "listing_click", "lawyer_id": str(second), "position": 2, "timestamp": TIMESTAMP},
+        {"type": "guide_view", "guide_id": str(guide_id), "timestamp": TIMESTAMP},
+        {"type": "profile_view", "lawyer_id": str(uuid.uuid4()), "timestamp": TIMESTAMP},
+        {"type": "profile_view", "lawyer_id": "not-a-uuid", "timestamp": TIMESTAMP},
+        {"type": "unknown", "timestamp": TIMESTAMP},
+    ]
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.post(
+            "/analytics/events", content=json.dumps(events), headers={"Content-Type": "text/plain"}
+        )
+    assert response.status_code == 202
+    body = response.json()
+    assert body["accepted"] == 4
+    assert [event["index"] for event in body["rejected"]] == [4, 5, 6]
+    assert body["rejected"][0]["error"] == "Target not found"
+    assert sum(s.startswith("SELECT") and "FROM lawyers" in s for s in statements) == 1
+    assert sum(s.startswith("SELECT") and "FROM guides" in s for s in statements) == 1
+
+    analytics_buffer.flush()
+    db = pg_db()
+    assert db.query(ProfileImpression).count() == 2
+    assert [row.position for row in db.query(ListingClick)] == [2]
+    assert db.query(GuideView).count() == 1
+    assert db.query(ProfileViewCount).count() == 0
+    db.close()
+
+
+def test_beacon_batch_rejects_bad_bodies(pg_client, monkeypatch):
+    """
+    Bodies that are not a list of events, or too many events, fail as a whole
+    """
+    assert pg_client.post("/analytics/events", content="{not json").status_code == 400
+    assert pg_client.post("/analytics/events", json={"type": "profile_view"}).status_code == 400
+    assert pg_client.post("/analytics/events", json={"events": []}).json()["accepted"] == 0
+
+    monkeypatch.setattr(settings, "ANALYTICS_BATCH_MAX_EVENTS", 2)
+    events = [{"type": "guide_view", "guide_id": str(uuid.uuid4()), "timestamp": TIMESTAMP}] * 3
+    assert pg_client.post("/analytics/events", json=events).status_code == 413
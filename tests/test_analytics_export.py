@@ -0,0 +1,84 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from app.core.config import settings
+from app.models import Lawyer
+from app.services import analytics_export
+from tests.test_analytics_summary import lawyer_with_login, track
+
+EXPORT_RANGE = {"from": "2026-10-01T00:00:00", "to": "2026-11-01T00:00:00"}
+
+
+def test_export_streams_csv_and_gzipped_ndjson(pg_client, pg_db):
+    lawyer_id, headers = lawyer_with_login(pg_client, pg_db)
+    track(lawyer_id, "profile_impression", 5, position=3, search_query="despido, injustificado")
+    track(lawyer_id, "listing_click", 1, position=3)
+
+    response = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/export", params={"type": "impressions", **EXPORT_RANGE}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    # The lawyer does not get the ids of the users behind the events
+    assert rows[0] == ["id", "timestamp", "position", "search_query", "area_slug", "city_slug"]
+    assert len(rows) == 6
+    assert rows[1][1:4] == ["2026-10-18T12:00:00", "3", "despido, injustificado"]
+
+    response = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/export",
+        params={"type": "clicks", "format": "ndjson", "gzip": "true", **EXPORT_RANGE},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert [json.loads(line)["position"] for line in lines] == [3]
+
+    response = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/export",
+        params={"type": "clicks", "from": "2026-11-01T00:00:00", "to": "2026-12-01T00:00:00"},
+        headers=headers,
+    )
+    assert response.text.splitlines() == ["id,timestamp,position,search_query,area_slug,city_slug"]
+
+
+def test_export_is_limited_to_the_lawyer_and_checks_its_parameters(pg_client, pg_db):
+    lawyer_id, headers = lawyer_with_login(pg_client, pg_db)
+    db = pg_db()
+    other = Lawyer(name="Otro Abogado", email="otro@example.com")
+    db.add(other)
+    db.commit()
+    other_id = other.id
+    db.close()
+
+    url = f"/analytics/lawyers/{lawyer_id}/export"
+    assert pg_client.get(
+        f"/analytics/lawyers/{other_id}/export", params={"type": "impressions"}, headers=headers
+    ).status_code == 403
+    assert pg_client.get(url, params={"type": "guide_views"}, headers=headers).status_code == 400
+    assert pg_client.get(url, params={"type": "calls", "format": "xml"}, headers=headers).status_code == 422
+    assert pg_client.get(
+        url, params={"type": "calls", "from": "2026-11-01T00:00:00", "to": "2026-10-01T00:00:00"}, headers=headers
+    ).status_code == 400
+
+
+def test_rows_are_fetched_in_batches(pg_client, pg_db, pg_engine, monkeypatch):
+    lawyer_id, _ = lawyer_with_login(pg_client, pg_db)
+    track(lawyer_id, "message_event", 5, status="sent")
+    monkeypatch.setattr(settings, "ANALYTICS_EXPORT_BATCH_ROWS", 2)
+
+    columns = analytics_export.export_columns("messages", include_identity=True)
+    assert columns == ["id", "timestamp", "status", "user_id"]
+    batches = list(
+        analytics_export.stream_rows(
+            pg_engine, "messages", lawyer_id, *map(datetime.fromisoformat, EXPORT_RANGE.values()), columns
+        )
+    )
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert all(isinstance(row, tuple) and row[2] == "sent" for batch in batches for row in batch)
+
@@ -0,0 +1,134 @@
+import time
+
+from app.core.config import settings
+from app.models import Lawyer
+from app.models.analytics import GuideViewCount, ProfileImpression, ProfileImpressionCount
+from app.main import app
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import DeferringTestClient, capture_queries, seed_targets
+from tests.test_lawyers import seed_lawyers
+
+
+def impression(lawyer_id, position=1):
+    return {"lawyer_id": lawyer_id, "position": position, "timestamp": "2026-10-18T12:00:00"}
+
+
+def test_flush_writes_one_insert_and_one_upsert_per_table(buffer, pg_db, pg_engine):
+    """
+    Queued events are written together: a multi-row INSERT per event table and an
+    aggregated upsert per counter table
+    """
+    (first, second), guide_id = seed_targets(pg_db)
+    for position in range(1, 8):
+        buffer.enqueue("profile_impression", impression(first if position % 2 else second, position))
+    buffer.enqueue_many([("guide_view", {"guide_id": guide_id, "timestamp": "2026-10-18T12:00:00"})] * 3)
+
+    db = pg_db()
+    assert db.query(ProfileImpression).count() == 0
+    db.close()
+
+    with capture_queries(pg_engine) as statements:
+        assert buffer.flush() == 10
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert len(inserts) == 4
+    assert sum("ON CONFLICT" in s for s in inserts) == 2
+
+    db = pg_db()
+    counts = dict(db.query(ProfileImpressionCount.lawyer_id, ProfileImpressionCount.count))
+    assert counts == {first: 4, second: 3}
+    assert db.query(GuideViewCount.count).scalar() == 3
+    db.close()
+
+    stats = buffer.stats()
+    assert stats["written"] == 10
+    assert stats["queue_depth"] == 0
+    assert stats["flushes"] == 1
+
+
+def test_flusher_writes_when_batch_is_full(buffer, pg_db, monkeypatch):
+    """
+    Reaching ANALYTICS_FLUSH_MAX_EVENTS wakes the flusher without waiting for the interval
+    """
+    (lawyer_id, _), _ = seed_targets(pg_db)
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_MAX_EVENTS", 5)
+    buffer.enqueue_many([("profile_impression", impression(lawyer_id))] * 5)
+
+    deadline = time.monotonic() + 5
+    while buffer.stats()["written"] < 5 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert buffer.stats()["written"] == 5
+
+
+def test_full_queue_drops_events(buffer, pg_db, monkeypatch):
+    """
+    Producers are not blocked forever: past the wait, events are dropped and counted
+    """
+    (lawyer_id, _), _ = seed_targets(pg_db)
+    monkeypatch.setattr(settings, "ANALYTICS_QUEUE_MAX_EVENTS", 3)
+    monkeypatch.setattr(settings, "ANALYTICS_ENQUEUE_TIMEOUT_MS", 0)
+
+    accepted = buffer.enqueue_many([("profile_impression", impression(lawyer_id))] * 5)
+
+    assert accepted == 3
+    assert buffer.stats()["dropped"] == 2
+    assert buffer.stats()["queue_depth"] == 3
+
+
+def test_events_for_deleted_targets_do_not_fail_the_batch(buffer, pg_db):
+    """
+    An event whose lawyer was deleted is discarded, the rest of the batch is written
+    """
+    (kept, deleted), _ = seed_targets(pg_db)
+    buffer.enqueue("profile_impression", impression(kept))
+    buffer.enqueue("profile_impression", impression(deleted))
+    db = pg_db()
+    db.query(Lawyer).filter(Lawyer.id == deleted).delete()
+    db.commit()
+    db.close()
+
+    assert buffer.flush() == 1
+    assert buffer.stats()["discarded"] == 1
+    db = pg_db()
+    assert [row.lawyer_id for row in db.query(ProfileImpression)] == [kept]
+    db.close()
+
+
+def test_shutdown_flushes_queued_events(pg_db, monkeypatch):
+    """
+    Events tracked through the API are written at the latest when the app shuts down
+    """
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_INTERVAL_MS", 60000)
+    (lawyer_id, _), _ = seed_targets(pg_db)
+    with DeferringTestClient(app) as client:
+        response = client.post(
+            "/analytics/profile-impression",
+            json={"lawyer_id": str(lawyer_id), "position": 1, "timestamp": "2026-10-18T12:00:00"},
+        )
+        assert response.status_code == 201
+        assert analytics_buffer.stats()["queue_depth"] == 1
+
+    db = pg_db()
+    assert db.query(ProfileImpressionCount.count).filter(ProfileImpressionCount.lawyer_id == lawyer_id).scalar() == 1
+    db.close()
+
+
+def test_search_page_impressions_are_written_in_one_batch(pg_client, pg_db, pg_engine, monkeypatch):
+    """
+    A results page is recorded with one insert and one counter upsert, even unbuffered
+    """
+    monkeypatch.setattr(settings, "ANALYTICS_BUFFER_ENABLED", False)
+    seed_lawyers(pg_db, 6)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get("/lawyers", params={"page": 2, "size": 3, "q": "abogado"})
+    assert response.status_code == 200
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert len(inserts) == 2
+
+    db = pg_db()
+    impressions = db.query(ProfileImpression).order_by(ProfileImpression.position).all()
+    assert [row.position for row in impressions] == [4, 5, 6]
+    assert [str(row.lawyer_id) for row in impressions] == [lawyer["id"] for lawyer in response.json()["lawyers"]]
+    assert {row.search_query for row in impressions} == {"abogado"}
+    assert db.query(ProfileImpressionCount).count() == 3
+    db.close()
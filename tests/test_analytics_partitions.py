@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.services import analytics_partitions
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.analytics_partitions import ARCHIVE_SCHEMA, add_months, maintain_partitions, month_start
+
+
+def impression_partitions(pg_engine):
+    with pg_engine.connect() as connection:
+        return dict(connection.execute(text(
+            "SELECT tableoid::regclass::text, count(*) FROM profile_impressions GROUP BY 1"
+        )).all())
+
+
+def table_exists(pg_engine, name):
+    with pg_engine.connect() as connection:
+        return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def month_partitions(session_factory):
+    db = session_factory()
+    try:
+        return {
+            name
+            for table in analytics_partitions.PARTITIONED_TABLES
+            for name in analytics_partitions.month_partitions(db, table).values()
+        }
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def maintain(pg_db, pg_engine):
+    """
+    Runs maintenance; partitions created by the test and the archive are dropped afterwards
+    """
+    before = month_partitions(pg_db)
+
+    def run(**kwargs):
+        db = pg_db()
+        try:
+            return maintain_partitions(db, **kwargs)
+        finally:
+            db.close()
+
+    yield run
+
+    created = month_partitions(pg_db) - before
+    with pg_engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {ARCHIVE_SCHEMA} CASCADE"))
+        for name in created:
+            connection.execute(text(f"DROP TABLE {name}"))
+
+
+def test_events_are_routed_to_their_month(pg_db, pg_engine, lawyer_id):
+    """
+    The migration creates the current month's partition; far-off timestamps land in the default one
+    """
+    now = datetime.now()
+    analytics_buffer.enqueue_many([
+        ("profile_impression", {"lawyer_id": lawyer_id, "position": 1, "timestamp": now}),
+        ("profile_impression", {"lawyer_id": lawyer_id, "position": 1, "timestamp": datetime(2099, 1, 1)}),
+    ])
+    analytics_buffer.flush()
+
+    assert impression_partitions(pg_engine) == {
+        f"profile_impressions_p{now:%Y_%m}": 1,
+        "profile_impressions_default": 1,
+    }
+
+
+def test_maintenance_creates_months_ahead_and_empties_the_default_partition(
+    pg_db, pg_engine, maintain, lawyer_id
+):
+    far_month = add_months(month_start(datetime.now()), 8)
+    analytics_buffer.enqueue("profile_impression", {"lawyer_id": lawyer_id, "timestamp": far_month})
+    analytics_buffer.flush()
+
+    summary = maintain(months_ahead=8)
+
+    assert f"profile_impressions_p{far_month:%Y_%m}" in summary["created"]
+    assert summary["filled_from_default"] == [f"profile_impressions_p{far_month:%Y_%m}"]
+    assert impression_partitions(pg_engine) == {f"profile_impressions_p{far_month:%Y_%m}": 1}
+    # Nothing left to do on a second run
+    assert maintain(months_ahead=8) == {"created": [], "filled_from_default": [], "expired": []}
+
+
+@pytest.mark.parametrize("archive", [False, True])
+def test_maintenance_expires_old_months(pg_db, pg_engine, maintain, archive, lawyer_id):
+    """
+    Months past the retention are dropped, or detached into the archive schema
+    """
+    now = datetime.now()
+    old_month = add_months(month_start(now), -14)
+    db = pg_db()
+    analytics_partitions.create_partition(db, "profile_impressions", old_month)
+    db.commit()
+    db.close()
+    analytics_buffer.enqueue_many([
+        ("profile_impression", {"lawyer_id": lawyer_id, "timestamp": old_month}),
+        ("profile_impression", {"lawyer_id": lawyer_id, "timestamp": now}),
+    ])
+    analytics_buffer.flush()
+
+    summary = maintain(retention_months=12, archive=archive)
+
+    old_partition = f"profile_impressions_p{old_month:%Y_%m}"
+    assert summary["expired"] == [old_partition]
+    assert impression_partitions(pg_engine) == {f"profile_impressions_p{now:%Y_%m}": 1}
+    assert table_exists(pg_engine, old_partition) is False
+    assert table_exists(pg_engine, f"{ARCHIVE_SCHEMA}.{old_partition}") is archive
@@ -0,0 +1,54 @@
+from sqlalchemy import text
+
+from app.models import Lawyer
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import capture_queries
+
+TIMESTAMP = "2026-10-18T12:00:00"
+
+
+def seed_positions(session_factory, impressions, clicks):
+    db = session_factory()
+    lawyer = Lawyer(name="Abogada Posicionada", email="posicionada@example.com")
+    db.add(lawyer)
+    db.commit()
+    lawyer_id = lawyer.id
+    db.close()
+    analytics_buffer.enqueue_many(
+        [("profile_impression", {"lawyer_id": lawyer_id, "position": p, "timestamp": TIMESTAMP}) for p in impressions]
+        + [("listing_click", {"lawyer_id": lawyer_id, "position": p, "timestamp": TIMESTAMP}) for p in clicks]
+    )
+    analytics_buffer.flush()
+    return lawyer_id
+
+
+def test_position_stats_come_from_one_cached_statement(pg_client, pg_db, pg_engine):
+    """
+    Impressions, clicks and CTR per position range are read once, then served from the cache
+    """
+    lawyer_id = seed_positions(pg_db, impressions=[1, 2, 2, 3, 5, 12, None], clicks=[2, 5, 5])
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get(f"/analytics/lawyers/{lawyer_id}/position-stats")
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["impression_stats"] == {"top_3": 4, "top_4_10": 1, "top_11_20": 1, "unknown": 1}
+    assert data["click_stats"] == {"top_3": 1, "top_4_10": 2}
+    assert data["ctr_by_position"] == {"top_3": 25.0, "top_4_10": 200.0, "top_11_20": 0.0, "unknown": 0.0}
+    assert data["totals"] == {"impressions": 7, "clicks": 3, "overall_ctr": 42.86}
+    assert sum("FROM profile_impressions" in statement for statement in statements) == 1
+    assert sum("FROM listing_clicks" in statement for statement in statements) == 1
+
+    with capture_queries(pg_engine) as statements:
+        assert pg_client.get(f"/analytics/lawyers/{lawyer_id}/position-stats").json()["data"] == data
+    assert not any("profile_impressions" in statement for statement in statements)
+
+
+def test_position_counts_use_the_lawyer_position_index(pg_engine, pg_db):
+    with pg_engine.begin() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.execute(text(
+            "EXPLAIN SELECT position, count(*) FROM profile_impressions "
+            "WHERE lawyer_id = gen_random_uuid() GROUP BY position"
+        )).scalars().all()
+    assert any("lawyer_id_position" in line for line in plan)
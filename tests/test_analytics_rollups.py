@@ -0,0 +1,146 @@
+from app.models.analytics import AnalyticsRollupDaily, AnalyticsRollupHourly
+from app.services.analytics_ingestion import analytics_buffer
+from app.services.analytics_rollups import rollup_analytics
+from app.utils.hyperloglog import relative_error
+from tests.conftest import capture_queries
+
+
+def track(lawyer_id, *events):
+    analytics_buffer.enqueue_many(
+        (kind, {"lawyer_id": lawyer_id, "timestamp": timestamp, **fields}) for kind, timestamp, fields in events
+    )
+    analytics_buffer.flush()
+
+
+def rollup(session_factory):
+    db = session_factory()
+    try:
+        rollup_analytics(db)
+    finally:
+        db.close()
+
+
+def rollup_rows(session_factory, model):
+    db = session_factory()
+    rows = {
+        (row.metric, row.bucket_start.isoformat()): row.count
+        for row in db.query(model)
+    }
+    db.close()
+    return rows
+
+
+def test_rollup_counts_events_per_hour_and_day(pg_db, lawyer_id):
+    """
+    Every event type is counted in its hour and day; later runs pick up new events,
+    even ones with an old timestamp, without counting anything twice
+    """
+    track(
+        lawyer_id,
+        ("profile_view", "2026-10-17T09:10:00", {}),
+        ("profile_view", "2026-10-17T09:50:00", {}),
+        ("profile_view", "2026-10-17T11:00:00", {}),
+        ("profile_view", "2026-10-18T08:00:00", {}),
+        ("message_event", "2026-10-17T09:15:00", {"status": "sent"}),
+        ("call_event", "2026-10-17T09:20:00", {"completed": True}),
+        ("call_event", "2026-10-17T09:30:00", {"completed": False}),
+    )
+    rollup(pg_db)
+
+    hourly = rollup_rows(pg_db, AnalyticsRollupHourly)
+    assert hourly == {
+        ("profile_views", "2026-10-17T09:00:00"): 2,
+        ("profile_views", "2026-10-17T11:00:00"): 1,
+        ("profile_views", "2026-10-18T08:00:00"): 1,
+        ("messages_sent", "2026-10-17T09:00:00"): 1,
+        ("calls", "2026-10-17T09:00:00"): 2,
+        ("calls_completed", "2026-10-17T09:00:00"): 1,
+    }
+    daily = rollup_rows(pg_db, AnalyticsRollupDaily)
+    assert daily[("profile_views", "2026-10-17T00:00:00")] == 3
+    assert daily[("profile_views", "2026-10-18T00:00:00")] == 1
+
+    # A late event for an already rolled up hour, and a run with nothing new
+    track(lawyer_id, ("profile_view", "2026-10-17T09:05:00", {}))
+    rollup(pg_db)
+    rollup(pg_db)
+
+    hourly = rollup_rows(pg_db, AnalyticsRollupHourly)
+    assert hourly[("profile_views", "2026-10-17T09:00:00")] == 3
+    assert hourly[("calls", "2026-10-17T09:00:00")] == 2
+    assert rollup_rows(pg_db, AnalyticsRollupDaily)[("profile_views", "2026-10-17T00:00:00")] == 4
+
+
+def test_timeseries_is_served_from_rollups(pg_client, pg_db, pg_engine, lawyer_id):
+    """
+    The time series endpoint zero-fills buckets and never reads the raw events
+    """
+    track(
+        lawyer_id,
+        ("profile_view", "2026-10-15T10:00:00", {}),
+        ("profile_view", "2026-10-17T10:00:00", {}),
+        ("profile_view", "2026-10-17T12:30:00", {}),
+    )
+    rollup(pg_db)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get(
+            f"/analytics/lawyers/{lawyer_id}/timeseries",
+            params={"metric": "profile_views", "from": "2026-10-14T00:00:00", "to": "2026-10-18T00:00:00"},
+        )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [(point["bucket"][:10], point["count"]) for point in data["points"]] == [
+        ("2026-10-14", 0), ("2026-10-15", 1), ("2026-10-16", 0), ("2026-10-17", 2),
+    ]
+    assert data["total"] == 3
+    assert not any("profile_views" in statement for statement in statements)
+
+    hours = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/timeseries",
+        params={"granularity": "hour", "from": "2026-10-17T10:00:00", "to": "2026-10-17T13:00:00"},
+    ).json()["data"]["points"]
+    assert [point["count"] for point in hours] == [1, 0, 1]
+
+
+def test_timeseries_rejects_bad_parameters(pg_client, pg_db, lawyer_id):
+    url = f"/analytics/lawyers/{lawyer_id}/timeseries"
+
+    assert pg_client.get(url, params={"metric": "guide_views"}).status_code == 400
+    assert pg_client.get(url, params={"granularity": "minute"}).status_code == 422
+    assert pg_client.get(
+        url, params={"granularity": "hour", "from": "2020-01-01T00:00:00", "to": "2026-01-01T00:00:00"}
+    ).status_code == 400
+    assert pg_client.get(
+        "/analytics/lawyers/00000000-0000-0000-0000-000000000000/timeseries"
+    ).status_code == 404
+
+
+def test_rollup_keeps_daily_unique_visitor_sketches(pg_client, pg_db, lawyer_id):
+    """
+    Visitors are counted once per day however often they view, by user or visitor id,
+    and the range estimate merges the days; views without either are not visitors
+    """
+    track(
+        lawyer_id,
+        *[("profile_view", "2026-10-15T10:00:00", {"visitor_id": f"visitor-{i % 30}"}) for i in range(90)],
+        ("profile_view", "2026-10-15T11:00:00", {}),
+        *[("profile_view", "2026-10-16T10:00:00", {"visitor_id": f"visitor-{i}"}) for i in range(20, 50)],
+    )
+    rollup(pg_db)
+    # A rerun over the same events changes nothing
+    rollup(pg_db)
+
+    data = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/timeseries",
+        params={"metric": "profile_views", "from": "2026-10-15T00:00:00", "to": "2026-10-17T00:00:00"},
+    ).json()["data"]
+    assert [(point["count"], point["unique_visitors"]) for point in data["points"]] == [(91, 30), (30, 30)]
+    assert data["unique_visitors"] == 50
+    assert data["unique_visitors_relative_error"] == round(relative_error(), 4)
+
+    hours = pg_client.get(
+        f"/analytics/lawyers/{lawyer_id}/timeseries",
+        params={"granularity": "hour", "from": "2026-10-15T10:00:00", "to": "2026-10-15T12:00:00"},
+    ).json()["data"]
+    assert "unique_visitors" not in hours
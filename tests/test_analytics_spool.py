@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.models.analytics import ProfileImpression, ProfileImpressionCount
+from app.services.analytics_ingestion import EventBuffer
+from app.utils.spool import Spool
+from tests.conftest import seed_targets
+from tests.test_analytics_ingestion import impression
+
+
+def test_records_are_read_again_until_committed(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=64, fsync="always")
+    assert spool.open()
+    spool.append([f"record-{i}".encode() for i in range(10)])
+    assert spool.stats()["segments"] > 1
+
+    records, position = spool.read(4)
+    assert records == [f"record-{i}".encode() for i in range(4)]
+    assert spool.read(4)[0] == records
+    spool.commit(position)
+    spool.close()
+
+    # A new owner of the directory resumes from the checkpoint
+    spool = Spool(str(tmp_path), segment_bytes=64, fsync="always")
+    assert spool.open()
+    records, position = spool.read(100)
+    assert records == [f"record-{i}".encode() for i in range(4, 10)]
+    spool.commit(position)
+    assert spool.read(100)[0] == []
+    assert spool.backlog_bytes() == 0
+    assert spool.stats()["segments"] == 1
+    spool.close()
+
+
+def test_torn_record_ends_its_segment(tmp_path):
+    spool = Spool(str(tmp_path), fsync="never")
+    spool.open()
+    spool.append([b"first", b"second"])
+    spool.close()
+    segment = next(tmp_path.glob("*.seg"))
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    spool = Spool(str(tmp_path), fsync="never")
+    spool.open()
+    spool.append([b"third"])
+    records, position = spool.read(100)
+    assert records == [b"first", b"third"]
+    assert spool.stats()["corrupt"] == 1
+    spool.commit(position)
+    spool.close()
+
+
+def test_each_process_gets_its_own_slot(tmp_path):
+    first = Spool.open_slot(str(tmp_path), fsync="never")
+    second = Spool.open_slot(str(tmp_path), fsync="never")
+    assert first.directory.name == "slot-0"
+    assert second.directory.name == "slot-1"
+    assert not Spool(str(tmp_path / "slot-0")).open(blocking=False)
+    first.close()
+    third = Spool.open_slot(str(tmp_path), fsync="never")
+    assert third.directory.name == "slot-0"
+    second.close()
+    third.close()
+
+
+def test_unknown_fsync_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Spool(str(tmp_path), fsync="sometimes")
+
+
+@pytest.fixture
+def spooled_buffer(pg_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_INTERVAL_MS", 60000)
+    monkeypatch.setattr(settings, "ANALYTICS_FLUSH_MAX_EVENTS", 1000)
+    monkeypatch.setattr(settings, "ANALYTICS_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ANALYTICS_SPOOL_LOAD_BATCH_EVENTS", 3)
+    event_buffer = EventBuffer(session_factory=pg_db)
+    event_buffer.start()
+    yield event_buffer
+    event_buffer.stop()
+
+
+def test_spooled_events_survive_an_unreachable_database(spooled_buffer, pg_db):
+    """
+    Events wait in the spool while the database is down, and are loaded in batches
+    once it is back, across a restart of the buffer
+    """
+    (lawyer_id, _), _ = seed_targets(pg_db)
+    spooled_buffer.enqueue_many([("profile_impression", impression(lawyer_id, position)) for position in range(1, 8)])
+    assert spooled_buffer.stats()["queue_depth"] == 0
+    assert spooled_buffer.stats()["spooled"] == 7
+
+    def unreachable():
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    spooled_buffer.session_factory = unreachable
+    assert spooled_buffer.flush() == 0
+    assert spooled_buffer.stats()["spool"]["backlog_bytes"] > 0
+    spooled_buffer.stop()
+
+    db = pg_db()
+    assert db.query(ProfileImpression).count() == 0
+    db.close()
+
+    spooled_buffer.session_factory = pg_db
+    spooled_buffer.start()
+    assert spooled_buffer.flush() == 7
+    stats = spooled_buffer.stats()
+    assert stats["dropped"] == 0
+    assert stats["spool"]["backlog_bytes"] == 0
+
+    db = pg_db()
+    assert db.query(ProfileImpression).count() == 7
+    assert db.query(ProfileImpressionCount.count).scalar() == 7
+    db.close()
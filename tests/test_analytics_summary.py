@@ -0,0 +1,80 @@
+from app.models import Lawyer, User
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import capture_queries
+
+TIMESTAMP = "2026-10-18T12:00:00"
+
+
+def lawyer_with_login(client, session_factory):
+    """
+    A lawyer profile owned by a freshly signed up user, and that user's auth headers
+    """
+    token = client.post(
+        "/auth/signup",
+        json={"email": "titular@example.com", "password": "password123", "first_name": "Ana", "last_name": "Soto"},
+    ).json()["access_token"]
+    db = session_factory()
+    user_id = db.query(User.id).filter(User.email == "titular@example.com").scalar()
+    lawyer = Lawyer(name="Ana Soto", title="Abogada laboral", email="ana.soto@example.com", user_id=user_id)
+    db.add(lawyer)
+    db.commit()
+    lawyer_id = lawyer.id
+    db.close()
+    return lawyer_id, {"Authorization": f"Bearer {token}"}
+
+
+def track(lawyer_id, kind, count=1, **fields):
+    analytics_buffer.enqueue_many([(kind, {"lawyer_id": lawyer_id, "timestamp": TIMESTAMP, **fields})] * count)
+    analytics_buffer.flush()
+
+
+def test_summary_is_built_in_three_statements_and_cached(pg_client, pg_db, pg_engine):
+    lawyer_id, headers = lawyer_with_login(pg_client, pg_db)
+    track(lawyer_id, "profile_view", 4)
+    track(lawyer_id, "message_event", 2, status="sent")
+    track(lawyer_id, "call_event", 1, completed=True)
+    track(lawyer_id, "profile_impression", 5, position=2)
+    track(lawyer_id, "listing_click", 1, position=2)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get("/analytics/summary", headers=headers)
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["profile"]["id"] == str(lawyer_id)
+    assert data["counts"] == {
+        "profile_views": 4,
+        "messages_sent": 2,
+        "messages_read": 0,
+        "calls": 1,
+        "calls_completed": 1,
+        "impressions": 5,
+        "clicks": 1,
+    }
+    assert data["rates"] == {"message_rate": 50.0, "call_rate": 25.0, "overall_ctr": 20.0}
+    assert data["position_data"]["ctr_by_position"] == {"top_3": 20.0}
+    assert sum("_counts" in statement for statement in statements) == 1
+    assert sum("FROM profile_impressions" in statement for statement in statements) == 1
+    # Unique visitors come from the sketches, which the rollup job has not built yet
+    assert data["unique_visitors"]["last_30_days"] == 0
+    assert sum("FROM analytics_visitor_sketches" in statement for statement in statements) == 1
+
+    # Cached: only the user and lawyer lookups
+    with capture_queries(pg_engine) as statements:
+        assert pg_client.get("/analytics/summary", headers=headers).json()["data"] == data
+    assert not any(
+        "_counts" in statement or "profile_impressions" in statement or "visitor_sketches" in statement
+        for statement in statements
+    )
+
+
+def test_flushed_events_invalidate_the_summary(pg_client, pg_db):
+    lawyer_id, headers = lawyer_with_login(pg_client, pg_db)
+    track(lawyer_id, "profile_impression", 2, position=1)
+    assert pg_client.get("/analytics/summary", headers=headers).json()["data"]["counts"]["impressions"] == 2
+
+    track(lawyer_id, "profile_impression", 1, position=1)
+    track(lawyer_id, "listing_click", 1, position=1)
+
+    data = pg_client.get("/analytics/summary", headers=headers).json()["data"]
+    assert data["counts"]["impressions"] == 3
+    assert data["position_data"]["click_stats"] == {"top_3": 1}
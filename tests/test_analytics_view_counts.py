@@ -0,0 +1,84 @@
+import uuid
+
+from app.api import questions as questions_api
+from app.models import Question, User
+from app.models.analytics import GuideViewCount
+from app.services import analytics_dedup
+from tests.conftest import capture_queries, seed_targets
+
+TIMESTAMP = "2026-10-18T12:00:00"
+
+
+def seed_question(session_factory):
+    db = session_factory()
+    user = User(email="cliente@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    question = Question(title="Despido sin finiquito", content="...", user_id=user.id)
+    db.add(question)
+    db.commit()
+    question_id = question.id
+    db.close()
+    return question_id
+
+
+def stored_view_count(session_factory, question_id):
+    db = session_factory()
+    view_count = db.get(Question, question_id).view_count
+    db.close()
+    return view_count
+
+
+def test_question_views_are_coalesced_into_one_update(buffer, pg_client, pg_db, pg_engine, monkeypatch):
+    """
+    Reading a question writes nothing; its queued views are added to the stored count
+    until the flush writes them all in one UPDATE ... FROM (VALUES ...)
+    """
+    monkeypatch.setattr(analytics_dedup, "analytics_buffer", buffer)
+    monkeypatch.setattr(questions_api, "analytics_buffer", buffer)
+    question_id = seed_question(pg_db)
+
+    with capture_queries(pg_engine) as statements:
+        counts = [
+            pg_client.get(f"/questions/{question_id}", headers={"User-Agent": f"browser-{i}"}).json()["view_count"]
+            for i in range(5)
+        ]
+    assert counts == [1, 2, 3, 4, 5]
+    assert not any(statement.startswith("UPDATE") for statement in statements)
+    assert stored_view_count(pg_db, question_id) == 0
+    assert pg_client.get("/questions").json()["questions"][0]["view_count"] == 5
+
+    with capture_queries(pg_engine) as statements:
+        buffer.flush()
+    updates = [statement for statement in statements if statement.startswith("UPDATE questions")]
+    assert len(updates) == 1
+    assert "VALUES" in updates[0]
+    assert stored_view_count(pg_db, question_id) == 5
+    assert buffer.pending_count("question_view", question_id) == 0
+
+    # A repeat view inside the dedup window is shown to its reader but adds nothing
+    assert pg_client.get(
+        f"/questions/{question_id}", headers={"User-Agent": "browser-0"}
+    ).json()["view_count"] == 6
+    assert buffer.pending_count("question_view", question_id) == 0
+    assert pg_client.get("/questions").json()["questions"][0]["view_count"] == 5
+
+
+def test_pending_counts_follow_the_queue(buffer, pg_db):
+    """
+    Views leave the pending counts once written, or discarded for a missing target
+    """
+    (_, _), guide_id = seed_targets(pg_db)
+    missing_id = uuid.uuid4()
+    buffer.enqueue_many([("guide_view", {"guide_id": guide_id, "timestamp": TIMESTAMP})] * 3)
+    buffer.enqueue("guide_view", {"guide_id": missing_id, "timestamp": TIMESTAMP})
+    assert buffer.pending_counts("guide_view", [guide_id, missing_id, uuid.uuid4()]) == {
+        guide_id: 3, missing_id: 1,
+    }
+
+    buffer.flush()
+    assert buffer.pending_counts("guide_view", [guide_id, missing_id]) == {}
+    db = pg_db()
+    assert db.get(GuideViewCount, guide_id).count == 3
+    db.close()
+
@@ -0,0 +1,70 @@
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.counts import normalize_filters
+from tests.conftest import capture_queries
+from tests.test_lawyers import seed_sortable_lawyers
+
+
+def count_statements(statements):
+    return [s for s in statements if "count(*)" in s.lower()]
+
+
+def test_normalize_filters_ignores_unset_and_case():
+    """
+    Filter tuples are stable regardless of order, case and unset values
+    """
+    assert normalize_filters({"city": " Santiago ", "area": None, "q": ""}) == (("city", "santiago"),)
+    assert normalize_filters({"b": 1, "a": True}) == normalize_filters({"a": True, "b": 1})
+
+
+def test_total_is_cached_and_invalidated_by_writes(pg_client, pg_db, pg_engine):
+    """
+    Repeated pages reuse the cached total until a committed write touches lawyers
+    """
+    seed_sortable_lawyers(pg_db, 4)
+
+    assert pg_client.get("/lawyers", params={"city": "santiago"}).json()["total"] == 0
+    with capture_queries(pg_engine) as statements:
+        data = pg_client.get("/lawyers", params={"page": 2, "size": 2}).json()
+        pg_client.get("/lawyers", params={"page": 1, "size": 2})
+    assert data["total"] == 4
+    assert data["total_is_estimate"] is False
+    assert len(count_statements(statements)) == 1
+
+    response = pg_client.post("/lawyers", json={"name": "Nuevo", "email": "nuevo@example.com"})
+    assert response.status_code == 201
+
+    assert pg_client.get("/lawyers").json()["total"] == 5
+
+
+def test_large_results_report_estimates(pg_client, pg_db, pg_engine, monkeypatch):
+    """
+    Above the threshold, unfiltered totals come from pg_class and filtered ones from EXPLAIN
+    """
+    monkeypatch.setattr(settings, "COUNT_ESTIMATE_THRESHOLD", 5)
+    seed_sortable_lawyers(pg_db, 30)
+    with pg_engine.begin() as connection:
+        connection.execute(text("ANALYZE lawyers"))
+
+    with capture_queries(pg_engine) as statements:
+        unfiltered = pg_client.get("/lawyers").json()
+        filtered = pg_client.get("/lawyers", params={"q": "abogado"}).json()
+
+    assert unfiltered["total_is_estimate"] is True
+    assert unfiltered["total"] == 30
+    assert filtered["total_is_estimate"] is True
+    assert filtered["total"] >= 5
+    assert count_statements(statements) == []
+    assert any(s.startswith("EXPLAIN") for s in statements)
+
+
+def test_question_and_guide_lists_flag_exact_totals(pg_client, pg_db):
+    """
+    Small question and guide lists keep exact totals
+    """
+    questions = pg_client.get("/questions").json()
+    guides = pg_client.get("/guides").json()
+
+    assert questions["total"] == 0 and questions["total_is_estimate"] is False
+    assert guides["total"] == 0 and guides["total_is_estimate"] is False
@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.hyperloglog import HyperLogLog, relative_error
+
+
+def sketch_of(values):
+    sketch = HyperLogLog()
+    sketch.update(values)
+    return sketch
+
+
+def test_small_cardinalities_are_close_to_exact():
+    assert HyperLogLog().count() == 0
+    assert sketch_of(["u:1", "u:1", "u:1"]).count() == 1
+    assert abs(sketch_of(f"v:{i}" for i in range(100)).count() - 100) <= 2
+
+
+@pytest.mark.parametrize("cardinality", [5000, 50000])
+def test_large_cardinalities_are_within_the_error_bound(cardinality):
+    estimate = sketch_of(f"v:{i}" for i in range(cardinality)).count()
+    # Three standard errors
+    assert abs(estimate - cardinality) <= 3 * relative_error() * cardinality
+
+
+def test_merge_estimates_the_union():
+    first = sketch_of(f"v:{i}" for i in range(3000))
+    second = sketch_of(f"v:{i}" for i in range(2000, 6000))
+    first.merge(second)
+    assert first.registers == sketch_of(f"v:{i}" for i in range(6000)).registers
+
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(precision=10))
+
+
+def test_serialized_sketches_round_trip_and_stay_small():
+    sketch = sketch_of(f"v:{i}" for i in range(10))
+    data = sketch.to_bytes()
+    assert len(data) < 100
+    restored = HyperLogLog.from_bytes(data)
+    assert restored.registers == sketch.registers
+    assert restored.count() == 10
@@ -0,0 +1,141 @@
+import pytest
+
+from app.core.config import settings
+from app.db.repositories import lawyers as lawyers_repository
+from app.models import Lawyer
+
+
+def seed_search_lawyers(session_factory):
+    """
+    Create a few lawyers whose name, title and bio exercise the weighted search vector
+    """
+    db = session_factory()
+    db.add_all([
+        Lawyer(
+            name="Camila Divorcio Soto",
+            title="Abogada",
+            bio="Asesoría en contratos comerciales.",
+            email="camila@example.com",
+        ),
+        Lawyer(
+            name="Martín Rojas",
+            title="Abogado",
+            bio="Especialista en divorcio y custodia de menores.",
+            email="martin@example.com",
+        ),
+        Lawyer(
+            name="Josefa Muñoz",
+            title="Abogada de Família",
+            bio="Pensiones de alimentos.",
+            email="josefa@example.com",
+        ),
+    ])
+    db.commit()
+    db.close()
+
+
+def search_names(session_factory, query, **kwargs):
+    db = session_factory()
+    try:
+        lawyers, total, _ = lawyers_repository.search_lawyers(db, query=query, **kwargs)
+    finally:
+        db.close()
+    return [lawyer["name"] for lawyer in lawyers], total
+
+
+def test_name_match_outranks_bio_match(pg_db):
+    """
+    A query matching a lawyer's name ranks above one only matching the bio
+    """
+    seed_search_lawyers(pg_db)
+
+    names, total = search_names(pg_db, "divorcio")
+
+    assert total == 2
+    assert names == ["Camila Divorcio Soto", "Martín Rojas"]
+
+
+def test_search_matches_stems_and_accents(pg_db):
+    """
+    Plural forms match their stem and unaccented queries match accented text
+    """
+    seed_search_lawyers(pg_db)
+
+    assert search_names(pg_db, "divorcios")[1] == 2
+    assert search_names(pg_db, "familia")[0] == ["Josefa Muñoz"]
+
+
+def test_partial_word_falls_back_to_prefix_search(pg_db, monkeypatch):
+    """
+    Partial words that full-text search drops are matched as prefixes without ILIKE
+    """
+    monkeypatch.setattr(settings, "LAWYER_SEARCH_ILIKE_FALLBACK", False)
+    seed_search_lawyers(pg_db)
+
+    names, total = search_names(pg_db, "custo")
+
+    assert total == 1
+    assert names == ["Martín Rojas"]
+
+
+def test_ilike_fallback_is_opt_in(pg_db, monkeypatch):
+    """
+    Mid-word substrings only match when the ILIKE fallback is enabled
+    """
+    seed_search_lawyers(pg_db)
+
+    monkeypatch.setattr(settings, "LAWYER_SEARCH_ILIKE_FALLBACK", False)
+    assert search_names(pg_db, "ustodia")[1] == 0
+
+    monkeypatch.setattr(settings, "LAWYER_SEARCH_ILIKE_FALLBACK", True)
+    assert search_names(pg_db, "ustodia")[0] == ["Martín Rojas"]
+
+
+def test_ilike_mode_scans_substrings(pg_db):
+    """
+    LAWYER_SEARCH_MODE=ilike keeps the legacy substring behavior
+    """
+    seed_search_lawyers(pg_db)
+
+    names, total = search_names(pg_db, "ustodia", search_mode="ilike")
+
+    assert total == 1
+    assert names == ["Martín Rojas"]
+
+
+def test_unknown_search_mode_is_rejected(pg_db):
+    """
+    An unsupported search mode raises instead of silently scanning
+    """
+    with pytest.raises(ValueError):
+        search_names(pg_db, "divorcio", search_mode="regex")
+
+
+def test_relevance_cursor_pages_through_ties(pg_db):
+    """
+    Cursors over ts_rank ordering resume exactly after the boundary row
+    """
+    db = pg_db()
+    db.add_all([
+        Lawyer(name=f"Abogado {i}", bio="divorcio " * (i % 3 + 1), email=f"rank{i}@example.com")
+        for i in range(9)
+    ])
+    db.commit()
+    db.close()
+
+    db = pg_db()
+    try:
+        expected, _, _ = lawyers_repository.search_lawyers(db, query="divorcio", limit=100)
+        seen, cursor = [], None
+        while True:
+            lawyers, _, page_info = lawyers_repository.search_lawyers(
+                db, query="divorcio", limit=2, cursor=cursor
+            )
+            seen.extend(lawyers)
+            cursor = page_info["next_cursor"]
+            if not cursor:
+                break
+    finally:
+        db.close()
+
+    assert [lawyer["id"] for lawyer in seen] == [lawyer["id"] for lawyer in expected]
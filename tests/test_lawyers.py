@@ -0,0 +1,282 @@
+from datetime import datetime
+
+import pytest
+
+from app.db.repositories import lawyers as lawyers_repository
+from app.utils.slug import slugify
+from app.models import City, PracticeAreaCategory, PracticeArea, Lawyer, LawyerArea
+from tests.conftest import capture_queries
+
+
+def area_queries(statements):
+    return [s for s in statements if "lawyer_areas" in s]
+
+
+def seed_lawyers(session_factory, count):
+    """
+    Create `count` lawyers, each with two practice areas
+    """
+    db = session_factory()
+    category = PracticeAreaCategory(name="Derecho Civil", slug="civil")
+    city = City(name="Santiago", slug="santiago")
+    db.add_all([category, city])
+    db.flush()
+
+    areas = [
+        PracticeArea(name="Contratos", slug="contratos", category_id=category.id),
+        PracticeArea(name="Familia", slug="familia", category_id=category.id),
+    ]
+    db.add_all(areas)
+    db.flush()
+
+    lawyer_ids = []
+    for i in range(count):
+        lawyer = Lawyer(name=f"Abogado {i}", email=f"abogado{i}@example.com", city="Santiago", city_id=city.id)
+        db.add(lawyer)
+        db.flush()
+        for score, area in enumerate(areas):
+            db.add(LawyerArea(lawyer_id=lawyer.id, area_id=area.id, experience_score=50 + score))
+        lawyer_ids.append(lawyer.id)
+
+    db.commit()
+    area_ids = [str(area.id) for area in areas]
+    db.close()
+    return lawyer_ids, area_ids
+
+
+def test_search_lawyers_loads_areas_in_one_query(pg_client, pg_db, pg_engine):
+    """
+    Area scores for a whole page come back in a single query, independent of page size
+    """
+    seed_lawyers(pg_db, 25)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get("/lawyers", params={"size": 25})
+
+    assert response.status_code == 200
+    lawyers = response.json()["lawyers"]
+    assert len(lawyers) == 25
+    assert all(len(lawyer["areas"]) == 2 for lawyer in lawyers)
+    assert {area["experience_score"] for area in lawyers[0]["areas"]} == {50, 51}
+    assert len(area_queries(statements)) == 1
+
+
+def test_get_lawyer_loads_areas_with_lawyer(pg_client, pg_db, pg_engine):
+    """
+    Lawyer detail loads areas and experience scores together with the lawyer
+    """
+    lawyer_ids, _ = seed_lawyers(pg_db, 1)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.get(f"/lawyers/{lawyer_ids[0]}")
+
+    assert response.status_code == 200
+    assert len(response.json()["areas"]) == 2
+    assert len(area_queries(statements)) == 1
+
+
+def test_create_lawyer_query_count(pg_client, pg_db, pg_engine):
+    """
+    Creating a lawyer writes all areas in one insert and reloads them in one query
+    """
+    _, area_ids = seed_lawyers(pg_db, 0)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.post(
+            "/lawyers",
+            json={
+                "name": "Nueva Abogada",
+                "email": "nueva@example.com",
+                "areas": [{"area_id": area_id, "experience_score": 70} for area_id in area_ids],
+            },
+        )
+
+    assert response.status_code == 201
+    assert [area["experience_score"] for area in response.json()["areas"]] == [70, 70]
+    inserts = [s for s in area_queries(statements) if s.startswith("INSERT")]
+    selects = [s for s in area_queries(statements) if s.startswith("SELECT")]
+    assert len(inserts) == 1
+    assert len(selects) == 1
+
+
+def test_update_lawyer_query_count(pg_client, pg_db, pg_engine):
+    """
+    Updating a lawyer's areas does not re-query scores per area
+    """
+    lawyer_ids, area_ids = seed_lawyers(pg_db, 1)
+
+    with capture_queries(pg_engine) as statements:
+        response = pg_client.patch(
+            f"/lawyers/{lawyer_ids[0]}",
+            json={"areas": [{"area_id": area_ids[0], "experience_score": 90}]},
+        )
+
+    assert response.status_code == 200
+    assert [area["experience_score"] for area in response.json()["areas"]] == [90]
+    selects = [s for s in area_queries(statements) if s.startswith("SELECT")]
+    # One load for the existence check, one reload after the update
+    assert len(selects) == 2
+
+
+def seed_sortable_lawyers(session_factory, count):
+    """
+    Create lawyers with repeated names, ratings and start dates (some missing) so
+    every sort has ties that only the id breaks
+    """
+    db = session_factory()
+    for i in range(count):
+        db.add(Lawyer(
+            name=f"Abogado {i % 3}",
+            email=f"orden{i}@example.com",
+            review_score=float(i % 4),
+            professional_start_date=None if i % 5 == 0 else datetime(2000 + i % 3, 1, 1),
+        ))
+    db.commit()
+    db.close()
+
+
+def walk_cursor_pages(client, sort, size, direction="next_cursor", cursor=None):
+    pages = []
+    while True:
+        params = {"sort": sort, "size": size}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/lawyers", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        pages.append(data)
+        cursor = data[direction]
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("sort", ["best_match", "highest_rating", "most_experience"])
+def test_cursor_pagination_matches_offset_pagination(pg_client, pg_db, sort):
+    """
+    Following next_cursor visits every lawyer once in the same order as page/size,
+    and prev_cursor walks back to the first page
+    """
+    seed_sortable_lawyers(pg_db, 23)
+
+    everything = pg_client.get("/lawyers", params={"sort": sort, "size": 100}).json()
+    expected = [lawyer["id"] for lawyer in everything["lawyers"]]
+
+    forward = walk_cursor_pages(pg_client, sort, 5)
+    assert [lawyer["id"] for page in forward for lawyer in page["lawyers"]] == expected
+    assert [page["page"] for page in forward] == [1, 2, 3, 4, 5]
+    assert forward[-1]["next_cursor"] is None
+
+    backward = walk_cursor_pages(pg_client, sort, 5, "prev_cursor", forward[-1]["prev_cursor"])
+    assert [lawyer["id"] for page in reversed(backward) for lawyer in page["lawyers"]] == expected[:20]
+    assert backward[-1]["page"] == 1
+    assert backward[-1]["prev_cursor"] is None
+
+
+def test_page_size_pagination_returns_cursors(pg_client, pg_db):
+    """
+    Offset pages still work and hand out cursors for switching to keyset paging
+    """
+    seed_sortable_lawyers(pg_db, 12)
+
+    data = pg_client.get("/lawyers", params={"page": 2, "size": 5}).json()
+    assert data["page"] == 2
+    assert data["total"] == 12
+
+    following = pg_client.get("/lawyers", params={"size": 5, "cursor": data["next_cursor"]}).json()
+    third_page = pg_client.get("/lawyers", params={"page": 3, "size": 5}).json()
+    assert following["lawyers"] == third_page["lawyers"]
+
+
+def test_invalid_cursor_is_rejected(pg_client, pg_db):
+    """
+    Malformed cursors and cursors from another sort return 400
+    """
+    seed_sortable_lawyers(pg_db, 3)
+    cursor = pg_client.get("/lawyers", params={"size": 1}).json()["next_cursor"]
+
+    assert pg_client.get("/lawyers", params={"cursor": "not-a-cursor"}).status_code == 400
+    response = pg_client.get("/lawyers", params={"cursor": cursor, "sort": "highest_rating"})
+    assert response.status_code == 400
+
+
+def test_facets_count_each_filter_value(pg_client, pg_db, pg_engine):
+    """
+    Facets come from two GROUP BY queries and follow the current filters
+    """
+    _, area_ids = seed_lawyers(pg_db, 3)
+    db = pg_db()
+    valparaiso = City(name="Valparaíso", slug="valparaiso")
+    db.add(valparaiso)
+    db.flush()
+    db.add_all([
+        Lawyer(name="Ana", email="ana@example.com", city="Valparaíso", city_id=valparaiso.id,
+               languages=["Español", "Inglés"], is_verified=True),
+        Lawyer(name="Berta", email="berta@example.com", city="Valparaíso", city_id=valparaiso.id,
+               languages=["Español"]),
+    ])
+    db.commit()
+    db.close()
+
+    with capture_queries(pg_engine) as statements:
+        facets = pg_client.get("/lawyers/facets").json()
+    assert len([s for s in statements if "GROUP BY" in s]) == 2
+
+    assert facets["total"] == 5
+    assert facets["cities"] == [
+        {"value": "santiago", "label": "Santiago", "count": 3},
+        {"value": "valparaiso", "label": "Valparaíso", "count": 2},
+    ]
+    assert facets["languages"] == [
+        {"value": "Español", "label": "Español", "count": 2},
+        {"value": "Inglés", "label": "Inglés", "count": 1},
+    ]
+    assert facets["verified"] == {"verified": 1, "unverified": 4}
+    assert {area["value"]: area["count"] for area in facets["areas"]} == {"contratos": 3, "familia": 3}
+
+    filtered = pg_client.get("/lawyers/facets", params={"city": "valparaiso"}).json()
+    assert filtered["total"] == 2
+    assert filtered["areas"] == []
+    assert filtered["verified"] == {"verified": 1, "unverified": 1}
+
+    # Repeated requests for the same filters are served from the cache
+    with capture_queries(pg_engine) as statements:
+        pg_client.get("/lawyers/facets")
+    assert statements == []
+
+
+def test_city_filter_matches_slug_exactly(pg_client, pg_db):
+    """
+    The city filter is an equality on city_id, resolved from the slug
+    """
+    db = pg_db()
+    db.add_all([City(name="Santiago", slug="santiago"), City(name="San Antonio", slug="san-antonio")])
+    db.commit()
+    db.close()
+    for name in ("Santiago", "San Antonio"):
+        response = pg_client.post("/lawyers", json={"name": name, "email": f"{slugify(name)}@example.com", "city": name})
+        assert response.status_code == 201
+        assert response.json()["city_id"] is not None
+
+    for city, expected in (("santiago", ["Santiago"]), ("San Antonio", ["San Antonio"]), ("san", [])):
+        lawyers = pg_client.get("/lawyers", params={"city": city}).json()["lawyers"]
+        assert [lawyer["city"] for lawyer in lawyers] == expected
+
+
+def test_backfill_city_ids_links_free_text_cities(pg_db):
+    """
+    Lawyers with only a city name are linked by slug, unknown cities stay unlinked
+    """
+    db = pg_db()
+    vina = City(name="Viña del Mar", slug="vina-del-mar")
+    db.add(vina)
+    db.add_all([
+        Lawyer(name="Uno", email="uno@example.com", city="Viña del Mar"),
+        Lawyer(name="Dos", email="dos@example.com", city="  viña DEL mar "),
+        Lawyer(name="Tres", email="tres@example.com", city="Ciudad Desconocida"),
+    ])
+    db.commit()
+
+    assert lawyers_repository.backfill_city_ids(db, batch_size=2) == 2
+    linked = {lawyer.name: lawyer.city_id for lawyer in db.query(Lawyer)}
+    assert linked == {"Uno": vina.id, "Dos": vina.id, "Tres": None}
+    db.close()
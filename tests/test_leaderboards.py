@@ -0,0 +1,153 @@
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models import Guide, Lawyer, LawyerArea, PracticeArea, PracticeAreaCategory
+from app.models.analytics import AnalyticsRollupDaily, AnalyticsRollupHourly
+from app.models.leaderboard import LeaderboardEntry
+from app.services import leaderboards
+from tests.conftest import capture_queries
+
+
+def seed(session_factory):
+    """
+    Three lawyers (two of them in the "despidos" area) and an unpublished guide,
+    with rollup rows relative to the database clock
+    """
+    db = session_factory()
+    now = db.execute(select(func.localtimestamp())).scalar()
+    hour = now.replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+
+    category = PracticeAreaCategory(name="Derecho Laboral", slug="derecho-laboral")
+    db.add(category)
+    db.flush()
+    area = PracticeArea(name="Despidos", slug="despidos", category_id=category.id)
+    lawyers = [Lawyer(name=f"Abogado {i}", email=f"leader{i}@example.com") for i in range(3)]
+    guide = Guide(title="Borrador", slug="borrador", published=False)
+    db.add_all([area, guide] + lawyers)
+    db.flush()
+    db.add_all([LawyerArea(lawyer_id=lawyers[i].id, area_id=area.id) for i in (1, 2)])
+
+    recent, steady, old = (lawyer.id for lawyer in lawyers)
+    rows = [
+        # 24h: "recent" has fewer views than "steady", but all of them this hour
+        (AnalyticsRollupHourly, "profile_views", recent, hour, 10),
+        (AnalyticsRollupHourly, "profile_views", steady, hour - timedelta(hours=20), 14),
+        (AnalyticsRollupHourly, "profile_views", old, hour - timedelta(hours=30), 30),
+        (AnalyticsRollupDaily, "profile_views", recent, day, 10),
+        (AnalyticsRollupDaily, "profile_views", steady, day - timedelta(days=10), 14),
+        (AnalyticsRollupDaily, "profile_views", old, day - timedelta(days=20), 30),
+        (AnalyticsRollupHourly, "guide_views", guide.id, hour, 50),
+    ]
+    db.add_all([
+        # Written by a rollup run that finished an hour ago
+        model(metric=metric, entity_id=entity_id, bucket_start=bucket, count=count, updated_at=now - timedelta(hours=1))
+        for model, metric, entity_id, bucket, count in rows
+    ])
+    db.commit()
+    db.close()
+    return recent, steady, old
+
+
+def ranking(client, board, **params):
+    response = client.get(f"/leaderboards/{board}", params=params)
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_leaderboards_rank_decayed_views_per_period_and_scope(pg_client, pg_db):
+    recent, steady, old = seed(pg_db)
+    db = pg_db()
+    assert leaderboards.refresh_leaderboards(db) == ["lawyers", "guides", "questions"]
+    db.close()
+
+    data = ranking(pg_client, "lawyers", period="24h")
+    assert [entry["id"] for entry in data["entries"]] == [str(recent), str(steady)]
+    assert [entry["count"] for entry in data["entries"]] == [10, 14]
+    assert data["entries"][0]["name"] == "Abogado 0"
+
+    data = ranking(pg_client, "lawyers", period="30d")
+    assert [entry["id"] for entry in data["entries"]] == [str(recent), str(steady), str(old)]
+    assert ranking(pg_client, "lawyers", period="30d", limit=1)["entries"][0]["rank"] == 1
+
+    data = ranking(pg_client, "lawyers", period="30d", scope="despidos")
+    assert [entry["id"] for entry in data["entries"]] == [str(steady), str(old)]
+
+    # Unpublished guides are left out
+    assert ranking(pg_client, "guides", period="24h")["entries"] == []
+
+
+def test_plain_counts_without_decay(pg_client, pg_db, monkeypatch):
+    recent, steady, old = seed(pg_db)
+    monkeypatch.setattr(settings, "LEADERBOARD_HALF_LIFE_FRACTION", 0)
+    db = pg_db()
+    leaderboards.refresh_leaderboards(db)
+    db.close()
+
+    data = ranking(pg_client, "lawyers", period="30d")
+    assert [entry["id"] for entry in data["entries"]] == [str(old), str(steady), str(recent)]
+    assert [entry["score"] for entry in data["entries"]] == [30, 14, 10]
+
+
+def test_reads_are_cached_until_a_rebuild(pg_client, pg_db, pg_engine):
+    seed(pg_db)
+    db = pg_db()
+    leaderboards.refresh_leaderboards(db)
+
+    ranking(pg_client, "lawyers")
+    with capture_queries(pg_engine) as statements:
+        ranking(pg_client, "lawyers")
+    assert not any("leaderboard_entries" in statement for statement in statements)
+
+    # Nothing changed in the rollups since the last run: no board is rebuilt
+    assert leaderboards.refresh_leaderboards(db) == []
+    db.add(AnalyticsRollupHourly(metric="guide_views", entity_id=uuid.uuid4(), bucket_start=func.now(), count=1))
+    db.commit()
+    assert leaderboards.refresh_leaderboards(db) == ["guides"]
+    db.close()
+
+    with capture_queries(pg_engine) as statements:
+        ranking(pg_client, "lawyers")
+    assert any("leaderboard_entries" in statement for statement in statements)
+
+
+def test_refresh_only_recomputes_changed_scopes(pg_db):
+    """
+    New views rerank the site-wide boards and the scopes of the viewed entity only
+    """
+    recent, steady, old = seed(pg_db)
+    db = pg_db()
+    leaderboards.refresh_leaderboards(db)
+
+    def refreshed_at(scope):
+        return db.query(func.max(LeaderboardEntry.refreshed_at)).filter(
+            LeaderboardEntry.board == "lawyers", LeaderboardEntry.scope == scope
+        ).scalar()
+
+    area_id = str(db.query(PracticeArea.id).filter(PracticeArea.slug == "despidos").scalar())
+    first = {scope: refreshed_at(scope) for scope in ("all", area_id)}
+
+    # "recent" is in no area: the area board keeps its snapshot
+    db.add(AnalyticsRollupHourly(metric="profile_views", entity_id=recent, bucket_start=func.now(), count=1))
+    db.commit()
+    assert leaderboards.refresh_leaderboards(db) == ["lawyers"]
+    assert refreshed_at("all") > first["all"]
+    assert refreshed_at(area_id) == first[area_id]
+
+    db.add(AnalyticsRollupHourly(metric="profile_views", entity_id=steady, bucket_start=func.now(), count=1))
+    db.commit()
+    assert leaderboards.refresh_leaderboards(db) == ["lawyers"]
+    assert refreshed_at(area_id) > first[area_id]
+    db.close()
+
+
+def test_bad_leaderboard_parameters(pg_client, pg_db):
+    assert pg_client.get("/leaderboards/cities").status_code == 404
+    assert pg_client.get("/leaderboards/lawyers", params={"period": "1y"}).status_code == 422
+    assert pg_client.get("/leaderboards/lawyers", params={"scope": "no-existe"}).status_code == 404
+    db = pg_db()
+    assert db.query(LeaderboardEntry).count() == 0
+    db.close()
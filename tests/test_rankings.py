@@ -0,0 +1,228 @@
+import threading
+
+from sqlalchemy import event, text
+
+from app.db.repositories import lawyers as lawyers_repository
+from app.models import Lawyer, LawyerArea, PracticeArea, PracticeAreaCategory, Review
+from app.models.analytics import ListingClickCount, ProfileImpressionCount
+from app.services.jobs import JobRunner, get_watermark
+from app.services.rankings import RANKING_JOB, bayesian_rating, refresh_stale_rankings
+
+
+def add_reviews(db, lawyer, ratings):
+    for rating in ratings:
+        db.add(Review(
+            rating=rating,
+            title="Reseña",
+            content="Muy buena atención",
+            author="Cliente",
+            author_email="cliente@example.com",
+            lawyer_id=lawyer.id,
+        ))
+
+
+def refresh(session_factory):
+    db = session_factory()
+    try:
+        return refresh_stale_rankings(db)
+    finally:
+        db.close()
+
+
+def test_bayesian_rating_shrinks_small_samples():
+    """
+    One perfect review scores below a long record of near-perfect ones
+    """
+    single = bayesian_rating(1, 5.0, prior_mean=4.0, prior_weight=5)
+    many = bayesian_rating(40, 4.8, prior_mean=4.0, prior_weight=5)
+
+    assert single < many
+    assert bayesian_rating(0, 0.0, prior_mean=4.0, prior_weight=5) == 4.0
+
+
+def test_highest_rating_and_best_match_use_refreshed_scores(pg_client, pg_db):
+    """
+    The refresh job scores stale lawyers, and ranked sorts read the stored scores
+    """
+    db = pg_db()
+    one_review = Lawyer(name="Ana", email="ana@example.com")
+    many_reviews = Lawyer(name="Beatriz", email="beatriz@example.com")
+    popular = Lawyer(name="Carla", email="carla@example.com", is_verified=True)
+    db.add_all([one_review, many_reviews, popular])
+    db.flush()
+    add_reviews(db, one_review, [5])
+    add_reviews(db, many_reviews, [5, 5, 5, 4] * 5)
+    add_reviews(db, popular, [4, 4, 4])
+    db.add_all([
+        ProfileImpressionCount(lawyer_id=lawyer.id, count=1000)
+        for lawyer in (one_review, many_reviews, popular)
+    ])
+    db.add(ListingClickCount(lawyer_id=popular.id, count=300))
+    db.commit()
+    db.close()
+
+    assert refresh(pg_db) == 3
+
+    by_rating = pg_client.get("/lawyers", params={"sort": "highest_rating"}).json()["lawyers"]
+    assert [lawyer["name"] for lawyer in by_rating] == ["Beatriz", "Ana", "Carla"]
+    assert by_rating[0]["review_count"] == 20
+
+    # Verification and a high click-through rate lift the best match ranking
+    best_match = pg_client.get("/lawyers").json()["lawyers"]
+    assert best_match[0]["name"] == "Carla"
+
+    db = pg_db()
+    assert db.query(Lawyer).filter(Lawyer.ranking_stale.is_(True)).count() == 0
+    assert get_watermark(db, RANKING_JOB) is not None
+    db.close()
+
+
+def test_refresh_is_incremental(pg_client, pg_db):
+    """
+    Only lawyers touched since the last run are rescored
+    """
+    db = pg_db()
+    lawyers = [Lawyer(name=f"Abogado {i}", email=f"incremental{i}@example.com") for i in range(5)]
+    db.add_all(lawyers)
+    db.commit()
+    target_id = lawyers[0].id
+    db.close()
+
+    assert refresh(pg_db) == 5
+    assert refresh(pg_db) == 0
+
+    response = pg_client.post(
+        f"/lawyers/{target_id}/reviews",
+        json={
+            "rating": 5,
+            "title": "Excelente",
+            "content": "Muy recomendable",
+            "author": {"name": "Cliente", "email": "cliente@example.com"},
+        },
+    )
+    assert response.status_code == 201
+
+    assert refresh(pg_db) == 1
+    lawyer = pg_client.get(f"/lawyers/{target_id}").json()
+    assert lawyer["review_count"] == 1
+
+
+def test_area_best_match_uses_area_score(pg_client, pg_db):
+    """
+    Within an area, best match follows the experience in that area
+    """
+    db = pg_db()
+    category = PracticeAreaCategory(name="Derecho Civil", slug="civil")
+    db.add(category)
+    db.flush()
+    family = PracticeArea(name="Familia", slug="familia", category_id=category.id)
+    labor = PracticeArea(name="Laboral", slug="laboral", category_id=category.id)
+    db.add_all([family, labor])
+    db.flush()
+    family_expert = Lawyer(name="Experta Familia", email="familia@example.com")
+    labor_expert = Lawyer(name="Experta Laboral", email="laboral@example.com")
+    db.add_all([family_expert, labor_expert])
+    db.flush()
+    db.add_all([
+        LawyerArea(lawyer_id=family_expert.id, area_id=family.id, experience_score=95),
+        LawyerArea(lawyer_id=family_expert.id, area_id=labor.id, experience_score=10),
+        LawyerArea(lawyer_id=labor_expert.id, area_id=family.id, experience_score=20),
+        LawyerArea(lawyer_id=labor_expert.id, area_id=labor.id, experience_score=90),
+    ])
+    db.commit()
+    db.close()
+
+    refresh(pg_db)
+
+    for area, expected in (("familia", "Experta Familia"), ("laboral", "Experta Laboral")):
+        lawyers = pg_client.get("/lawyers", params={"area": area}).json()["lawyers"]
+        assert lawyers[0]["name"] == expected
+
+
+def test_ranked_order_is_served_by_index(pg_engine, pg_db):
+    """
+    The ranking indexes match the ORDER BY of ranked pages, so no sort step is needed
+    """
+    with pg_engine.begin() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        for column in ("ranking_score", "rating_score"):
+            plan = connection.execute(text(
+                f"EXPLAIN SELECT id FROM lawyers ORDER BY {column} DESC, id DESC LIMIT 10"
+            )).scalars().all()
+            assert any(f"ix_lawyers_{column}" in line for line in plan)
+            assert not any("Sort" in line for line in plan)
+
+
+def test_area_best_match_is_served_by_index(pg_engine, pg_db):
+    """
+    Within an area the page walks the (area_id, ranking_score, lawyer_id) index in order
+    """
+    db = pg_db()
+    category = PracticeAreaCategory(name="Derecho Civil", slug="civil")
+    db.add(category)
+    db.flush()
+    family = PracticeArea(name="Familia", slug="familia", category_id=category.id)
+    db.add(family)
+    db.flush()
+    lawyers = [Lawyer(name=f"Abogado {i}", email=f"indexed{i}@example.com") for i in range(3)]
+    db.add_all(lawyers)
+    db.flush()
+    db.add_all([LawyerArea(lawyer_id=lawyer.id, area_id=family.id, experience_score=50) for lawyer in lawyers])
+    db.commit()
+
+    page_queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if "ORDER BY lawyer_areas.ranking_score" in statement:
+            page_queries.append((statement, parameters))
+
+    event.listen(pg_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        lawyers_repository.search_lawyers(db, area_slug="familia", limit=2)
+    finally:
+        event.remove(pg_engine, "before_cursor_execute", before_cursor_execute)
+    db.close()
+
+    assert len(page_queries) == 1
+    statement, parameters = page_queries[0]
+    assert "lawyer_areas.lawyer_id DESC" in statement
+    with pg_engine.begin() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars().all()
+    assert any("ix_lawyer_areas_area_ranking_score" in line for line in plan)
+    assert not any("Sort" in line for line in plan)
+
+
+def test_job_runner_skips_job_locked_by_another_worker(pg_engine, pg_db):
+    """
+    A job only runs in one worker at a time
+    """
+    runs = []
+    runner = JobRunner(session_factory=pg_db)
+    runner.register("test_job", lambda db: runs.append(db.execute(text("SELECT 1")).scalar()), 60)
+
+    assert runner.run_once("test_job") is True
+
+    with pg_engine.connect() as other_worker:
+        other_worker.execute(text("SELECT pg_advisory_lock(hashtext('job:test_job'))"))
+        assert runner.run_once("test_job") is False
+        other_worker.execute(text("SELECT pg_advisory_unlock(hashtext('job:test_job'))"))
+
+    assert runs == [1]
+    assert runner.stats()["test_job"]["runs"] == 1
+
+
+def test_job_runner_runs_jobs_when_started(pg_db):
+    """
+    A registered job runs as soon as the runner starts, not one interval later
+    """
+    ran = threading.Event()
+    runner = JobRunner(session_factory=pg_db)
+    runner.register("daily_job", lambda db: ran.set(), 86400)
+
+    runner.start()
+    try:
+        assert ran.wait(5)
+    finally:
+        runner.stop()
+    assert runner.stats()["daily_job"]["runs"] == 1
@@ -0,0 +1,192 @@
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.models import City, Guide, Lawyer, PracticeArea, PracticeAreaCategory, Question, Topic, User
+from app.services import search as search_service
+from tests.conftest import capture_queries
+
+
+def seed_catalog(session_factory):
+    db = session_factory()
+    category = PracticeAreaCategory(name="Derecho Civil", slug="civil")
+    db.add(category)
+    db.flush()
+    db.add_all([
+        PracticeArea(name="Laboral", slug="laboral", category_id=category.id),
+        PracticeArea(name="Derecho de Familia", slug="familia", category_id=category.id),
+        Topic(name="Divorcio", slug="divorcio"),
+        Topic(name="Herencias", slug="herencias"),
+        Guide(title="Cómo tramitar un divorcio", slug="tramitar-divorcio", published=True),
+        Guide(title="Divorcio en borrador", slug="borrador", published=False),
+        City(name="Santiago", slug="santiago"),
+        City(name="Valparaíso", slug="valparaiso"),
+        Lawyer(name="María González", email="maria@example.com"),
+        Lawyer(name="Laura Pérez", email="laura@example.com"),
+    ])
+    db.commit()
+    db.close()
+
+
+def suggest(client, q, **params):
+    response = client.get("/search/suggest", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()["suggestions"]
+
+
+def test_suggest_mixes_entity_types_prefix_first(pg_client, pg_db):
+    """
+    A prefix returns every matching type, prefix matches ahead of fuzzy ones,
+    and unpublished guides are left out
+    """
+    seed_catalog(pg_db)
+
+    suggestions = suggest(pg_client, "div")
+    assert {(s["type"], s["label"]) for s in suggestions} == {
+        ("topic", "Divorcio"),
+        ("guide", "Cómo tramitar un divorcio"),
+    }
+    assert suggestions[0]["label"] == "Divorcio"
+
+    labels = [s["label"] for s in suggest(pg_client, "la")]
+    assert labels[:2] == ["Laboral", "Laura Pérez"]
+
+    assert suggest(pg_client, "x") == []
+
+
+def test_suggest_tolerates_typos_and_accents(pg_client, pg_db):
+    """
+    Misspelled and unaccented queries still find their match
+    """
+    seed_catalog(pg_db)
+
+    assert ("lawyer", "María González") in {(s["type"], s["label"]) for s in suggest(pg_client, "gonsalez")}
+    assert ("city", "Valparaíso") in {(s["type"], s["label"]) for s in suggest(pg_client, "valparaiso")}
+    assert ("topic", "Herencias") in {(s["type"], s["label"]) for s in suggest(pg_client, "erencias")}
+
+
+def test_suggest_limits_each_type(pg_client, pg_db):
+    """
+    `limit` caps the suggestions of each entity type separately
+    """
+    seed_catalog(pg_db)
+    db = pg_db()
+    db.add_all([Lawyer(name=f"Diego Díaz {i}", email=f"diego{i}@example.com") for i in range(4)])
+    db.commit()
+    db.close()
+
+    suggestions = suggest(pg_client, "di", limit=2)
+    types = [s["type"] for s in suggestions]
+    assert types.count("lawyer") == 2
+    assert types.count("topic") == 1
+
+
+def test_reference_suggestions_are_cached_until_written(pg_client, pg_db, pg_engine):
+    """
+    Areas, topics and cities are read once per prefix, until one of those tables changes
+    """
+    seed_catalog(pg_db)
+    suggest(pg_client, "san")
+
+    with capture_queries(pg_engine) as statements:
+        assert ("city", "Santiago") in {(s["type"], s["label"]) for s in suggest(pg_client, "san")}
+    assert not any("FROM cities" in statement for statement in statements)
+    assert any("FROM lawyers" in statement for statement in statements)
+
+    db = pg_db()
+    db.add(City(name="San Antonio", slug="san-antonio"))
+    db.commit()
+    db.close()
+
+    assert ("city", "San Antonio") in {(s["type"], s["label"]) for s in suggest(pg_client, "san")}
+
+
+def test_suggest_uses_trigram_indexes(pg_engine, pg_db):
+    """
+    Both the prefix and the fuzzy match are answered from the trigram index
+    """
+    with pg_engine.begin() as connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.execute(text(
+            "EXPLAIN SELECT id FROM lawyers "
+            "WHERE lexic_normalize(name) LIKE 'gon%' OR 'gonsalez' <% lexic_normalize(name)"
+        )).scalars().all()
+    assert any("ix_lawyers_name_trgm" in line for line in plan)
+
+
+def seed_questions(session_factory):
+    db = session_factory()
+    user = User(email="cliente@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add_all([
+        Question(title="¿Cuánto demora un divorcio de mutuo acuerdo?", content="...", user_id=user.id),
+        Question(title="Despido sin finiquito", content="...", user_id=user.id),
+    ])
+    db.commit()
+    db.close()
+
+
+def test_federated_search_returns_typed_sections(pg_client, pg_db):
+    """
+    One call searches every entity type, each in its own section
+    """
+    seed_catalog(pg_db)
+    seed_questions(pg_db)
+    db = pg_db()
+    db.add(Lawyer(name="Pedro Soto", title="Abogado de divorcio", email="pedro@example.com"))
+    db.commit()
+    db.close()
+
+    response = pg_client.get("/search", params={"q": "divorcio"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["partial"] is False
+
+    sections = body["sections"]
+    assert [lawyer["name"] for lawyer in sections["lawyers"]["items"]] == ["Pedro Soto"]
+    assert sections["lawyers"]["total"] == 1
+    assert [guide["slug"] for guide in sections["guides"]["items"]] == ["tramitar-divorcio"]
+    assert [question["title"] for question in sections["questions"]["items"]] == [
+        "¿Cuánto demora un divorcio de mutuo acuerdo?"
+    ]
+    assert [topic["slug"] for topic in sections["topics"]["items"]] == ["divorcio"]
+    assert all(section["status"] == "ok" for section in sections.values())
+
+
+def test_federated_search_limits_and_selects_sections(pg_client, pg_db):
+    """
+    `sections` picks the sections to run and `limit` caps each of them
+    """
+    db = pg_db()
+    db.add_all([Topic(name=f"Contrato {i}", slug=f"contrato-{i}") for i in range(3)])
+    db.commit()
+    db.close()
+
+    body = pg_client.get("/search", params={"q": "contrato", "sections": "topics", "limit": 2}).json()
+    assert body["sections"]["lawyers"] is None
+    assert len(body["sections"]["topics"]["items"]) == 2
+    assert body["sections"]["topics"]["has_more"] is True
+
+    response = pg_client.get("/search", params={"q": "contrato", "sections": "topics,users"})
+    assert response.status_code == 400
+
+
+def test_federated_search_returns_partial_results_when_a_section_is_slow(pg_client, pg_db, monkeypatch):
+    """
+    A section over the time budget is reported as timed out without holding back the others
+    """
+    seed_catalog(pg_db)
+
+    def slow_guides(db, query, limit):
+        db.execute(text("SELECT pg_sleep(5)"))
+        return {"items": [], "has_more": False}
+
+    monkeypatch.setitem(search_service.SECTIONS, "guides", slow_guides)
+    monkeypatch.setattr(settings, "SEARCH_TIME_BUDGET_MS", 500)
+
+    body = pg_client.get("/search", params={"q": "divorcio"}).json()
+    assert body["partial"] is True
+    assert body["sections"]["guides"]["status"] == "timeout"
+    assert body["sections"]["topics"]["status"] == "ok"
+    assert [topic["slug"] for topic in body["sections"]["topics"]["items"]] == ["divorcio"]
+    assert body["took_ms"] < 2000
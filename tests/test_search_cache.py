@@ -0,0 +1,94 @@
+import pytest
+
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend
+from app.models import Lawyer
+from app.models.analytics import ProfileImpression
+from app.services import search_cache
+from app.services.analytics_ingestion import analytics_buffer
+from tests.conftest import capture_queries
+from tests.test_lawyers import seed_lawyers
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache_backend(request):
+    """
+    Each test runs against both backends, Redis through the RESP stand-in
+    """
+    if request.param == "memory":
+        backend = MemoryCacheBackend()
+    else:
+        server = request.getfixturevalue("resp_server")
+        host, port = server.server_address
+        backend = RedisCacheBackend.from_url(f"redis://{host}:{port}/0")
+    search_cache.set_backend(backend)
+    yield backend
+    search_cache.set_backend(MemoryCacheBackend())
+
+
+def lawyer_queries(statements):
+    return [s for s in statements if "FROM lawyers" in s]
+
+
+def test_repeated_search_is_served_from_cache(pg_client, pg_db, pg_engine, cache_backend):
+    """
+    The second identical search skips the database but still records its impressions
+    """
+    seed_lawyers(pg_db, 3)
+    params = {"city": "Santiago", "sort": "best_match", "size": 10}
+
+    first = pg_client.get("/lawyers", params=params).json()
+    with capture_queries(pg_engine) as statements:
+        # Same normalized key: city case and spacing do not matter
+        second = pg_client.get("/lawyers", params={**params, "city": " santiago "}).json()
+
+    assert second == first
+    assert lawyer_queries(statements) == []
+
+    analytics_buffer.flush()
+    db = pg_db()
+    assert db.query(ProfileImpression).count() == 6
+    db.close()
+
+
+def test_lawyer_writes_invalidate_cached_pages(pg_client, pg_db, cache_backend):
+    """
+    Creating a lawyer or posting a review drops the cached pages
+    """
+    seed_lawyers(pg_db, 2)
+    assert pg_client.get("/lawyers").json()["total"] == 2
+
+    db = pg_db()
+    db.add(Lawyer(name="Nueva Abogada", email="nueva@example.com"))
+    db.commit()
+    target_id = db.query(Lawyer.id).filter(Lawyer.email == "nueva@example.com").scalar()
+    db.close()
+    assert pg_client.get("/lawyers").json()["total"] == 3
+
+    response = pg_client.post(
+        f"/lawyers/{target_id}/reviews",
+        json={
+            "rating": 5,
+            "title": "Excelente",
+            "content": "Muy recomendable",
+            "author": {"name": "Cliente", "email": "cliente@example.com"},
+        },
+    )
+    assert response.status_code == 201
+    lawyers = pg_client.get("/lawyers").json()["lawyers"]
+    assert next(lawyer for lawyer in lawyers if lawyer["id"] == str(target_id))["review_count"] == 1
+
+
+def test_unreachable_backend_falls_back_to_database(pg_client, pg_db):
+    """
+    A cache server that is down does not fail searches
+    """
+    seed_lawyers(pg_db, 2)
+    search_cache.set_backend(RedisCacheBackend(host="127.0.0.1", port=1, timeout_seconds=0.1))
+    try:
+        errors = search_cache.stats()["errors"]
+        response = pg_client.get("/lawyers")
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+        assert search_cache.stats()["errors"] > errors
+    finally:
+        search_cache.set_backend(MemoryCacheBackend())
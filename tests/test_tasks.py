@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.services.tasks import TaskExecutor
+
+
+@pytest.fixture
+def executor(pg_db, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_MAX_WORKERS", 2)
+    monkeypatch.setattr(settings, "TASK_QUEUE_MAX_TASKS", 3)
+    monkeypatch.setattr(settings, "TASK_RETRY_BACKOFF_MS", 1)
+    task_executor = TaskExecutor(session_factory=pg_db)
+    task_executor.start()
+    yield task_executor
+    task_executor.stop()
+
+
+def test_tasks_get_their_own_session_and_retry_transient_errors(executor):
+    sessions = []
+
+    def flaky(db, value):
+        sessions.append(db)
+        if len(sessions) < 3:
+            raise OperationalError("SELECT 1", {}, Exception("server closed the connection"))
+        return db.execute(text("SELECT :value"), {"value": value}).scalar()
+
+    assert executor.submit("flaky", flaky, 7, with_session=True).result(timeout=5) == 7
+    assert len(set(map(id, sessions))) == 3
+
+    future = executor.submit("broken", lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
+
+    stats = executor.stats()
+    assert stats["tasks"]["flaky"]["retried"] == 2
+    assert stats["tasks"]["flaky"]["completed"] == 1
+    assert stats["tasks"]["broken"]["failed"] == 1
+    assert stats["tasks"]["broken"]["retried"] == 0
+    assert stats["workers"] == 2
+
+
+def test_full_queue_sheds_tasks(executor):
+    """
+    With every worker busy and the queue full, further tasks are dropped at once
+    """
+    release = threading.Event()
+    blocked = [executor.submit("slow", release.wait, 5) for _ in range(2)]
+    while executor.stats()["busy_workers"] < 2:
+        time.sleep(0.01)
+    queued = [executor.submit("slow", release.wait, 5) for _ in range(3)]
+    assert executor.submit("slow", release.wait, 5) is None
+    assert asyncio.run(executor.run("check", release.wait, 5, shed_result="shed")) == "shed"
+
+    stats = executor.stats()
+    assert stats["queue_depth"] == 3
+    assert stats["shed"] == 2
+
+    release.set()
+    for future in blocked + queued:
+        assert future.result(timeout=5) is True
+    assert executor.stats()["tasks"]["slow"]["completed"] == 5
+
+
+def test_tasks_run_off_the_caller_when_stopped(pg_db):
+    """
+    A stopped executor still keeps tasks off the calling thread, usually the event loop
+    """
+    task_executor = TaskExecutor(session_factory=pg_db)
+    caller = threading.current_thread()
+    future = task_executor.submit("detached", lambda: threading.current_thread() is caller)
+    assert future.result(timeout=5) is False
+    assert asyncio.run(task_executor.run("detached", lambda value: value * 2, 21)) == 42
+    assert task_executor.wait_idle(timeout=5)
+    assert task_executor.stats()["tasks"]["detached"]["completed"] == 2